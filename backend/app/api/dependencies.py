@@ -1,26 +1,29 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import AsyncIterator, List, Optional
 
-from app.models.database import get_db, User
+from app.models.database import get_async_db, read_session, User
 from app.services.auth_service import auth_service
 from app.models.schemas import TokenData
 
 # Security scheme
 security = HTTPBearer()
 
+# Most windows one analytics request may ask for
+MAX_ANALYTICS_WINDOWS = 8
+
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> User:
     """Get current authenticated user"""
     
     token = credentials.credentials
     token_data = auth_service.verify_token(token)
     
-    user = auth_service.get_user_by_id(db, token_data.user_id)
+    user = await auth_service.get_user_by_id(db, token_data.user_id)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -44,9 +47,26 @@ async def get_current_active_user(
     return current_user
 
 
-def get_optional_current_user(
+async def get_read_db(
+    current_user: User = Depends(get_current_user),
+    auth_db: AsyncSession = Depends(get_async_db)
+) -> AsyncIterator[AsyncSession]:
+    """Get a read-only session for the current user's analytics and listings
+    
+    Uses the read replica when configured, except shortly after the user wrote
+    so they always see their own changes.
+    """
+    # End the user lookup's transaction so the request doesn't hold a primary
+    # connection while it reads elsewhere; the user stays loaded, and a later
+    # write on the same session begins a new transaction
+    await auth_db.commit()
+    async with read_session(current_user.id) as db:
+        yield db
+
+
+async def get_optional_current_user(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Optional[User]:
     """Get current user if authenticated, otherwise None"""
     
@@ -56,7 +76,7 @@ def get_optional_current_user(
     try:
         token = credentials.credentials
         token_data = auth_service.verify_token(token)
-        user = auth_service.get_user_by_id(db, token_data.user_id)
+        user = await auth_service.get_user_by_id(db, token_data.user_id)
         
         if user and user.is_active:
             return user
@@ -64,4 +84,28 @@ def get_optional_current_user(
     except HTTPException:
         pass
     
-    return None
\ No newline at end of file
+    return None
+
+
+def get_analytics_windows(
+    windows: Optional[str] = Query(
+        None, description="Comma-separated window lengths in days, e.g. 7,30,90,365; overrides days"
+    )
+) -> Optional[List[int]]:
+    """Parse the ``windows`` query parameter into sorted, distinct day counts"""
+    if windows is None:
+        return None
+    
+    try:
+        days = sorted({int(part) for part in windows.split(",") if part.strip()})
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="windows must be a comma-separated list of whole days"
+        )
+    if not days or len(days) > MAX_ANALYTICS_WINDOWS or days[0] < 1 or days[-1] > 365:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"windows must list 1 to {MAX_ANALYTICS_WINDOWS} values between 1 and 365"
+        )
+    return days
@@ -1,42 +1,60 @@
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Union
 
-from app.models.database import get_db
-from app.models.schemas import AnalyticsResponse
+from app.core.analytics_cache import analytics_cache
+from app.models.schemas import AnalyticsResponse, MultiWindowAnalyticsResponse
 from app.services.routine_service import routine_service
-from app.api.dependencies import get_current_active_user
+from app.api.dependencies import get_analytics_windows, get_current_active_user, get_read_db
 
 router = APIRouter()
 
 
-@router.get("/", response_model=AnalyticsResponse)
+@router.get("/", response_model=Union[AnalyticsResponse, MultiWindowAnalyticsResponse])
 async def get_analytics(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user = Depends(get_current_active_user),
-    days: int = Query(30, ge=1, le=365, description="Number of days to analyze")
+    days: int = Query(30, ge=1, le=365, description="Number of days to analyze"),
+    windows: Optional[List[int]] = Depends(get_analytics_windows)
 ):
-    """Get user analytics"""
-    analytics = routine_service.get_user_analytics(db, current_user.id, days)
+    """Get user analytics, for one window or for several from a single scan"""
+    if windows:
+        analytics = await analytics_cache.get_or_compute(
+            current_user.id, "analytics", ("windows", tuple(windows)),
+            lambda: routine_service.get_user_analytics_windows(db, current_user.id, windows)
+        )
+        return MultiWindowAnalyticsResponse(windows=analytics)
+    
+    analytics = await analytics_cache.get_or_compute(
+        current_user.id, "analytics", days,
+        lambda: routine_service.get_user_analytics(db, current_user.id, days)
+    )
     return analytics
 
 
 @router.get("/mood-trends")
 async def get_mood_trends(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user = Depends(get_current_active_user),
     days: int = Query(30, ge=1, le=365)
 ):
     """Get mood trends over time"""
-    trends = routine_service.get_mood_trends(db, current_user.id, days)
+    trends = await analytics_cache.get_or_compute(
+        current_user.id, "analytics.mood_trends", days,
+        lambda: routine_service.get_mood_trends(db, current_user.id, days)
+    )
     return {"mood_trends": trends}
 
 
 @router.get("/category-distribution")
 async def get_category_distribution(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user = Depends(get_current_active_user),
     days: int = Query(30, ge=1, le=365)
 ):
     """Get category distribution"""
-    distribution = routine_service.get_category_distribution(db, current_user.id, days)
+    distribution = await analytics_cache.get_or_compute(
+        current_user.id, "analytics.category_distribution", days,
+        lambda: routine_service.get_category_distribution(db, current_user.id, days)
+    )
     return {"category_distribution": distribution}
\ No newline at end of file
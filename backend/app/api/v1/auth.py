@@ -1,8 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.database import get_db
+from app.models.database import get_async_db
 from app.models.schemas import UserCreate, UserResponse, Token
 from app.services.auth_service import auth_service
 from app.api.dependencies import get_current_active_user
@@ -13,11 +13,11 @@ router = APIRouter()
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def register(
     user_data: UserCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Register a new user"""
     try:
-        user = auth_service.create_user(db, user_data)
+        user = await auth_service.create_user(db, user_data)
         return UserResponse(
             id=user.id,
             email=user.email,
@@ -38,11 +38,11 @@ async def register(
 @router.post("/login", response_model=Token)
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Login user"""
     try:
-        token = auth_service.login_user(db, form_data.username, form_data.password)
+        token = await auth_service.login_user(db, form_data.username, form_data.password)
         return token
     except HTTPException:
         raise
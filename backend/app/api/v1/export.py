@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from app.models.database import User
+from app.services.export_service import MEDIA_TYPES, export_service
+from app.api.dependencies import get_current_active_user
+
+router = APIRouter()
+
+
+@router.get("/")
+async def export_data(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="ndjson or csv"),
+    include: str = Query("routines,completions,moods", description="Comma-separated datasets: routines, completions, moods (one for CSV)"),
+    gzip: bool = Query(False, description="Gzip-compress the download"),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Stream the user's routines, completions and mood entries as a download"""
+    try:
+        datasets = export_service.parse_datasets(include, format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    filename = export_service.filename(datasets, format, gzip)
+    return StreamingResponse(
+        export_service.stream_export(current_user.id, datasets, format, gzip=gzip),
+        media_type="application/gzip" if gzip else MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"', "Cache-Control": "no-store"}
+    )
@@ -1,17 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Union
 from datetime import datetime, timedelta
 
-from app.models.database import get_db, User
+from app.core.analytics_cache import analytics_cache
+from app.models.database import get_async_db, User
 from app.models.schemas import (
     MoodCreate, 
     MoodUpdate, 
     MoodResponse, 
-    MoodAnalyticsResponse
+    MoodAnalyticsResponse,
+    MoodMultiWindowAnalyticsResponse,
+    MoodAdvancedAnalyticsResponse,
+    MoodImportResponse,
+    MoodPage
 )
 from app.services.mood_service import mood_service
-from app.api.dependencies import get_current_user
+from app.services.mood_import import format_for_content_type, mood_import_service
+from app.services.mood_timeseries import mood_timeseries_service
+from app.services.pagination import InvalidCursor
+from app.api.dependencies import get_analytics_windows, get_current_user, get_read_db
 
 router = APIRouter()
 
@@ -19,24 +27,51 @@ router = APIRouter()
 @router.post("/", response_model=MoodResponse)
 async def create_mood_entry(
     mood_data: MoodCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Create a new mood entry"""
     try:
-        mood_entry = mood_service.create_mood_entry(db, current_user.id, mood_data)
+        mood_entry = await mood_service.create_mood_entry(db, current_user.id, mood_data)
         return mood_entry
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
-@router.get("/", response_model=List[MoodResponse])
+@router.post("/import", response_model=MoodImportResponse)
+async def import_mood_entries(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(ndjson|csv)$", description="ndjson or csv; defaults to the Content-Type"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Bulk import mood entries from an NDJSON or CSV request body
+    
+    The body is streamed and inserted in batches; invalid rows are reported
+    by line number and skipped. CSV needs a header row with a mood column
+    and may include intensity, context, triggers (separated by ;) and created_at.
+    """
+    fmt = format or format_for_content_type(request.headers.get("content-type"))
+    if fmt is None:
+        raise HTTPException(
+            status_code=415,
+            detail="Send application/x-ndjson or text/csv, or pass format=ndjson|csv"
+        )
+    try:
+        return await mood_import_service.import_moods(db, current_user.id, request.stream(), fmt)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/", response_model=Union[List[MoodResponse], MoodPage])
 async def get_mood_entries(
     skip: int = Query(0, ge=0, description="Number of entries to skip"),
     limit: int = Query(100, ge=1, le=1000, description="Number of entries to return"),
     start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
     end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
-    db: Session = Depends(get_db),
+    pagination: str = Query("offset", pattern="^(offset|cursor)$", description="offset returns a list; cursor returns a page with next/prev cursors"),
+    cursor: Optional[str] = Query(None, description="Cursor from a previous page (implies cursor pagination)"),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get user's mood entries with pagination and date filtering"""
@@ -50,7 +85,22 @@ async def get_mood_entries(
         if end_date:
             end_dt = datetime.strptime(end_date, "%Y-%m-%d") + timedelta(days=1)
         
-        mood_entries = mood_service.get_user_moods(
+        if cursor is not None or pagination == "cursor":
+            page = await mood_service.get_user_moods_page(
+                db,
+                current_user.id,
+                limit=limit,
+                cursor=cursor,
+                start_date=start_dt,
+                end_date=end_dt
+            )
+            return MoodPage(
+                items=[MoodResponse.model_validate(entry) for entry in page.items],
+                next_cursor=page.next_cursor,
+                prev_cursor=page.prev_cursor
+            )
+        
+        mood_entries = await mood_service.get_user_moods(
             db, 
             current_user.id, 
             skip=skip, 
@@ -59,6 +109,8 @@ async def get_mood_entries(
             end_date=end_dt
         )
         return mood_entries
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
     except Exception as e:
@@ -68,11 +120,11 @@ async def get_mood_entries(
 @router.get("/{mood_id}", response_model=MoodResponse)
 async def get_mood_entry(
     mood_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get a specific mood entry by ID"""
-    mood_entry = mood_service.get_mood_entry(db, mood_id, current_user.id)
+    mood_entry = await mood_service.get_mood_entry(db, mood_id, current_user.id)
     if not mood_entry:
         raise HTTPException(status_code=404, detail="Mood entry not found")
     return mood_entry
@@ -82,11 +134,11 @@ async def get_mood_entry(
 async def update_mood_entry(
     mood_id: int,
     mood_data: MoodUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Update a mood entry"""
-    mood_entry = mood_service.update_mood_entry(db, mood_id, current_user.id, mood_data)
+    mood_entry = await mood_service.update_mood_entry(db, mood_id, current_user.id, mood_data)
     if not mood_entry:
         raise HTTPException(status_code=404, detail="Mood entry not found")
     return mood_entry
@@ -95,39 +147,68 @@ async def update_mood_entry(
 @router.delete("/{mood_id}")
 async def delete_mood_entry(
     mood_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Delete a mood entry"""
-    success = mood_service.delete_mood_entry(db, mood_id, current_user.id)
+    success = await mood_service.delete_mood_entry(db, mood_id, current_user.id)
     if not success:
         raise HTTPException(status_code=404, detail="Mood entry not found")
     return {"message": "Mood entry deleted successfully"}
 
 
-@router.get("/analytics/overview", response_model=MoodAnalyticsResponse)
+@router.get("/analytics/overview", response_model=Union[MoodAnalyticsResponse, MoodMultiWindowAnalyticsResponse])
 async def get_mood_analytics(
     days: int = Query(30, ge=1, le=365, description="Number of days to analyze"),
-    db: Session = Depends(get_db),
+    windows: Optional[List[int]] = Depends(get_analytics_windows),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get mood analytics for the user"""
+    """Get mood analytics for the user, for one window or for several from a single scan"""
     try:
-        analytics = mood_service.get_mood_analytics(db, current_user.id, days)
+        if windows:
+            analytics = await analytics_cache.get_or_compute(
+                current_user.id, "moods.overview", ("windows", tuple(windows)),
+                lambda: mood_service.get_mood_analytics_windows(db, current_user.id, windows)
+            )
+            return MoodMultiWindowAnalyticsResponse(windows=analytics)
+        analytics = await analytics_cache.get_or_compute(
+            current_user.id, "moods.overview", days,
+            lambda: mood_service.get_mood_analytics(db, current_user.id, days)
+        )
         return analytics
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/analytics/advanced", response_model=MoodAdvancedAnalyticsResponse)
+async def get_advanced_mood_analytics(
+    days: int = Query(365, ge=1, le=3650, description="Number of days to analyze"),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Get rolling averages, volatility, percentiles, weekday profile and trend of mood intensity"""
+    try:
+        return await analytics_cache.get_or_compute(
+            current_user.id, "moods.advanced", days,
+            lambda: mood_timeseries_service.get_advanced_analytics(db, current_user.id, days)
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/analytics/trends")
 async def get_mood_trends(
     days: int = Query(30, ge=1, le=365, description="Number of days to analyze"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get mood trends over time"""
     try:
-        analytics = mood_service.get_mood_analytics(db, current_user.id, days)
+        analytics = await analytics_cache.get_or_compute(
+            current_user.id, "moods.trends", days,
+            lambda: mood_service.get_mood_analytics(db, current_user.id, days, facets=("daily", "weekly"))
+        )
         return {"trends": analytics["trends"], "daily_averages": analytics["daily_averages"]}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -136,12 +217,15 @@ async def get_mood_trends(
 @router.get("/analytics/distribution")
 async def get_mood_distribution(
     days: int = Query(30, ge=1, le=365, description="Number of days to analyze"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get mood distribution statistics"""
     try:
-        analytics = mood_service.get_mood_analytics(db, current_user.id, days)
+        analytics = await analytics_cache.get_or_compute(
+            current_user.id, "moods.distribution", days,
+            lambda: mood_service.get_mood_analytics(db, current_user.id, days, facets=("summary", "distribution"))
+        )
         return {
             "mood_distribution": analytics["mood_distribution"],
             "most_common_mood": analytics["most_common_mood"],
@@ -1,10 +1,11 @@
 from fastapi import APIRouter
 
-from app.api.v1 import auth, routines, analytics, moods
+from app.api.v1 import auth, routines, analytics, moods, export
 
 api_router = APIRouter()
 
 api_router.include_router(auth.router, prefix="/auth", tags=["authentication"])
 api_router.include_router(routines.router, prefix="/routines", tags=["routines"])
 api_router.include_router(analytics.router, prefix="/analytics", tags=["analytics"])
-api_router.include_router(moods.router, prefix="/moods", tags=["moods"])
\ No newline at end of file
+api_router.include_router(moods.router, prefix="/moods", tags=["moods"])
+api_router.include_router(export.router, prefix="/export", tags=["export"])
\ No newline at end of file
@@ -1,14 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import AsyncIterator, List, Optional, Union
+import json
 
-from app.models.database import get_db
+from app.models.database import get_async_db
 from app.models.schemas import (
     GenerateRequest, GenerateResponse, RoutineResponse, RoutineCompletion,
-    AnalyticsResponse
+    AnalyticsResponse, BatchGenerateRequest, BatchGenerateResponse, BatchGenerateItem, RoutinePage
 )
 from app.services.routine_service import routine_service
-from app.api.dependencies import get_current_active_user
+from app.services.pagination import InvalidCursor
+from app.api.dependencies import get_current_active_user, get_read_db
 
 router = APIRouter()
 
@@ -16,7 +19,7 @@ router = APIRouter()
 @router.post("/generate", response_model=RoutineResponse)
 async def generate_routine(
     request: GenerateRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user = Depends(get_current_active_user)
 ):
     """Generate a new self-care routine"""
@@ -30,15 +33,73 @@ async def generate_routine(
         )
 
 
-@router.get("/", response_model=List[RoutineResponse])
+@router.post("/generate/batch", response_model=BatchGenerateResponse)
+async def generate_routines_batch(
+    batch: BatchGenerateRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_active_user)
+):
+    """Generate several self-care routines in one request"""
+    results = await routine_service.generate_routines_batch(db, batch.requests, current_user.id)
+    
+    items = [
+        BatchGenerateItem(index=index, routine=routine, error=error)
+        for index, (routine, error) in enumerate(results)
+    ]
+    succeeded = sum(1 for item in items if item.routine is not None)
+    
+    return BatchGenerateResponse(
+        results=items,
+        succeeded=succeeded,
+        failed=len(items) - succeeded
+    )
+
+
+@router.post("/generate/stream")
+async def generate_routine_stream(
+    request: GenerateRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(get_current_active_user)
+):
+    """Generate a new self-care routine, streaming each step as a Server-Sent Event"""
+    user_history = await routine_service.get_user_history_for_ai(db, current_user.id)
+    events = routine_service.stream_routine(request, current_user.id, user_history)
+    
+    return StreamingResponse(
+        _sse(events),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+async def _sse(events: AsyncIterator) -> AsyncIterator[str]:
+    """Format (event, data) pairs as Server-Sent Events"""
+    async for event, data in events:
+        yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.get("/", response_model=Union[List[RoutineResponse], RoutinePage])
 async def get_routines(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user = Depends(get_current_active_user),
     limit: int = Query(10, ge=1, le=50),
-    offset: int = Query(0, ge=0)
+    offset: int = Query(0, ge=0),
+    pagination: str = Query("offset", pattern="^(offset|cursor)$", description="offset returns a list; cursor returns a page with next/prev cursors"),
+    cursor: Optional[str] = Query(None, description="Cursor from a previous page (implies cursor pagination)")
 ):
     """Get user's routines"""
-    routines = routine_service.get_user_routines(db, current_user.id, limit, offset)
+    if cursor is not None or pagination == "cursor":
+        try:
+            page = await routine_service.get_user_routines_page(db, current_user.id, limit, cursor)
+        except InvalidCursor as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        return RoutinePage(
+            items=[RoutineResponse.model_validate(routine) for routine in page.items],
+            next_cursor=page.next_cursor,
+            prev_cursor=page.prev_cursor
+        )
+    
+    routines = await routine_service.get_user_routines(db, current_user.id, limit, offset)
     
     return [
         RoutineResponse(
@@ -62,11 +123,11 @@ async def get_routines(
 @router.get("/{routine_id}", response_model=RoutineResponse)
 async def get_routine(
     routine_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user = Depends(get_current_active_user)
 ):
     """Get a specific routine"""
-    routine = routine_service.get_routine(db, routine_id, current_user.id)
+    routine = await routine_service.get_routine(db, routine_id, current_user.id)
     
     if not routine:
         raise HTTPException(
@@ -94,7 +155,7 @@ async def get_routine(
 async def complete_routine(
     routine_id: int,
     completion_data: RoutineCompletion,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user = Depends(get_current_active_user)
 ):
     """Complete a routine"""
@@ -102,7 +163,7 @@ async def complete_routine(
         # Update completion data with routine ID
         completion_data.routine_id = routine_id
         
-        completion = routine_service.complete_routine(db, completion_data, current_user.id)
+        completion = await routine_service.complete_routine(db, completion_data, current_user.id)
         
         return {"message": "Routine completed successfully", "completion_id": completion.id}
         
@@ -121,12 +182,12 @@ async def complete_routine(
 @router.get("/search/", response_model=List[RoutineResponse])
 async def search_routines(
     query: str = Query(..., min_length=2),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user = Depends(get_current_active_user),
     limit: int = Query(10, ge=1, le=50)
 ):
     """Search user's routines"""
-    routines = routine_service.search_routines(db, current_user.id, query, limit)
+    routines = await routine_service.search_routines(db, current_user.id, query, limit)
     
     return [
         RoutineResponse(
@@ -149,12 +210,12 @@ async def search_routines(
 
 @router.get("/recommendations/", response_model=List[RoutineResponse])
 async def get_recommendations(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user = Depends(get_current_active_user),
     limit: int = Query(5, ge=1, le=10)
 ):
     """Get personalized routine recommendations"""
-    routines = routine_service.get_recommendations(db, current_user.id, limit)
+    routines = await routine_service.get_recommendations(db, current_user.id, limit)
     
     return [
         RoutineResponse(
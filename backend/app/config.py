@@ -12,15 +12,84 @@ class Settings(BaseSettings):
     VERSION: str = "1.0.0"
     DESCRIPTION: str = "An AI-powered wellness and self-care application"
     
+    # LLM Provider
+    LLM_PROVIDER: str = "openai"  # "openai", or "fake" for a local stub used in load tests
+    LLM_JSON_MODE: bool = True  # ask the provider for structured JSON output when supported
+    FAKE_LLM_LATENCY_DISTRIBUTION: str = "lognormal"  # constant, uniform or lognormal
+    FAKE_LLM_LATENCY_MS: float = 800.0  # median latency
+    FAKE_LLM_LATENCY_SPREAD: float = 0.5  # lognormal sigma, or +/- fraction for uniform
+    FAKE_LLM_ERROR_RATE: float = 0.0
+    FAKE_LLM_RATE_LIMIT_RATE: float = 0.0
+    FAKE_LLM_RATE_LIMIT_LATENCY_FRACTION: float = 0.1  # share of the sampled latency a rate-limit response takes
+    FAKE_LLM_SEED: Optional[int] = None
+    
     # OpenAI Configuration
     OPENAI_API_KEY: Optional[str] = None
     OPENAI_MODEL: str = "gpt-4o"
     OPENAI_MAX_TOKENS: int = 500
     OPENAI_TEMPERATURE: float = 0.7
+    OPENAI_TIMEOUT: float = 30.0  # seconds, per completion call
+    OPENAI_CONNECT_TIMEOUT: float = 5.0  # seconds
+    OPENAI_MAX_RETRIES: int = 2
+    OPENAI_MAX_CONNECTIONS: int = 100
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    OPENAI_KEEPALIVE_EXPIRY: float = 30.0  # seconds
+    
+    # Routine Generation Cache
+    AI_CACHE_ENABLED: bool = True
+    AI_CACHE_MAX_SIZE: int = 1024
+    AI_CACHE_TTL: int = 21600  # seconds
+    AI_CACHE_TTL_JITTER: float = 0.1  # +/- fraction of the TTL
+    AI_CACHE_VARIANTS: int = 3  # routines kept and rotated per request fingerprint
+    
+    # Analytics Cache
+    ANALYTICS_CACHE_ENABLED: bool = True
+    ANALYTICS_CACHE_MAX_SIZE: int = 10000  # results across all users, least recently used evicted first
+    ANALYTICS_CACHE_TTL: int = 300  # seconds; bounds staleness from writes handled by other workers
+    
+    # LLM Call Scheduling
+    LLM_MAX_CONCURRENCY: int = 8
+    LLM_REQUESTS_PER_MINUTE: int = 500  # provider request quota
+    LLM_BURST: int = 20
+    LLM_MAX_QUEUE_WAIT: float = 30.0  # seconds, for urgent/high/medium requests
+    LLM_LOW_PRIORITY_MAX_WAIT: float = 2.0  # seconds before low priority degrades to a fallback
+    LLM_RATE_LIMIT_BACKOFF: float = 5.0  # seconds all callers pause after a provider rate limit
+    
+    # Batch Generation
+    ROUTINE_BATCH_CONCURRENCY: int = 5  # parallel AI calls per batch request
+    
+    # Template Fast Path
+    TEMPLATE_FAST_PATH_ENABLED: bool = True
+    TEMPLATE_PREFER: bool = False  # serve any confident template match instead of calling the LLM
+    TEMPLATE_HIGH_CONFIDENCE: float = 0.9  # served without any opt-in
+    TEMPLATE_MIN_CONFIDENCE: float = 0.6  # served when the user or TEMPLATE_PREFER opts in
+    TEMPLATE_INDEX_REFRESH_SECONDS: int = 60  # change check and usage_count flush interval
     
     # Database Configuration
     DATABASE_URL: str = "sqlite:///./selfcare.db"
     DATABASE_ECHO: bool = False
+    DATABASE_ENGINE_PROFILE: str = "auto"  # auto, development, production or pooled (behind PgBouncer)
+    DATABASE_POOL_SIZE: Optional[int] = None  # overrides the profile
+    DATABASE_MAX_OVERFLOW: Optional[int] = None  # overrides the profile
+    DATABASE_POOL_RECYCLE: Optional[int] = None  # seconds; overrides the profile
+    DATABASE_POOL_TIMEOUT: float = 30.0  # seconds to wait for a free connection
+    READ_DATABASE_URL: Optional[str] = None  # read replica for analytics and listings
+    READ_YOUR_WRITES_SECONDS: float = 5.0  # reads stay on the primary this long after a user writes
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    
+    # Bulk Mood Import
+    MOOD_IMPORT_BATCH_SIZE: int = 1000  # rows per executemany insert and commit
+    MOOD_IMPORT_MAX_ERRORS: int = 100  # row errors listed in the response; the rest are only counted
+    MOOD_IMPORT_MAX_LINE_BYTES: int = 65536  # longer lines are rejected without buffering them
+    
+    # Data Export
+    EXPORT_FETCH_SIZE: int = 1000  # rows per server-side cursor fetch
+    EXPORT_CHUNK_BYTES: int = 65536  # response body chunk size before compression
+    
+    # Routine Search
+    SEARCH_RANK_CANDIDATES: int = 1000  # newest full-text matches ranked per search
     
     # JWT Configuration
     JWT_SECRET_KEY: str = "your-secret-key-change-in-production"
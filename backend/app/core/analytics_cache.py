@@ -0,0 +1,103 @@
+import itertools
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Tuple
+
+from app.config import settings
+from app.core.cache import TTLCache
+
+# Forget old data versions once this many users are tracked
+_PRUNE_THRESHOLD = 10000
+
+
+class AnalyticsCache:
+    """Analytics results per (user, endpoint, parameters), invalidated by the user's writes
+
+    Each result is stored with the user's data version as it was when the
+    computation started. Committed writes bump the version (see the session
+    hooks in app.models.database), so a result computed before a write is
+    never served after it. Windows like "last 30 days" depend on the date,
+    so the current UTC day is part of the key.
+
+    State is per process; the TTL bounds how long a write handled by
+    another worker can go unseen here.
+    """
+
+    def __init__(self, max_size: int, ttl: float, enabled: bool = True):
+        self.enabled = enabled
+        self.ttl = ttl
+        self._results = TTLCache(max_size=max_size, ttl=ttl)
+        # user_id -> (version, bumped at); versions come from one counter so they never repeat
+        self._versions: Dict[int, Tuple[int, float]] = {}
+        self._clock = itertools.count(1)
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.invalidations = 0
+
+    def version(self, user_id: int) -> int:
+        """The user's current data version (0 until their first tracked write)"""
+        entry = self._versions.get(user_id)
+        return entry[0] if entry is not None else 0
+
+    def invalidate_users(self, user_ids: Iterable[int]) -> None:
+        """Bump the data version of users whose writes just committed"""
+        now = time.monotonic()
+        for user_id in user_ids:
+            self._versions[user_id] = (next(self._clock), now)
+            self.invalidations += 1
+        if len(self._versions) > _PRUNE_THRESHOLD:
+            # Results from before a bump expire within a TTL of being stored,
+            # and are stored at most one computation after the bump
+            cutoff = now - 2 * self.ttl
+            self._versions = {uid: entry for uid, entry in self._versions.items() if entry[1] > cutoff}
+
+    async def get_or_compute(
+        self, user_id: int, endpoint: str, params: Hashable, compute: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """The cached result for this user, endpoint and parameters, computing it on a miss"""
+        if not self.enabled:
+            return await compute()
+
+        key = (user_id, endpoint, params, datetime.utcnow().date())
+        version = self.version(user_id)
+        entry = self._results.get(key)
+        if entry is not None and entry[0] == version:
+            self.hits += 1
+            return entry[1]
+
+        if entry is not None:
+            self.stale += 1
+        self.misses += 1
+        value = await compute()
+        self._results.set(key, (version, value))
+        return value
+
+    def clear(self) -> None:
+        self._results.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache size, hit rate and invalidation counters"""
+        lookups = self.hits + self.misses
+        results = self._results.stats()
+        return {
+            "enabled": self.enabled,
+            "size": results["size"],
+            "max_size": results["max_size"],
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "stale": self.stale,
+            "invalidations": self.invalidations,
+            "evictions": results["evictions"],
+            "expirations": results["expirations"],
+            "tracked_users": len(self._versions),
+        }
+
+
+# Global analytics cache
+analytics_cache = AnalyticsCache(
+    max_size=settings.ANALYTICS_CACHE_MAX_SIZE,
+    ttl=settings.ANALYTICS_CACHE_TTL,
+    enabled=settings.ANALYTICS_CACHE_ENABLED,
+)
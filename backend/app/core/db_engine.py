@@ -0,0 +1,150 @@
+import logging
+import time
+from collections import defaultdict
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import URL, Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Pool settings per deployment style; DATABASE_POOL_* settings override them
+ENGINE_PROFILES: Dict[str, Dict[str, Any]] = {
+    # Local development and SQLite: small pool, no liveness checks
+    "development": {"pool_size": 5, "max_overflow": 10, "pool_pre_ping": False, "pool_recycle": -1},
+    # Long-lived Postgres connections: survive server restarts and idle disconnects
+    "production": {"pool_size": 10, "max_overflow": 20, "pool_pre_ping": True, "pool_recycle": 1800},
+    # Behind an external pooler (PgBouncer, Supabase pooler) in transaction mode
+    "pooled": {"pool_size": 5, "max_overflow": 5, "pool_pre_ping": True, "pool_recycle": 300},
+}
+
+
+def resolve_profile(url: URL) -> str:
+    """Engine profile name for a database URL"""
+    name = settings.DATABASE_ENGINE_PROFILE.lower()
+    if name == "auto":
+        return "production" if url.get_backend_name() == "postgresql" else "development"
+    if name not in ENGINE_PROFILES:
+        raise ValueError(f"Unknown database engine profile: {settings.DATABASE_ENGINE_PROFILE}")
+    return name
+
+
+def _is_memory_sqlite(url: URL) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def engine_options(url: URL, is_async: bool = False, name: Optional[str] = None) -> Dict[str, Any]:
+    """create_engine keyword arguments for the configured profile
+
+    ``name`` labels the pool in logs and keeps its checkout metrics separate.
+    """
+    options: Dict[str, Any] = {"echo": settings.DATABASE_ECHO}
+    if _is_memory_sqlite(url):
+        # In-memory SQLite lives in a single connection; keep SQLAlchemy's static pool
+        return options
+
+    profile = dict(ENGINE_PROFILES[resolve_profile(url)])
+    overrides = {
+        "pool_size": settings.DATABASE_POOL_SIZE,
+        "max_overflow": settings.DATABASE_MAX_OVERFLOW,
+        "pool_recycle": settings.DATABASE_POOL_RECYCLE,
+    }
+    profile.update({key: value for key, value in overrides.items() if value is not None})
+    options.update(profile)
+    options["pool_timeout"] = settings.DATABASE_POOL_TIMEOUT
+
+    if is_async:
+        # aiosqlite would otherwise get a NullPool and a new connection thread per checkout
+        options["poolclass"] = InstrumentedAsyncPool
+        if name:
+            options["pool_logging_name"] = name
+        if url.get_backend_name() == "postgresql" and resolve_profile(url) == "pooled":
+            # Transaction-mode poolers can't keep asyncpg's per-connection prepared statements
+            options["connect_args"] = {"statement_cache_size": 0}
+    return options
+
+
+def apply_sqlite_pragmas(engine: Engine) -> None:
+    """Set WAL, busy_timeout and synchronous on every new SQLite connection"""
+    if engine.url.get_backend_name() != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            if not _is_memory_sqlite(engine.url):
+                cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+            cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+            cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+        finally:
+            cursor.close()
+
+
+class PoolMetrics:
+    """Checkout latency and timeout counters for the API connection pool"""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_checkout(self, waited: float) -> None:
+        self.checkouts += 1
+        self.wait_total += waited
+        self.wait_max = max(self.wait_max, waited)
+
+    def record_timeout(self) -> None:
+        self.timeouts += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "checkouts": self.checkouts,
+            "checkout_timeouts": self.timeouts,
+            "avg_checkout_wait_ms": round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+            "max_checkout_wait_ms": round(self.wait_max * 1000, 3),
+        }
+
+
+# Metrics per pool, keyed by the pool's logging name
+pool_metrics: Dict[Optional[str], PoolMetrics] = defaultdict(PoolMetrics)
+
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """Async queue pool that times how long each checkout waits for a connection"""
+
+    # Log under SQLAlchemy's logger (quiet by default), not this app module
+    _sqla_logger_namespace = "sqlalchemy.pool.impl.AsyncAdaptedQueuePool"
+
+    def connect(self):
+        metrics = pool_metrics[self.logging_name]
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            metrics.record_timeout()
+            raise
+        metrics.record_checkout(time.perf_counter() - started)
+        return connection
+
+
+def pool_stats(pool: Pool, profile: str) -> Dict[str, Any]:
+    """Current pool occupancy, saturation and checkout wait metrics"""
+    stats: Dict[str, Any] = {"profile": profile, "pool": type(pool).__name__}
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        capacity = pool.size() + max(pool._max_overflow, 0)
+        checked_out = pool.checkedout()
+        stats.update({
+            "size": pool.size(),
+            "capacity": capacity,
+            "checked_out": checked_out,
+            "idle": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "saturation": round(checked_out / capacity, 3) if capacity else 0.0,
+        })
+        stats.update(pool_metrics[pool.logging_name].as_dict())
+    return stats
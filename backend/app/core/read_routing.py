@@ -0,0 +1,56 @@
+import time
+from typing import Any, Dict, Iterable
+
+from app.config import settings
+
+# Forget expired writers once this many are tracked
+_PRUNE_THRESHOLD = 10000
+
+
+class ReadYourWritesTracker:
+    """Pins users who just wrote to the primary until replicas have caught up
+
+    State is per process; with several workers a user may still hit a
+    replica from another worker inside the window.
+    """
+
+    def __init__(self, window: float):
+        self.window = window
+        self._last_write: Dict[int, float] = {}
+        self.replica_reads = 0
+        self.primary_reads = 0
+
+    def record_writes(self, user_ids: Iterable[int]) -> None:
+        """Note that these users' data changed on the primary just now"""
+        now = time.monotonic()
+        for user_id in user_ids:
+            self._last_write[user_id] = now
+        if len(self._last_write) > _PRUNE_THRESHOLD:
+            cutoff = now - self.window
+            self._last_write = {uid: at for uid, at in self._last_write.items() if at > cutoff}
+
+    def is_pinned(self, user_id: int) -> bool:
+        """True while the user's last write is inside the read-your-writes window"""
+        written_at = self._last_write.get(user_id)
+        return written_at is not None and time.monotonic() - written_at < self.window
+
+    def route(self, user_id: int) -> bool:
+        """Whether this user's read may go to the replica (and count it)"""
+        if self.is_pinned(user_id):
+            self.primary_reads += 1
+            return False
+        self.replica_reads += 1
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "window_seconds": self.window,
+            "replica_reads": self.replica_reads,
+            "primary_reads": self.primary_reads,
+            "pinned_users": sum(1 for at in self._last_write.values() if now - at < self.window),
+        }
+
+
+# Global read-your-writes tracker
+write_tracker = ReadYourWritesTracker(settings.READ_YOUR_WRITES_SECONDS)
@@ -0,0 +1,53 @@
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator
+
+
+class SectionStats:
+    """Call count and latency of one timed section"""
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, elapsed: float) -> None:
+        self.calls += 1
+        self.total += elapsed
+        self.max = max(self.max, elapsed)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "avg_ms": round(self.total / self.calls * 1000, 3) if self.calls else 0.0,
+            "max_ms": round(self.max * 1000, 3),
+            "total_ms": round(self.total * 1000, 3),
+        }
+
+
+class SectionTimings:
+    """Per-section latency for a multi-step code path, e.g. building a dashboard"""
+
+    def __init__(self):
+        self._sections: Dict[str, SectionStats] = defaultdict(SectionStats)
+
+    @contextmanager
+    def section(self, name: str) -> Iterator[None]:
+        """Time the enclosed block under ``name``"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._sections[name].record(time.perf_counter() - started)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Latency per section, by section name"""
+        return {name: stats.as_dict() for name, stats in sorted(self._sections.items())}
+
+    def reset(self) -> None:
+        self._sections.clear()
+
+
+# Global timings for the analytics endpoints
+analytics_timings = SectionTimings()
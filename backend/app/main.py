@@ -1,12 +1,17 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
 import logging
 
 from app.config import settings
+from app.core.analytics_cache import analytics_cache
 from app.core.logging import setup_logging
 from app.core.middleware import LoggingMiddleware, ErrorHandlingMiddleware
-from app.models.database import create_tables
+from app.core.timing import analytics_timings
+from app.models.database import create_tables, database_stats, async_engine, read_engine, AsyncSessionLocal
+from app.services.ai_service import ai_service
+from app.services.template_index import template_index, run_maintenance
 from app.api.v1.router import api_router
 
 # Setup logging
@@ -23,10 +28,27 @@ async def lifespan(app: FastAPI):
     create_tables()
     logger.info("Database tables created")
     
+    # Open the shared OpenAI client and connection pool
+    await ai_service.startup()
+    
+    # Load routine templates for the generation fast path
+    async with AsyncSessionLocal() as db:
+        await template_index.load(db)
+    template_task = asyncio.create_task(
+        run_maintenance(template_index, settings.TEMPLATE_INDEX_REFRESH_SECONDS)
+    )
+    
     yield
     
     # Shutdown
     logger.info("Shutting down AI Self-Care Companion API")
+    template_task.cancel()
+    async with AsyncSessionLocal() as db:
+        await template_index.flush_usage(db)
+    await ai_service.shutdown()
+    await async_engine.dispose()
+    if read_engine is not None:
+        await read_engine.dispose()
 
 
 # Create FastAPI app
@@ -58,11 +80,8 @@ app.include_router(api_router, prefix=settings.API_V1_PREFIX)
 
 # Legacy endpoint for backward compatibility
 from app.models.schemas import GenerateRequest, GenerateResponse
-from app.services.ai_service import AIService
 from fastapi import HTTPException
 
-ai_service = AIService()
-
 @app.post("/generate", response_model=GenerateResponse, tags=["legacy"])
 async def generate_plan_legacy(request: GenerateRequest):
     """Legacy endpoint for backward compatibility"""
@@ -89,6 +108,18 @@ async def health_check():
     return {"status": "healthy", "version": settings.VERSION}
 
 
+@app.get("/metrics", tags=["health"])
+async def metrics():
+    """Runtime counters for caches, the AI service, analytics latency and the database pool"""
+    return {
+        "ai_service": ai_service.stats(),
+        "template_index": template_index.stats(),
+        "analytics_cache": analytics_cache.stats(),
+        "analytics_timings": analytics_timings.stats(),
+        "database": database_stats()
+    }
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -1,21 +1,128 @@
-from sqlalchemy import create_engine, Column, Integer, String, Text, Boolean, DateTime, ForeignKey, JSON, Float
+from sqlalchemy import create_engine, event, inspect, Column, Integer, String, Text, Boolean, Date, DateTime, ForeignKey, JSON, Float, Index
+from sqlalchemy.engine import make_url, URL
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.orm import Session, sessionmaker, relationship
 from sqlalchemy.sql import func
 from datetime import datetime
-from typing import List, Optional
+from itertools import chain
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 from app.config import settings
+from app.core.analytics_cache import analytics_cache
+from app.core.db_engine import apply_sqlite_pragmas, engine_options, pool_stats, resolve_profile
+from app.core.read_routing import write_tracker
 
-# Database engine
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+
+# Async drivers for each supported backend
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+}
+
+
+def async_database_url(url: str) -> URL:
+    """Translate a sync DATABASE_URL to the matching async driver"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for database backend: {backend}")
+    parsed = parsed.set(drivername=ASYNC_DRIVERS[backend])
+
+    # asyncpg takes "ssl" where libpq URLs (e.g. Supabase) use "sslmode"
+    if parsed.get_backend_name() == "postgresql" and "sslmode" in parsed.query:
+        query = dict(parsed.query)
+        query["ssl"] = query.pop("sslmode")
+        parsed = parsed.set(query=query)
+    return parsed
+
+
+# Database engine (sync; used by migrations and scripts)
 engine = create_engine(
     settings.DATABASE_URL,
-    echo=settings.DATABASE_ECHO
+    **engine_options(make_url(settings.DATABASE_URL))
 )
+apply_sqlite_pragmas(engine)
 
 # Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+class PrimarySession(Session):
+    """Session on the primary; committed writes pin their users to the primary for reads"""
+
+
+class ReadOnlySession(Session):
+    """Session on the read replica"""
+
+
+def mark_user_written(session: Session, user_id: int) -> None:
+    """Pin a user to the primary and invalidate their cached analytics once the session commits
+
+    Flushes are tracked automatically; call this for Core statements
+    executed through the session, which don't flush.
+    """
+    session.info.setdefault("written_user_ids", set()).add(user_id)
+
+
+@event.listens_for(PrimarySession, "after_flush")
+def _collect_written_users(session, flush_context):
+    for obj in chain(session.new, session.dirty, session.deleted):
+        user_id = getattr(obj, "user_id", None)
+        if user_id is not None:
+            mark_user_written(session, user_id)
+
+
+@event.listens_for(PrimarySession, "after_commit")
+def _record_written_users(session):
+    written = session.info.pop("written_user_ids", None)
+    if written:
+        write_tracker.record_writes(written)
+        # After the commit, so a concurrent reader can't cache the old data under the new version
+        analytics_cache.invalidate_users(written)
+
+
+@event.listens_for(PrimarySession, "after_rollback")
+def _discard_written_users(session):
+    session.info.pop("written_user_ids", None)
+
+
+@event.listens_for(ReadOnlySession, "before_flush")
+def _reject_replica_writes(session, flush_context, instances):
+    raise RuntimeError("Attempted to write through a read replica session")
+
+
+def _create_async_engine(url: str, name: str):
+    async_url = async_database_url(url)
+    new_engine = create_async_engine(async_url, **engine_options(async_url, is_async=True, name=name))
+    apply_sqlite_pragmas(new_engine.sync_engine)
+    return new_engine
+
+
+# Async engine and session factory used by the API
+async_engine = _create_async_engine(settings.DATABASE_URL, "primary")
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, autoflush=False, expire_on_commit=False, sync_session_class=PrimarySession
+)
+
+# Optional read replica for analytics and listings
+read_engine = _create_async_engine(settings.READ_DATABASE_URL, "replica") if settings.READ_DATABASE_URL else None
+ReadSessionLocal = async_sessionmaker(
+    read_engine, autoflush=False, expire_on_commit=False, sync_session_class=ReadOnlySession
+) if read_engine is not None else None
+
+
+def database_stats() -> Dict[str, Any]:
+    """Connection pool and read routing metrics for the API engines"""
+    return {
+        "primary": pool_stats(async_engine.pool, resolve_profile(async_engine.url)),
+        "replica": pool_stats(read_engine.pool, resolve_profile(read_engine.url)) if read_engine is not None else None,
+        "read_routing": write_tracker.stats(),
+    }
+
+
 # Base class for models
 Base = declarative_base()
 
@@ -60,6 +167,10 @@ class UserPreference(Base):
 class Routine(Base):
     """Routine model"""
     __tablename__ = "routines"
+    __table_args__ = (
+        Index("ix_routines_user_id_created_at", "user_id", "created_at"),
+        Index("ix_routines_user_id_completion_count", "user_id", "completion_count"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -83,6 +194,9 @@ class Routine(Base):
 class RoutineCompletion(Base):
     """Routine completion tracking model"""
     __tablename__ = "routine_completions"
+    __table_args__ = (
+        Index("ix_routine_completions_user_id_completed_at", "user_id", "completed_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -121,6 +235,9 @@ class RoutineTemplate(Base):
 class MoodEntry(Base):
     """Mood tracking entries"""
     __tablename__ = "mood_entries"
+    __table_args__ = (
+        Index("ix_mood_entries_user_id_created_at", "user_id", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -134,9 +251,58 @@ class MoodEntry(Base):
     user = relationship("User")
 
 
-# Database dependency
+class UserDailyStats(Base):
+    """Per-user, per-day (UTC) activity totals maintained on write for analytics"""
+    __tablename__ = "user_daily_stats"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    routines_created = Column(Integer, nullable=False, default=0)
+    completions = Column(Integer, nullable=False, default=0)
+    effectiveness_sum = Column(Integer, nullable=False, default=0)
+    effectiveness_count = Column(Integer, nullable=False, default=0)
+    mood_entries = Column(Integer, nullable=False, default=0)
+    intensity_sum = Column(Integer, nullable=False, default=0)
+    intensity_count = Column(Integer, nullable=False, default=0)
+
+
+class UserDailyCount(Base):
+    """Per-user, per-day counts of a categorical value (routine mood/category, logged mood)"""
+    __tablename__ = "user_daily_counts"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    facet = Column(String, primary_key=True)  # routine_mood, routine_category or mood
+    day = Column(Date, primary_key=True)
+    value = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class UserStats(Base):
+    """Per-user running totals maintained on write"""
+    __tablename__ = "user_stats"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    current_streak = Column(Integer, nullable=False, default=0)  # completion days in a row ending on last_completion_day
+    longest_streak = Column(Integer, nullable=False, default=0)
+    last_completion_day = Column(Date, nullable=True)
+
+
+# Database dependencies
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """Get async database session"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def read_session(user_id: int) -> AsyncSession:
+    """Session for a user's reads: the replica, or the primary right after they wrote"""
+    if ReadSessionLocal is None or not write_tracker.route(user_id):
+        return AsyncSessionLocal()
+    return ReadSessionLocal()
+
+
 def get_db():
-    """Get database session"""
+    """Get sync database session (for scripts and sync callers)"""
     db = SessionLocal()
     try:
         yield db
@@ -146,5 +312,15 @@ def get_db():
 
 # Create tables
 def create_tables():
-    """Create all database tables"""
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    """Create or upgrade database tables by running the Alembic migrations"""
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(str(ALEMBIC_INI))
+    config.attributes["configure_logger"] = False
+
+    table_names = inspect(engine).get_table_names()
+    if "users" in table_names and "alembic_version" not in table_names:
+        # Schema created by create_all before migrations were introduced
+        command.stamp(config, "0001")
+    command.upgrade(config, "head")
\ No newline at end of file
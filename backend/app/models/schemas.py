@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, validator
-from typing import Optional, List
+from typing import Dict, Optional, List
 from datetime import datetime
 from enum import Enum
 
@@ -44,6 +44,7 @@ class GenerateRequest(BaseModel):
     goal: str = Field(..., description="What the user wants to achieve")
     context: Optional[str] = Field(None, description="Additional context or preferences")
     duration: Optional[int] = Field(None, ge=5, le=120, description="Preferred duration in minutes")
+    prefer_template: bool = Field(False, description="Use a matching pre-built template when one fits")
     
     @validator('mood')
     def validate_mood(cls, v):
@@ -58,6 +59,11 @@ class GenerateRequest(BaseModel):
         return v.strip()
 
 
+class BatchGenerateRequest(BaseModel):
+    """Request model for generating several routines at once"""
+    requests: List[GenerateRequest] = Field(..., min_length=1, max_length=50, description="Routines to generate")
+
+
 class GenerateResponse(BaseModel):
     """Response model for generated routines"""
     steps: List[str] = Field(..., description="List of self-care steps")
@@ -134,6 +140,27 @@ class RoutineResponse(BaseModel):
         from_attributes = True
 
 
+class RoutinePage(BaseModel):
+    """Cursor-paginated routines"""
+    items: List[RoutineResponse]
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+
+class BatchGenerateItem(BaseModel):
+    """Result for a single request in a batch generation"""
+    index: int = Field(..., description="Position of the request in the batch")
+    routine: Optional[RoutineResponse] = None
+    error: Optional[str] = None
+
+
+class BatchGenerateResponse(BaseModel):
+    """Response model for batch routine generation"""
+    results: List[BatchGenerateItem]
+    succeeded: int
+    failed: int
+
+
 class RoutineCompletion(BaseModel):
     """Routine completion model"""
     routine_id: int
@@ -156,6 +183,11 @@ class AnalyticsResponse(BaseModel):
     category_distribution: dict
 
 
+class MultiWindowAnalyticsResponse(BaseModel):
+    """Analytics for several trailing windows, keyed by window length in days"""
+    windows: Dict[int, AnalyticsResponse]
+
+
 class Token(BaseModel):
     """JWT token model"""
     access_token: str
@@ -207,6 +239,29 @@ class MoodResponse(BaseModel):
         from_attributes = True
 
 
+class MoodPage(BaseModel):
+    """Cursor-paginated mood entries"""
+    items: List[MoodResponse]
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+
+class MoodImportError(BaseModel):
+    """A rejected row in a bulk mood import"""
+    line: int
+    error: str
+
+
+class MoodImportResponse(BaseModel):
+    """Bulk mood import result"""
+    imported: int
+    failed: int
+    errors: List[MoodImportError]
+    errors_truncated: bool = False
+    elapsed_seconds: float
+    rows_per_second: float
+
+
 class MoodAnalyticsResponse(BaseModel):
     """Mood analytics response model"""
     total_entries: int
@@ -214,4 +269,24 @@ class MoodAnalyticsResponse(BaseModel):
     most_common_mood: Optional[str]
     mood_distribution: dict
     daily_averages: dict
-    trends: dict
\ No newline at end of file
+    trends: dict
+
+
+class MoodMultiWindowAnalyticsResponse(BaseModel):
+    """Mood analytics for several trailing windows, keyed by window length in days"""
+    windows: Dict[int, MoodAnalyticsResponse]
+
+
+class MoodAdvancedAnalyticsResponse(BaseModel):
+    """Advanced mood time-series analytics response model"""
+    start_date: str
+    end_date: str
+    total_entries: int
+    rated_entries: int
+    average_intensity: Optional[float]
+    rolling_averages: dict  # "7d"/"30d" -> date -> trailing average intensity
+    volatility: dict
+    percentiles: dict
+    weekday_profile: dict
+    trend: dict
+    mood_profile: dict
\ No newline at end of file
@@ -1,16 +1,31 @@
-import openai
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator, Tuple
+import asyncio
+import hashlib
 import json
 import logging
+import random
 from datetime import datetime
 
 from app.config import settings
+from app.core.cache import TTLCache
+from app.services.classifier import classify, FALLBACK_ROUTINES
+from app.services.llm_providers import create_provider, LLMProviderError, LLMRateLimitError, LLMTimeoutError
+from app.services.llm_scheduler import create_scheduler
+from app.services.response_parser import MAX_STEPS, parse_routine_response, StepStreamParser
 from app.models.schemas import GenerateRequest, GenerateResponse, RoutineCategory, PriorityLevel
 
 logger = logging.getLogger(__name__)
 
-# Set OpenAI API key
-openai.api_key = settings.OPENAI_API_KEY
+SYSTEM_PROMPT = "You are a helpful and knowledgeable self-care coach. Always respond with valid JSON."
+
+class _InFlight:
+    """A shared generation call and the number of callers awaiting it"""
+    
+    __slots__ = ("task", "waiters")
+    
+    def __init__(self, task: "asyncio.Task"):
+        self.task = task
+        self.waiters = 0
 
 
 class AIService:
@@ -20,28 +35,248 @@ class AIService:
         self.model = settings.OPENAI_MODEL
         self.max_tokens = settings.OPENAI_MAX_TOKENS
         self.temperature = settings.OPENAI_TEMPERATURE
+        self.provider = create_provider()
+        self.cache: Optional[TTLCache] = None
+        if settings.AI_CACHE_ENABLED:
+            self.cache = TTLCache(
+                max_size=settings.AI_CACHE_MAX_SIZE,
+                ttl=settings.AI_CACHE_TTL,
+                ttl_jitter=settings.AI_CACHE_TTL_JITTER,
+            )
+        
+        # Priority-aware admission in front of every model call
+        self.scheduler = create_scheduler()
+        
+        # Single-flight: identical concurrent requests share one completion
+        self._inflight: Dict[str, _InFlight] = {}
+        self.coalesce_leaders = 0
+        self.coalesced_calls = 0
+        self.coalesce_cancellations = 0
+    
+    async def startup(self) -> None:
+        """Open provider resources such as connection pools (called from the app lifespan)"""
+        await self.provider.startup()
+    
+    async def shutdown(self) -> None:
+        """Close provider resources"""
+        await self.provider.shutdown()
     
     async def generate_routine(self, request: GenerateRequest, user_history: Optional[List[Dict]] = None) -> GenerateResponse:
         """Generate a personalized self-care routine"""
         
+        fingerprint = self.fingerprint(request, user_history)
+        
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self._cache_key(fingerprint)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached.model_copy(deep=True)
+        
+        try:
+            result = await self._run_coalesced(
+                fingerprint,
+                lambda: self._generate_and_cache(request, user_history, cache_key)
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error generating routine: {str(e)}")
+            return self._fallback_routine(request)
+        
+        # Every coalesced caller gets its own copy of the shared result
+        return result.model_copy(deep=True)
+    
+    async def _generate_and_cache(
+        self,
+        request: GenerateRequest,
+        user_history: Optional[List[Dict]],
+        cache_key: Optional[str]
+    ) -> GenerateResponse:
+        """Call the model, build the response and store it in the cache"""
         # Build context-aware prompt
         prompt = self._build_prompt(request, user_history)
+        priority = self._determine_priority(request.mood)
+        
+        async with self.scheduler.slot(priority):
+            response = await self._call_llm(prompt)
+        parsed_response = self._parse_response(response)
+        
+        result = GenerateResponse(
+            steps=parsed_response.get("steps", []),
+            estimated_duration=parsed_response.get("duration") or request.duration,
+            category=self._determine_category(request.mood, request.goal),
+            priority=priority,
+            tips=parsed_response.get("tips", [])
+        )
+        
+        # Only real completions are cached; fallbacks are retried next time
+        if cache_key is not None and result.steps:
+            self.cache.set(cache_key, result.model_copy(deep=True))
+        
+        return result
+    
+    async def _run_coalesced(self, key: str, factory) -> GenerateResponse:
+        """Await a shared call for ``key``, starting it if none is in flight"""
+        flight = self._inflight.get(key)
+        if flight is None:
+            flight = _InFlight(asyncio.ensure_future(factory()))
+            self._inflight[key] = flight
+            flight.task.add_done_callback(lambda _, key=key, flight=flight: self._release_flight(key, flight))
+            self.coalesce_leaders += 1
+        else:
+            self.coalesced_calls += 1
+        
+        flight.waiters += 1
+        try:
+            # Shield so one caller's cancellation does not cancel the shared call
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                # Last interested caller is gone; stop the completion and
+                # forget it now so a caller arriving before the task settles
+                # starts a fresh call instead of joining a cancelled one
+                flight.task.cancel()
+                if self._inflight.get(key) is flight:
+                    del self._inflight[key]
+                self.coalesce_cancellations += 1
+            raise
+        finally:
+            flight.waiters -= 1
+    
+    def _release_flight(self, key: str, flight: _InFlight) -> None:
+        """Forget a finished flight so later requests start a fresh call"""
+        if self._inflight.get(key) is flight:
+            del self._inflight[key]
+        if not flight.task.cancelled():
+            # Mark the exception retrieved even if every waiter was cancelled
+            flight.task.exception()
+    
+    async def stream_routine(
+        self,
+        request: GenerateRequest,
+        user_history: Optional[List[Dict]] = None
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """Stream a routine as ("step" | "fallback" | "complete", payload) events
+        
+        Steps are emitted as soon as each array entry is complete, up to
+        MAX_STEPS. If the call fails mid-stream a "fallback" event is emitted
+        and the fallback routine's steps replace any already sent.
+        """
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self._cache_key(self.fingerprint(request, user_history))
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                for index, step in enumerate(cached.steps):
+                    yield "step", {"index": index, "step": step}
+                yield "complete", cached.model_copy(deep=True)
+                return
+        
+        prompt = self._build_prompt(request, user_history)
+        priority = self._determine_priority(request.mood)
+        parser = StepStreamParser()
+        streamed: List[str] = []
+        # The provider is read in its own task so a slow client never holds a scheduler slot
+        deltas: "asyncio.Queue[Optional[str]]" = asyncio.Queue()
+        reader = asyncio.ensure_future(self._read_stream(prompt, priority, deltas))
         
         try:
-            response = await self._call_openai(prompt)
-            parsed_response = self._parse_response(response)
+            while True:
+                delta = await deltas.get()
+                if delta is None:
+                    break
+                for step in parser.feed(delta):
+                    if len(streamed) < MAX_STEPS:
+                        yield "step", {"index": len(streamed), "step": step}
+                        streamed.append(step)
+            # Re-raises a provider error that ended the stream
+            await reader
+            
+            parsed_response = self._parse_response(parser.buffer.strip())
+            steps = parsed_response.get("steps") or []
+            if not steps:
+                raise Exception("AI response contained no steps")
+            
+            # Emit anything the incremental parser could not (e.g. text-formatted output)
+            for step in steps[len(streamed):MAX_STEPS]:
+                yield "step", {"index": len(streamed), "step": step}
+                streamed.append(step)
             
-            return GenerateResponse(
-                steps=parsed_response.get("steps", []),
-                estimated_duration=parsed_response.get("duration", request.duration),
+            result = GenerateResponse(
+                steps=streamed,
+                estimated_duration=parsed_response.get("duration") or request.duration,
                 category=self._determine_category(request.mood, request.goal),
-                priority=self._determine_priority(request.mood),
+                priority=priority,
                 tips=parsed_response.get("tips", [])
             )
+            if cache_key is not None:
+                self.cache.set(cache_key, result.model_copy(deep=True))
             
         except Exception as e:
-            logger.error(f"Error generating routine: {str(e)}")
-            return self._fallback_routine(request)
+            logger.error(f"Error streaming routine: {str(e)}")
+            result = self._fallback_routine(request)
+            yield "fallback", {"reason": "AI service unavailable", "discarded_steps": len(streamed)}
+            for index, step in enumerate(result.steps):
+                yield "step", {"index": index, "step": step}
+        
+        finally:
+            # The client went away mid-stream: stop reading and free the slot
+            reader.cancel()
+        
+        yield "complete", result
+    
+    async def _read_stream(self, prompt: str, priority: PriorityLevel, deltas: "asyncio.Queue[Optional[str]]") -> None:
+        """Buffer provider deltas into ``deltas`` while holding a scheduler slot; None marks the end"""
+        try:
+            async with self.scheduler.slot(priority):
+                async for delta in self._stream_llm(prompt):
+                    deltas.put_nowait(delta)
+        finally:
+            deltas.put_nowait(None)
+    
+    def fingerprint(self, request: GenerateRequest, user_history: Optional[List[Dict]] = None) -> str:
+        """Canonical fingerprint of a generation request and its history context"""
+        payload = {
+            "mood": request.mood.lower(),
+            "goal": " ".join(request.goal.lower().split()),
+            "context": " ".join(request.context.lower().split()) if request.context else None,
+            "duration": request.duration,
+            "history": self._history_digest(user_history),
+        }
+        encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+    
+    def _history_digest(self, user_history: Optional[List[Dict]]) -> Optional[str]:
+        """Coarse digest of the history the prompt actually uses"""
+        if not user_history:
+            return None
+        
+        # Mirror _format_history: only mood/goal of the last 3 routines reach the prompt
+        pairs = sorted({
+            (str(item.get("mood", "")).lower(), str(item.get("goal", "")).lower())
+            for item in user_history[-3:]
+        })
+        return hashlib.sha1(json.dumps(pairs).encode("utf-8")).hexdigest()[:16]
+    
+    def _cache_key(self, fingerprint: str) -> str:
+        """Cache key: request fingerprint plus a randomly rotated variant slot"""
+        variant = random.randrange(max(settings.AI_CACHE_VARIANTS, 1))
+        return f"{fingerprint}:{variant}"
+    
+    def stats(self) -> Dict[str, Any]:
+        """Runtime counters for the AI service"""
+        return {
+            "provider": self.provider.name,
+            "cache": self.cache.stats() if self.cache is not None else None,
+            "scheduler": self.scheduler.stats(),
+            "coalescing": {
+                "in_flight": len(self._inflight),
+                "leaders": self.coalesce_leaders,
+                "coalesced": self.coalesced_calls,
+                "cancelled": self.coalesce_cancellations,
+            },
+        }
     
     def _build_prompt(self, request: GenerateRequest, user_history: Optional[List[Dict]] = None) -> str:
         """Build a context-aware prompt for AI generation"""
@@ -81,108 +316,71 @@ class AIService:
         
         return base_prompt
     
-    async def _call_openai(self, prompt: str) -> str:
-        """Call OpenAI API with error handling"""
+    async def _call_llm(self, prompt: str) -> str:
+        """Call the configured LLM provider with error handling"""
         try:
-            response = openai.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a helpful and knowledgeable self-care coach. Always respond with valid JSON."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=self.max_tokens,
-                temperature=self.temperature,
+            response = await self.provider.complete(
+                self._messages(prompt), self.max_tokens, self.temperature, json_mode=settings.LLM_JSON_MODE
             )
             
-            return response.choices[0].message.content.strip()
-            
-        except openai.RateLimitError:
-            logger.warning("OpenAI rate limit exceeded")
+            return response.strip()
+        
+        except LLMTimeoutError as e:
+            logger.warning(str(e))
+            raise Exception("AI service timed out. Please try again.")
+        
+        except LLMRateLimitError:
+            logger.warning("LLM rate limit exceeded")
+            self.scheduler.throttle(settings.LLM_RATE_LIMIT_BACKOFF)
             raise Exception("Service temporarily unavailable. Please try again later.")
         
-        except openai.APIError as e:
-            logger.error(f"OpenAI API error: {str(e)}")
+        except LLMProviderError as e:
+            logger.error(f"LLM provider error: {str(e)}")
             raise Exception("AI service error. Please try again.")
         
         except Exception as e:
-            logger.error(f"Unexpected error calling OpenAI: {str(e)}")
+            logger.error(f"Unexpected error calling LLM provider: {str(e)}")
             raise Exception("Service error. Please try again.")
     
-    def _parse_response(self, response: str) -> Dict[str, Any]:
-        """Parse AI response into structured format"""
+    async def _stream_llm(self, prompt: str) -> AsyncIterator[str]:
+        """Stream completion text deltas from the configured LLM provider"""
         try:
-            # Try to parse as JSON first
-            if response.startswith('{') and response.endswith('}'):
-                return json.loads(response)
-            
-            # Extract JSON from response if it's wrapped in other text
-            import re
-            json_match = re.search(r'\{.*\}', response, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group())
-            
-            # Fallback: parse as text
-            return self._parse_text_response(response)
-            
-        except json.JSONDecodeError:
-            logger.warning("Failed to parse AI response as JSON, falling back to text parsing")
-            return self._parse_text_response(response)
-    
-    def _parse_text_response(self, text: str) -> Dict[str, Any]:
-        """Parse text response into structured format"""
-        lines = [line.strip() for line in text.split('\n') if line.strip()]
-        steps = []
-        tips = []
-        
-        for line in lines:
-            # Look for numbered steps
-            if any(line.startswith(f"{i}.") for i in range(1, 10)):
-                step = line.split('.', 1)[1].strip()
-                steps.append(step)
-            # Look for tips
-            elif line.lower().startswith('tip'):
-                tip = line.split(':', 1)[1].strip() if ':' in line else line
-                tips.append(tip)
+            async for delta in self.provider.stream(
+                self._messages(prompt), self.max_tokens, self.temperature, json_mode=settings.LLM_JSON_MODE
+            ):
+                yield delta
         
-        return {
-            "steps": steps[:5],  # Limit to 5 steps
-            "tips": tips[:3],    # Limit to 3 tips
-            "duration": None
-        }
+        except LLMTimeoutError as e:
+            logger.warning(str(e))
+            raise Exception("AI service timed out. Please try again.")
+        
+        except LLMRateLimitError:
+            logger.warning("LLM rate limit exceeded")
+            self.scheduler.throttle(settings.LLM_RATE_LIMIT_BACKOFF)
+            raise Exception("Service temporarily unavailable. Please try again later.")
+        
+        except LLMProviderError as e:
+            logger.error(f"LLM provider error: {str(e)}")
+            raise Exception("AI service error. Please try again.")
+    
+    def _messages(self, prompt: str) -> List[Dict[str, str]]:
+        """Chat messages shared by the blocking and streaming calls"""
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ]
+    
+    def _parse_response(self, response: str) -> Dict[str, Any]:
+        """Parse AI response into structured format"""
+        return parse_routine_response(response)
     
     def _determine_category(self, mood: str, goal: str) -> RoutineCategory:
         """Determine routine category based on mood and goal"""
-        mood_lower = mood.lower()
-        goal_lower = goal.lower()
-        
-        # Category mapping based on keywords
-        if any(word in mood_lower for word in ['anxious', 'stressed', 'overwhelmed']):
-            return RoutineCategory.MINDFULNESS
-        elif any(word in mood_lower for word in ['tired', 'low energy', 'sluggish']):
-            return RoutineCategory.PHYSICAL
-        elif any(word in goal_lower for word in ['creative', 'art', 'write', 'music']):
-            return RoutineCategory.CREATIVE
-        elif any(word in goal_lower for word in ['social', 'connect', 'friends', 'family']):
-            return RoutineCategory.SOCIAL
-        elif any(word in goal_lower for word in ['relax', 'calm', 'peaceful']):
-            return RoutineCategory.RELAXATION
-        elif any(word in goal_lower for word in ['productive', 'focus', 'work']):
-            return RoutineCategory.PRODUCTIVITY
-        else:
-            return RoutineCategory.EMOTIONAL
+        return classify(mood, goal).category
     
     def _determine_priority(self, mood: str) -> PriorityLevel:
         """Determine priority level based on mood intensity"""
-        mood_lower = mood.lower()
-        
-        if any(word in mood_lower for word in ['crisis', 'emergency', 'urgent', 'severe']):
-            return PriorityLevel.URGENT
-        elif any(word in mood_lower for word in ['very', 'extremely', 'really', 'intense']):
-            return PriorityLevel.HIGH
-        elif any(word in mood_lower for word in ['somewhat', 'a bit', 'slightly']):
-            return PriorityLevel.LOW
-        else:
-            return PriorityLevel.MEDIUM
+        return classify(mood, "").priority
     
     def _format_history(self, history: List[Dict]) -> str:
         """Format user history for prompt context"""
@@ -199,39 +397,7 @@ class AIService:
         """Provide fallback routine when AI fails"""
         logger.info("Using fallback routine")
         
-        # Basic fallback routines based on mood
-        fallback_routines = {
-            "stressed": {
-                "steps": [
-                    "Take 5 deep breaths, inhaling for 4 counts and exhaling for 6 counts",
-                    "Step outside or near a window for fresh air and natural light",
-                    "Write down 3 things you're grateful for today"
-                ],
-                "category": RoutineCategory.MINDFULNESS,
-                "priority": PriorityLevel.HIGH
-            },
-            "tired": {
-                "steps": [
-                    "Drink a glass of water to rehydrate",
-                    "Do 5 gentle stretches or light movement",
-                    "Take a 5-minute walk or do some light exercise"
-                ],
-                "category": RoutineCategory.PHYSICAL,
-                "priority": PriorityLevel.MEDIUM
-            },
-            "anxious": {
-                "steps": [
-                    "Practice the 5-4-3-2-1 grounding technique",
-                    "Listen to calming music or nature sounds for 5 minutes",
-                    "Call or text someone you care about"
-                ],
-                "category": RoutineCategory.MINDFULNESS,
-                "priority": PriorityLevel.HIGH
-            }
-        }
-        
-        mood_key = next((key for key in fallback_routines.keys() if key in request.mood.lower()), "stressed")
-        fallback = fallback_routines[mood_key]
+        fallback = FALLBACK_ROUTINES[classify(request.mood, request.goal).fallback]
         
         return GenerateResponse(
             steps=fallback["steps"],
@@ -239,4 +405,8 @@ class AIService:
             category=fallback["category"],
             priority=fallback["priority"],
             tips=["Take your time with each step", "Focus on the present moment", "Be kind to yourself"]
-        )
\ No newline at end of file
+        )
+
+
+# Global AI service instance
+ai_service = AIService()
@@ -4,7 +4,9 @@ from fastapi import HTTPException, status
 
 from passlib.context import CryptContext
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 
 from app.config import settings
 from app.models.database import User
@@ -67,22 +69,23 @@ class AuthService:
                 headers={"WWW-Authenticate": "Bearer"},
             )
     
-    def authenticate_user(self, db: Session, email: str, password: str) -> Optional[User]:
+    async def authenticate_user(self, db: AsyncSession, email: str, password: str) -> Optional[User]:
         """Authenticate user credentials"""
-        user = db.query(User).filter(User.email == email).first()
+        user = await self.get_user_by_email(db, email)
         
         if not user:
             return None
         
-        if not self.verify_password(password, user.hashed_password):
+        # bcrypt is deliberately slow; keep it off the event loop
+        if not await run_in_threadpool(self.verify_password, password, user.hashed_password):
             return None
         
         return user
     
-    def create_user(self, db: Session, user_create: UserCreate) -> User:
+    async def create_user(self, db: AsyncSession, user_create: UserCreate) -> User:
         """Create new user"""
         # Check if user already exists
-        existing_user = db.query(User).filter(User.email == user_create.email).first()
+        existing_user = await self.get_user_by_email(db, user_create.email)
         if existing_user:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -90,7 +93,7 @@ class AuthService:
             )
         
         # Create new user
-        hashed_password = self.get_password_hash(user_create.password)
+        hashed_password = await run_in_threadpool(self.get_password_hash, user_create.password)
         db_user = User(
             email=user_create.email,
             name=user_create.name,
@@ -99,22 +102,23 @@ class AuthService:
         )
         
         db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
+        await db.commit()
+        await db.refresh(db_user)
         
         return db_user
     
-    def get_user_by_email(self, db: Session, email: str) -> Optional[User]:
+    async def get_user_by_email(self, db: AsyncSession, email: str) -> Optional[User]:
         """Get user by email"""
-        return db.query(User).filter(User.email == email).first()
+        result = await db.execute(select(User).where(User.email == email))
+        return result.scalars().first()
     
-    def get_user_by_id(self, db: Session, user_id: int) -> Optional[User]:
+    async def get_user_by_id(self, db: AsyncSession, user_id: int) -> Optional[User]:
         """Get user by ID"""
-        return db.query(User).filter(User.id == user_id).first()
+        return await db.get(User, int(user_id))
     
-    def login_user(self, db: Session, email: str, password: str) -> Token:
+    async def login_user(self, db: AsyncSession, email: str, password: str) -> Token:
         """Login user and return token"""
-        user = self.authenticate_user(db, email, password)
+        user = await self.authenticate_user(db, email, password)
         
         if not user:
             raise HTTPException(
@@ -0,0 +1,147 @@
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from app.models.schemas import PriorityLevel, RoutineCategory
+
+# Ordered keyword rules: the first rule with a keyword in its field wins.
+# Keywords match as plain substrings, like the original `word in text` scans.
+CATEGORY_RULES: List[Tuple[str, Tuple[str, ...], RoutineCategory]] = [
+    ("mood", ("anxious", "stressed", "overwhelmed"), RoutineCategory.MINDFULNESS),
+    ("mood", ("tired", "low energy", "sluggish"), RoutineCategory.PHYSICAL),
+    ("goal", ("creative", "art", "write", "music"), RoutineCategory.CREATIVE),
+    ("goal", ("social", "connect", "friends", "family"), RoutineCategory.SOCIAL),
+    ("goal", ("relax", "calm", "peaceful"), RoutineCategory.RELAXATION),
+    ("goal", ("productive", "focus", "work"), RoutineCategory.PRODUCTIVITY),
+]
+DEFAULT_CATEGORY = RoutineCategory.EMOTIONAL
+
+PRIORITY_RULES: List[Tuple[Tuple[str, ...], PriorityLevel]] = [
+    (("crisis", "emergency", "urgent", "severe"), PriorityLevel.URGENT),
+    (("very", "extremely", "really", "intense"), PriorityLevel.HIGH),
+    (("somewhat", "a bit", "slightly"), PriorityLevel.LOW),
+]
+DEFAULT_PRIORITY = PriorityLevel.MEDIUM
+
+FALLBACK_ROUTINES: Dict[str, Dict] = {
+    "stressed": {
+        "steps": [
+            "Take 5 deep breaths, inhaling for 4 counts and exhaling for 6 counts",
+            "Step outside or near a window for fresh air and natural light",
+            "Write down 3 things you're grateful for today"
+        ],
+        "category": RoutineCategory.MINDFULNESS,
+        "priority": PriorityLevel.HIGH
+    },
+    "tired": {
+        "steps": [
+            "Drink a glass of water to rehydrate",
+            "Do 5 gentle stretches or light movement",
+            "Take a 5-minute walk or do some light exercise"
+        ],
+        "category": RoutineCategory.PHYSICAL,
+        "priority": PriorityLevel.MEDIUM
+    },
+    "anxious": {
+        "steps": [
+            "Practice the 5-4-3-2-1 grounding technique",
+            "Listen to calming music or nature sounds for 5 minutes",
+            "Call or text someone you care about"
+        ],
+        "category": RoutineCategory.MINDFULNESS,
+        "priority": PriorityLevel.HIGH
+    }
+}
+DEFAULT_FALLBACK = "stressed"
+
+
+class Classification(NamedTuple):
+    """Category, priority and fallback routine key for a mood/goal pair"""
+    category: RoutineCategory
+    priority: PriorityLevel
+    fallback: str
+
+
+_UNMATCHED = len(CATEGORY_RULES) + len(PRIORITY_RULES) + len(FALLBACK_ROUTINES)
+
+
+def _build_matcher():
+    """Compile every keyword table into one pattern plus per-field rank tables
+
+    For each field, a keyword maps to its (category, priority, fallback) rule
+    ranks; lower ranks win and _UNMATCHED means the keyword has no such rule.
+    """
+    ranks: Dict[str, Dict[str, List[int]]] = {"mood": {}, "goal": {}}
+
+    def add(field: str, keyword: str, slot: int, rank: int) -> None:
+        entry = ranks[field].setdefault(keyword, [_UNMATCHED] * 3)
+        entry[slot] = min(entry[slot], rank)
+
+    for rank, (field, keywords, _) in enumerate(CATEGORY_RULES):
+        for keyword in keywords:
+            add(field, keyword, 0, rank)
+    for rank, (keywords, _) in enumerate(PRIORITY_RULES):
+        for keyword in keywords:
+            add("mood", keyword, 1, rank)
+    for rank, key in enumerate(FALLBACK_ROUTINES):
+        add("mood", key, 2, rank)
+
+    keywords = set(ranks["mood"]) | set(ranks["goal"])
+
+    # Zero-width lookahead finds overlapping hits. Alternation takes the longest
+    # keyword at a position, so it also carries the ranks of keywords it starts with.
+    for field_ranks in ranks.values():
+        for keyword in keywords:
+            for other, other_ranks in list(field_ranks.items()):
+                if other != keyword and keyword.startswith(other):
+                    entry = field_ranks.setdefault(keyword, [_UNMATCHED] * 3)
+                    field_ranks[keyword] = [min(a, b) for a, b in zip(entry, other_ranks)]
+
+    alternation = "|".join(re.escape(k) for k in sorted(keywords, key=len, reverse=True))
+    return (
+        re.compile(f"(?=({alternation}))"),
+        {k: tuple(v) for k, v in ranks["mood"].items()},
+        {k: tuple(v) for k, v in ranks["goal"].items()},
+    )
+
+
+_PATTERN, _MOOD_RANKS, _GOAL_RANKS = _build_matcher()
+_FIRST_GOAL_RULE = min(rank for rank, rule in enumerate(CATEGORY_RULES) if rule[0] == "goal")
+_FALLBACK_KEYS = list(FALLBACK_ROUTINES)
+
+
+def classify(mood: str, goal: str) -> Classification:
+    """Classify one mood/goal pair with a single pass over each string"""
+    return _classify(mood.lower(), goal.lower())
+
+
+@lru_cache(maxsize=4096)
+def _classify(mood: str, goal: str) -> Classification:
+    category = priority = fallback = _UNMATCHED
+
+    for keyword in _PATTERN.findall(mood):
+        entry = _MOOD_RANKS.get(keyword)
+        if entry is not None:
+            category = min(category, entry[0])
+            priority = min(priority, entry[1])
+            fallback = min(fallback, entry[2])
+
+    if goal and category > _FIRST_GOAL_RULE:
+        # Goal keywords only decide the category once no mood rule matched
+        for keyword in _PATTERN.findall(goal):
+            entry = _GOAL_RANKS.get(keyword)
+            if entry is not None:
+                category = min(category, entry[0])
+
+    return Classification(
+        category=CATEGORY_RULES[category][2] if category != _UNMATCHED else DEFAULT_CATEGORY,
+        priority=PRIORITY_RULES[priority][1] if priority != _UNMATCHED else DEFAULT_PRIORITY,
+        fallback=_FALLBACK_KEYS[fallback] if fallback != _UNMATCHED else DEFAULT_FALLBACK,
+    )
+
+
+def classify_many(pairs: Iterable[Tuple[str, Optional[str]]]) -> List[Classification]:
+    """Classify many (mood, goal) pairs, scanning each distinct pair only once"""
+    pairs = [((mood or "").lower(), (goal or "").lower()) for mood, goal in pairs]
+    results = {pair: _classify.__wrapped__(*pair) for pair in set(pairs)}
+    return [results[pair] for pair in pairs]
@@ -0,0 +1,150 @@
+import csv
+import io
+import json
+import logging
+import zlib
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from sqlalchemy import Table, select
+
+from app.config import settings
+from app.models.database import MoodEntry, Routine, RoutineCompletion, read_session
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ("ndjson", "csv")
+
+# Dataset name -> (NDJSON record type, table, timestamp column to order by)
+DATASETS: Dict[str, Tuple[str, Table, str]] = {
+    "routines": ("routine", Routine.__table__, "created_at"),
+    "completions": ("completion", RoutineCompletion.__table__, "completed_at"),
+    "moods": ("mood", MoodEntry.__table__, "created_at"),
+}
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+_encoder = json.JSONEncoder(default=_json_default)
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    return value
+
+
+class ExportService:
+    """Streams a user's routines, completions and mood entries as NDJSON or CSV"""
+
+    def parse_datasets(self, include: str, fmt: str) -> List[str]:
+        """Validate the requested datasets and format; raises ValueError"""
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format: {fmt}")
+        datasets = [name.strip().lower() for name in include.split(",") if name.strip()]
+        unknown = [name for name in datasets if name not in DATASETS]
+        if unknown or not datasets:
+            raise ValueError(f"include must list datasets from: {', '.join(DATASETS)}")
+        datasets = list(dict.fromkeys(datasets))
+        if fmt == "csv" and len(datasets) != 1:
+            raise ValueError("CSV exports hold one dataset; pass include=routines, completions or moods")
+        return datasets
+
+    def filename(self, datasets: List[str], fmt: str, gzip: bool) -> str:
+        name = datasets[0] if len(datasets) == 1 else "export"
+        return f"{name}-{datetime.utcnow():%Y%m%d}.{fmt}{'.gz' if gzip else ''}"
+
+    async def _rows(self, db, user_id: int, dataset: str) -> AsyncIterator[Tuple[List[str], List[Any]]]:
+        """Yield (columns, rows) partitions from a server-side cursor"""
+        _, table, order_column = DATASETS[dataset]
+        columns = [column for column in table.c if column.name != "user_id"]
+        query = (
+            select(*columns)
+            .where(table.c.user_id == user_id)
+            .order_by(table.c[order_column], table.c.id)
+            .execution_options(yield_per=settings.EXPORT_FETCH_SIZE)
+        )
+        names = [column.name for column in columns]
+        result = await db.stream(query)
+        async for partition in result.partitions():
+            yield names, partition
+
+    async def _lines(self, user_id: int, datasets: List[str], fmt: str) -> AsyncIterator[str]:
+        async with read_session(user_id) as db:
+            for dataset in datasets:
+                record_type = DATASETS[dataset][0]
+                header_written = False
+                async for names, partition in self._rows(db, user_id, dataset):
+                    if fmt == "ndjson":
+                        for row in partition:
+                            record = {"type": record_type}
+                            record.update(zip(names, row))
+                            yield _encoder.encode(record) + "\n"
+                        continue
+                    buffer = io.StringIO()
+                    writer = csv.writer(buffer, lineterminator="\n")
+                    if not header_written:
+                        writer.writerow(names)
+                        header_written = True
+                    writer.writerows([_csv_value(value) for value in row] for row in partition)
+                    yield buffer.getvalue()
+                if fmt == "csv" and not header_written:
+                    _, table, _ = DATASETS[dataset]
+                    yield ",".join(column.name for column in table.c if column.name != "user_id") + "\n"
+
+    async def stream_export(
+        self,
+        user_id: int,
+        datasets: List[str],
+        fmt: str,
+        gzip: bool = False
+    ) -> AsyncIterator[bytes]:
+        """Export body in chunks of about EXPORT_CHUNK_BYTES, optionally gzip-compressed
+
+        Rows are read through a server-side cursor in EXPORT_FETCH_SIZE
+        batches, so memory use doesn't depend on how much history the user has.
+        Opens its own session: the request-scoped one is closed before a
+        streamed body runs.
+        """
+        compressor: Optional[Any] = zlib.compressobj(6, zlib.DEFLATED, 31) if gzip else None
+        chunk_bytes = settings.EXPORT_CHUNK_BYTES
+        pending: List[bytes] = []
+        pending_size = 0
+
+        def emit(data: bytes) -> bytes:
+            return compressor.compress(data) if compressor is not None else data
+
+        try:
+            async for line in self._lines(user_id, datasets, fmt):
+                encoded = line.encode("utf-8")
+                pending.append(encoded)
+                pending_size += len(encoded)
+                if pending_size >= chunk_bytes:
+                    out = emit(b"".join(pending))
+                    pending, pending_size = [], 0
+                    if out:
+                        yield out
+        except Exception as e:
+            # Headers are already sent; the client sees a truncated body
+            logger.error(f"Export for user {user_id} failed: {str(e)}")
+            raise
+
+        out = emit(b"".join(pending))
+        if compressor is not None:
+            out += compressor.flush()
+        if out:
+            yield out
+
+
+# Global export service instance
+export_service = ExportService()
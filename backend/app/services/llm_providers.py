@@ -0,0 +1,261 @@
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import random
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+import openai
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+Messages = List[Dict[str, str]]
+
+
+class LLMProviderError(Exception):
+    """A chat-completion call failed"""
+
+
+class LLMRateLimitError(LLMProviderError):
+    """The provider rejected the call because of rate limiting"""
+
+
+class LLMTimeoutError(LLMProviderError):
+    """The provider did not answer within the call timeout"""
+
+
+class LLMProvider:
+    """Interface for chat-completion backends used by AIService"""
+
+    name = "base"
+
+    async def startup(self) -> None:
+        """Open long-lived resources (called from the app lifespan)"""
+
+    async def shutdown(self) -> None:
+        """Release long-lived resources"""
+
+    async def complete(self, messages: Messages, max_tokens: int, temperature: float, json_mode: bool = False) -> str:
+        """Return the full completion text; ``json_mode`` requests a single JSON object"""
+        raise NotImplementedError
+
+    def stream(self, messages: Messages, max_tokens: int, temperature: float, json_mode: bool = False) -> AsyncIterator[str]:
+        """Yield completion text deltas as they arrive"""
+        raise NotImplementedError
+
+
+class OpenAIProvider(LLMProvider):
+    """OpenAI chat completions over a shared keep-alive connection pool"""
+
+    name = "openai"
+
+    def __init__(self):
+        self.model = settings.OPENAI_MODEL
+        self.timeout = settings.OPENAI_TIMEOUT
+        self._client: Optional[openai.AsyncOpenAI] = None
+
+    async def startup(self) -> None:
+        if self._client is None:
+            self._client = self._create_client()
+
+    async def shutdown(self) -> None:
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+    def _create_client(self) -> Optional[openai.AsyncOpenAI]:
+        """Build an async OpenAI client backed by a keep-alive connection pool"""
+        if not settings.OPENAI_API_KEY:
+            logger.warning("OPENAI_API_KEY is not set; fallback routines will be used")
+            return None
+
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.OPENAI_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(self.timeout, connect=settings.OPENAI_CONNECT_TIMEOUT),
+        )
+        return openai.AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            http_client=http_client,
+            max_retries=settings.OPENAI_MAX_RETRIES,
+        )
+
+    @property
+    def client(self) -> openai.AsyncOpenAI:
+        """Shared client, created lazily when used outside the app lifespan"""
+        if self._client is None:
+            self._client = self._create_client()
+        if self._client is None:
+            raise LLMProviderError("OpenAI API key is not configured")
+        return self._client
+
+    async def complete(self, messages: Messages, max_tokens: int, temperature: float, json_mode: bool = False) -> str:
+        try:
+            response = await self.client.chat.completions.create(
+                **self._request_kwargs(messages, max_tokens, temperature, json_mode)
+            )
+            return response.choices[0].message.content or ""
+        except openai.OpenAIError as e:
+            raise self._translate(e) from e
+
+    async def stream(self, messages: Messages, max_tokens: int, temperature: float, json_mode: bool = False) -> AsyncIterator[str]:
+        try:
+            response = await self.client.chat.completions.create(
+                stream=True,
+                **self._request_kwargs(messages, max_tokens, temperature, json_mode)
+            )
+            async for chunk in response:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except openai.OpenAIError as e:
+            raise self._translate(e) from e
+
+    def _request_kwargs(self, messages: Messages, max_tokens: int, temperature: float, json_mode: bool) -> Dict[str, Any]:
+        kwargs: Dict[str, Any] = {
+            "model": self.model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "timeout": self.timeout,
+        }
+        if json_mode:
+            kwargs["response_format"] = {"type": "json_object"}
+        return kwargs
+
+    def _translate(self, error: openai.OpenAIError) -> LLMProviderError:
+        if isinstance(error, openai.APITimeoutError):
+            return LLMTimeoutError(f"OpenAI request timed out after {self.timeout}s")
+        if isinstance(error, openai.RateLimitError):
+            return LLMRateLimitError("OpenAI rate limit exceeded")
+        return LLMProviderError(f"OpenAI API error: {str(error)}")
+
+
+_FAKE_STEPS = [
+    "Take 5 slow breaths, inhaling for 4 counts and exhaling for 6",
+    "Drink a full glass of water",
+    "Stretch your neck, shoulders and back for 3 minutes",
+    "Write down three things you are grateful for",
+    "Take a 10-minute walk outside",
+    "Put your phone in another room for 15 minutes",
+    "Listen to one calming song with your eyes closed",
+    "Tidy one small area of your space",
+    "Send a kind message to someone you care about",
+    "Do a 5-minute body scan from head to toe",
+]
+
+_FAKE_TIPS = [
+    "Go at your own pace",
+    "Notice how you feel before and after",
+    "Small steps still count",
+    "Try the same routine at the same time tomorrow",
+]
+
+
+class FakeLLMProvider(LLMProvider):
+    """Deterministic local stand-in for load testing without network access
+
+    Returns schema-valid routine JSON derived from the prompt, after a latency
+    sampled from a configurable distribution, and fails or rate-limits at
+    configurable rates. Failures take the sampled latency too (a configurable
+    fraction of it for rate limits), as real ones do. Seeding makes the
+    sequence of latencies and failures reproducible.
+    """
+
+    name = "fake"
+
+    def __init__(
+        self,
+        latency_ms: float = 800.0,
+        distribution: str = "lognormal",
+        spread: float = 0.5,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        rate_limit_latency_fraction: float = 0.1,
+        seed: Optional[int] = None
+    ):
+        if distribution not in ("constant", "uniform", "lognormal"):
+            raise ValueError(f"Unknown fake LLM latency distribution: {distribution}")
+        self.latency_ms = latency_ms
+        self.distribution = distribution
+        self.spread = spread
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.rate_limit_latency_fraction = rate_limit_latency_fraction
+        self._random = random.Random(seed)
+        self.calls = 0
+
+    def _sample_latency(self) -> float:
+        """Latency in seconds; latency_ms is the median"""
+        if self.distribution == "constant":
+            latency = self.latency_ms
+        elif self.distribution == "uniform":
+            latency = self.latency_ms * self._random.uniform(1 - self.spread, 1 + self.spread)
+        else:
+            latency = self.latency_ms * math.exp(self._random.gauss(0.0, self.spread))
+        return max(latency, 0.0) / 1000.0
+
+    async def _maybe_fail(self, latency: float) -> None:
+        """Raise a sampled failure once the time a real one would take has passed"""
+        roll = self._random.random()
+        if roll < self.rate_limit_rate:
+            await asyncio.sleep(latency * self.rate_limit_latency_fraction)
+            raise LLMRateLimitError("Fake provider rate limit")
+        if roll < self.rate_limit_rate + self.error_rate:
+            await asyncio.sleep(latency)
+            raise LLMProviderError("Fake provider error")
+
+    def _routine_json(self, messages: Messages) -> str:
+        prompt = messages[-1]["content"] if messages else ""
+        digest = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest(), 16)
+        step_count = 3 + digest % 3
+        steps = [_FAKE_STEPS[(digest >> (4 * i)) % len(_FAKE_STEPS)] for i in range(step_count)]
+        return json.dumps({
+            "steps": list(dict.fromkeys(steps)),
+            "duration": 10 + 5 * (digest % 4),
+            "tips": [_FAKE_TIPS[digest % len(_FAKE_TIPS)]],
+        })
+
+    async def complete(self, messages: Messages, max_tokens: int, temperature: float, json_mode: bool = False) -> str:
+        self.calls += 1
+        latency = self._sample_latency()
+        await self._maybe_fail(latency)
+        await asyncio.sleep(latency)
+        return self._routine_json(messages)
+
+    async def stream(self, messages: Messages, max_tokens: int, temperature: float, json_mode: bool = False) -> AsyncIterator[str]:
+        self.calls += 1
+        latency = self._sample_latency()
+        await self._maybe_fail(latency)
+
+        text = self._routine_json(messages)
+        chunks = [text[i:i + 8] for i in range(0, len(text), 8)]
+        # A third of the latency before the first token, the rest spread across chunks
+        await asyncio.sleep(latency / 3)
+        for chunk in chunks:
+            await asyncio.sleep(2 * latency / 3 / len(chunks))
+            yield chunk
+
+
+def create_provider(name: Optional[str] = None) -> LLMProvider:
+    """Build the provider selected in settings"""
+    name = (name or settings.LLM_PROVIDER).lower()
+    if name == "openai":
+        return OpenAIProvider()
+    if name == "fake":
+        return FakeLLMProvider(
+            latency_ms=settings.FAKE_LLM_LATENCY_MS,
+            distribution=settings.FAKE_LLM_LATENCY_DISTRIBUTION,
+            spread=settings.FAKE_LLM_LATENCY_SPREAD,
+            error_rate=settings.FAKE_LLM_ERROR_RATE,
+            rate_limit_rate=settings.FAKE_LLM_RATE_LIMIT_RATE,
+            rate_limit_latency_fraction=settings.FAKE_LLM_RATE_LIMIT_LATENCY_FRACTION,
+            seed=settings.FAKE_LLM_SEED,
+        )
+    raise ValueError(f"Unknown LLM provider: {name}")
@@ -0,0 +1,211 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.models.schemas import PriorityLevel
+
+logger = logging.getLogger(__name__)
+
+# Lower rank is served first
+PRIORITY_RANK = {
+    PriorityLevel.URGENT: 0,
+    PriorityLevel.HIGH: 1,
+    PriorityLevel.MEDIUM: 2,
+    PriorityLevel.LOW: 3,
+}
+
+
+class LLMBudgetExhausted(Exception):
+    """Raised when a request cannot get an LLM slot within its allowed wait"""
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at a fixed rate"""
+
+    def __init__(self, rate_per_second: float, capacity: float):
+        self.rate = rate_per_second
+        self.capacity = capacity
+        self.tokens = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Take tokens if available"""
+        self._refill()
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return True
+        return False
+
+    def time_until_available(self, tokens: float = 1.0) -> float:
+        """Seconds until ``tokens`` can be taken"""
+        self._refill()
+        if self.tokens >= tokens:
+            return 0.0
+        return (tokens - self.tokens) / self.rate
+
+    def drain(self, seconds: float) -> None:
+        """Empty the bucket so no token is available for at least ``seconds`` from now
+
+        Repeated drains do not add up: several calls rate-limited at once
+        pause the bucket for ``seconds``, not once per call.
+        """
+        self._refill()
+        self.tokens = min(self.tokens, -seconds * self.rate)
+
+
+class _PriorityStats:
+    """Queue depth and wait-time counters for one priority level"""
+
+    __slots__ = ("queued", "admitted", "rejected", "wait_total", "wait_max")
+
+    def __init__(self):
+        self.queued = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "avg_wait": round(self.wait_total / self.admitted, 4) if self.admitted else 0.0,
+            "max_wait": round(self.wait_max, 4),
+        }
+
+
+class LLMScheduler:
+    """Admits LLM calls by priority under a concurrency limit and a request-rate budget"""
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        requests_per_minute: float,
+        burst: int,
+        max_wait: Dict[PriorityLevel, Optional[float]]
+    ):
+        self.max_concurrency = max_concurrency
+        self.bucket = TokenBucket(requests_per_minute / 60.0, burst)
+        self.max_wait = max_wait
+        self._queue: List[Tuple[int, int]] = []
+        self._seq = itertools.count()
+        self._active = 0
+        self._condition: Optional[asyncio.Condition] = None
+        self._stats = {priority: _PriorityStats() for priority in PRIORITY_RANK}
+
+    def _get_condition(self) -> asyncio.Condition:
+        # Created lazily so it binds to the running event loop
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    @asynccontextmanager
+    async def slot(self, priority: PriorityLevel) -> AsyncIterator[None]:
+        """Hold an LLM slot for the duration of the block"""
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            await self.release()
+
+    async def acquire(self, priority: PriorityLevel) -> None:
+        """Wait until this request is first in line, under the concurrency limit and has budget"""
+        stats = self._stats[priority]
+        entry = (PRIORITY_RANK[priority], next(self._seq))
+        heapq.heappush(self._queue, entry)
+        stats.queued += 1
+
+        started = time.monotonic()
+        max_wait = self.max_wait.get(priority)
+        deadline = started + max_wait if max_wait is not None else None
+
+        condition = self._get_condition()
+        async with condition:
+            try:
+                while True:
+                    delay = None
+                    if self._queue[0] == entry and self._active < self.max_concurrency:
+                        if self.bucket.try_acquire():
+                            break
+                        delay = self.bucket.time_until_available()
+
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise LLMBudgetExhausted(
+                                f"No LLM capacity for {priority.value} priority request within {max_wait}s"
+                            )
+                        delay = remaining if delay is None else min(delay, remaining)
+
+                    try:
+                        await asyncio.wait_for(condition.wait(), delay)
+                    except asyncio.TimeoutError:
+                        pass
+            except BaseException as e:
+                self._queue.remove(entry)
+                heapq.heapify(self._queue)
+                stats.queued -= 1
+                if isinstance(e, LLMBudgetExhausted):
+                    stats.rejected += 1
+                    logger.warning(str(e))
+                # The head of the queue may have changed
+                condition.notify_all()
+                raise
+
+            heapq.heappop(self._queue)
+            stats.queued -= 1
+            self._active += 1
+
+            waited = time.monotonic() - started
+            stats.admitted += 1
+            stats.wait_total += waited
+            stats.wait_max = max(stats.wait_max, waited)
+
+            condition.notify_all()
+
+    async def release(self) -> None:
+        """Return a slot and wake queued requests"""
+        condition = self._get_condition()
+        async with condition:
+            self._active -= 1
+            condition.notify_all()
+
+    def throttle(self, seconds: float) -> None:
+        """Back off all callers after the provider reports a rate limit"""
+        self.bucket.drain(seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        """Current load and per-priority queue metrics"""
+        return {
+            "active": self._active,
+            "max_concurrency": self.max_concurrency,
+            "queue_depth": len(self._queue),
+            "tokens_available": round(max(self.bucket.tokens, 0.0), 2),
+            "priorities": {priority.value: stats.as_dict() for priority, stats in self._stats.items()},
+        }
+
+
+def create_scheduler() -> LLMScheduler:
+    """Build the scheduler from settings"""
+    return LLMScheduler(
+        max_concurrency=settings.LLM_MAX_CONCURRENCY,
+        requests_per_minute=settings.LLM_REQUESTS_PER_MINUTE,
+        burst=settings.LLM_BURST,
+        max_wait={
+            PriorityLevel.URGENT: settings.LLM_MAX_QUEUE_WAIT,
+            PriorityLevel.HIGH: settings.LLM_MAX_QUEUE_WAIT,
+            PriorityLevel.MEDIUM: settings.LLM_MAX_QUEUE_WAIT,
+            PriorityLevel.LOW: settings.LLM_LOW_PRIORITY_MAX_WAIT,
+        },
+    )
@@ -0,0 +1,246 @@
+import codecs
+import csv
+import json
+import logging
+import time
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.database import MoodEntry, mark_user_written
+from app.models.schemas import MoodCreate
+from app.services.rollups import RollupDelta, rollup_service, to_utc_naive
+
+logger = logging.getLogger(__name__)
+
+IMPORT_FORMATS = ("ndjson", "csv")
+CSV_COLUMNS = ("mood", "intensity", "context", "triggers", "created_at")
+
+_CONTENT_TYPES = {
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "application/json-lines": "ndjson",
+    "text/csv": "csv",
+    "application/csv": "csv",
+}
+
+
+def format_for_content_type(content_type: Optional[str]) -> Optional[str]:
+    """Import format implied by a Content-Type header, if any"""
+    if not content_type:
+        return None
+    return _CONTENT_TYPES.get(content_type.split(";")[0].strip().lower())
+
+
+class _RowError(Exception):
+    """A single import row is invalid; the import carries on"""
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc']) or 'row'}: {item['msg']}"
+        for item in error.errors()
+    )
+
+
+class MoodImportService:
+    """Bulk mood entry import from streamed NDJSON or CSV uploads"""
+
+    async def _records(self, chunks: AsyncIterator[bytes], fmt: str) -> AsyncIterator[Tuple[int, str]]:
+        """Yield (line number, record) pairs as complete records arrive
+
+        Only the current partial line is buffered. CSV records continue onto
+        the next line while a quoted field is still open.
+        """
+        decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+        max_line = settings.MOOD_IMPORT_MAX_LINE_BYTES
+        pending = ""
+        record = ""
+        record_line = 0
+        line_no = 0
+        skipping = False
+
+        async def lines() -> AsyncIterator[Tuple[int, Optional[str]]]:
+            """Physical lines; None marks a line that was too long to keep"""
+            nonlocal pending, line_no, skipping
+            async for chunk in chunks:
+                pending += decoder.decode(chunk)
+                while True:
+                    newline = pending.find("\n")
+                    if newline < 0:
+                        break
+                    line, pending = pending[:newline], pending[newline + 1:]
+                    line_no += 1
+                    if skipping or len(line) > max_line:
+                        skipping = False
+                        yield line_no, None
+                    else:
+                        yield line_no, line.rstrip("\r")
+                if len(pending) > max_line:
+                    # Drop the oversized line now instead of growing the buffer
+                    pending = ""
+                    skipping = True
+            pending += decoder.decode(b"", final=True)
+            if skipping or pending:
+                line_no += 1
+                yield line_no, None if skipping or len(pending) > max_line else pending.rstrip("\r")
+
+        async for number, line in lines():
+            if line is None:
+                record = ""
+                yield number, None
+                continue
+            if fmt == "csv":
+                if not record:
+                    record_line = number
+                    record = line
+                else:
+                    record += "\n" + line
+                if record.count('"') % 2:
+                    if len(record) > max_line:
+                        record = ""
+                        yield record_line, None
+                    continue
+                yield record_line, record
+                record = ""
+            else:
+                yield number, line
+        if record:
+            yield record_line, record
+
+    def _parse_ndjson(self, record: str) -> Dict[str, Any]:
+        try:
+            row = json.loads(record)
+        except ValueError as e:
+            raise _RowError(f"Invalid JSON: {e}")
+        if not isinstance(row, dict):
+            raise _RowError("Each line must be a JSON object")
+        return row
+
+    def _parse_csv(self, record: str, columns: List[str]) -> Dict[str, Any]:
+        values = next(csv.reader([record]))
+        if len(values) > len(columns):
+            raise _RowError(f"Expected at most {len(columns)} columns, got {len(values)}")
+        row: Dict[str, Any] = {}
+        for column, value in zip(columns, values):
+            value = value.strip()
+            if column not in CSV_COLUMNS or value == "":
+                continue
+            if column == "triggers":
+                if value.startswith("["):
+                    try:
+                        row[column] = json.loads(value)
+                    except ValueError:
+                        raise _RowError("triggers: invalid JSON list")
+                else:
+                    row[column] = [item.strip() for item in value.split(";") if item.strip()]
+            else:
+                row[column] = value
+        return row
+
+    def _csv_header(self, record: str) -> List[str]:
+        columns = [column.strip().lower() for column in next(csv.reader([record]))]
+        if "mood" not in columns:
+            raise ValueError(f"CSV header must include a mood column (columns: {', '.join(CSV_COLUMNS)})")
+        return columns
+
+    def _to_row(self, user_id: int, data: Dict[str, Any], now: datetime) -> Dict[str, Any]:
+        try:
+            mood = MoodCreate(**data)
+        except ValidationError as e:
+            raise _RowError(_validation_message(e))
+        return {
+            "user_id": user_id,
+            "mood": mood.mood,
+            "intensity": mood.intensity,
+            "context": mood.context,
+            "triggers": mood.triggers,
+            "created_at": to_utc_naive(mood.created_at) if mood.created_at else now,
+        }
+
+    async def _insert_batch(self, db: AsyncSession, user_id: int, rows: List[Dict[str, Any]]) -> None:
+        # One executemany per batch, committed so locks and memory stay bounded
+        await db.execute(insert(MoodEntry), rows)
+        delta = RollupDelta()
+        for row in rows:
+            delta.add_mood(user_id, row["created_at"], row["mood"], row["intensity"])
+        await rollup_service.apply(db, delta)
+        mark_user_written(db.sync_session, user_id)
+        await db.commit()
+
+    async def import_moods(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        chunks: AsyncIterator[bytes],
+        fmt: str
+    ) -> Dict[str, Any]:
+        """Validate and insert streamed mood rows in batches, collecting per-row errors
+
+        Valid rows are committed batch by batch, so rows before a failure
+        stay imported. Raises ValueError if the upload can't be read at all
+        (unknown format or a CSV header without a mood column).
+        """
+        if fmt not in IMPORT_FORMATS:
+            raise ValueError(f"Unsupported import format: {fmt}")
+
+        batch_size = max(1, settings.MOOD_IMPORT_BATCH_SIZE)
+        max_errors = settings.MOOD_IMPORT_MAX_ERRORS
+        started = time.perf_counter()
+        now = datetime.utcnow()
+        columns: Optional[List[str]] = None
+        batch: List[Dict[str, Any]] = []
+        errors: List[Dict[str, Any]] = []
+        imported = failed = 0
+
+        async for line, record in self._records(chunks, fmt):
+            if record is None:
+                failed += 1
+                if len(errors) < max_errors:
+                    errors.append({"line": line, "error": f"Line longer than {settings.MOOD_IMPORT_MAX_LINE_BYTES} bytes"})
+                continue
+            if not record.strip():
+                continue
+            if fmt == "csv" and columns is None:
+                columns = self._csv_header(record)
+                continue
+            try:
+                data = self._parse_csv(record, columns) if fmt == "csv" else self._parse_ndjson(record)
+                batch.append(self._to_row(user_id, data, now))
+            except _RowError as e:
+                failed += 1
+                if len(errors) < max_errors:
+                    errors.append({"line": line, "error": str(e)})
+                continue
+            if len(batch) >= batch_size:
+                await self._insert_batch(db, user_id, batch)
+                imported += len(batch)
+                batch = []
+
+        if batch:
+            await self._insert_batch(db, user_id, batch)
+            imported += len(batch)
+
+        elapsed = time.perf_counter() - started
+        rows_per_second = round((imported + failed) / elapsed, 1) if elapsed > 0 else 0.0
+        logger.info(
+            f"Mood import for user {user_id}: {imported} imported, {failed} failed "
+            f"in {elapsed:.2f}s ({rows_per_second} rows/s)"
+        )
+        return {
+            "imported": imported,
+            "failed": failed,
+            "errors": errors,
+            "errors_truncated": failed > len(errors),
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_second": rows_per_second,
+        }
+
+
+# Global mood import service instance
+mood_import_service = MoodImportService()
@@ -1,15 +1,21 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
-from typing import List, Dict, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import desc, select
+from typing import List, Dict, Iterable, Optional, Sequence
 from datetime import datetime, timedelta
+from app.core.timing import analytics_timings
 from app.models.database import MoodEntry, User
 from app.models.schemas import MoodCreate, MoodUpdate, MoodResponse
+from app.services.pagination import KeysetPage, keyset_paginate
+from app.services.rollups import MOOD, RollupDelta, rollup_service, to_utc_naive
+
+# Sections of the mood analytics response, each served by one query
+MOOD_ANALYTICS_FACETS = ("summary", "distribution", "daily", "weekly")
 
 
 class MoodService:
     """Service for mood tracking operations"""
     
-    def create_mood_entry(self, db: Session, user_id: int, mood_data: MoodCreate) -> MoodEntry:
+    async def create_mood_entry(self, db: AsyncSession, user_id: int, mood_data: MoodCreate) -> MoodEntry:
         """Create a new mood entry"""
         mood_entry = MoodEntry(
             user_id=user_id,
@@ -17,23 +23,27 @@ class MoodService:
             intensity=mood_data.intensity,
             context=mood_data.context,
             triggers=mood_data.triggers,
-            created_at=mood_data.created_at or datetime.utcnow()
+            created_at=to_utc_naive(mood_data.created_at) if mood_data.created_at else datetime.utcnow()
         )
         db.add(mood_entry)
-        db.commit()
-        db.refresh(mood_entry)
+        await rollup_service.apply(db, RollupDelta().add_mood(
+            user_id, mood_entry.created_at, mood_entry.mood, mood_entry.intensity
+        ))
+        await db.commit()
+        await db.refresh(mood_entry)
         return mood_entry
     
-    def get_mood_entry(self, db: Session, mood_id: int, user_id: int) -> Optional[MoodEntry]:
+    async def get_mood_entry(self, db: AsyncSession, mood_id: int, user_id: int) -> Optional[MoodEntry]:
         """Get a specific mood entry by ID"""
-        return db.query(MoodEntry).filter(
+        result = await db.execute(select(MoodEntry).where(
             MoodEntry.id == mood_id,
             MoodEntry.user_id == user_id
-        ).first()
+        ))
+        return result.scalars().first()
     
-    def get_user_moods(
+    async def get_user_moods(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         user_id: int, 
         skip: int = 0, 
         limit: int = 100,
@@ -41,122 +51,138 @@ class MoodService:
         end_date: Optional[datetime] = None
     ) -> List[MoodEntry]:
         """Get user's mood entries with pagination and date filtering"""
-        query = db.query(MoodEntry).filter(MoodEntry.user_id == user_id)
+        query = select(MoodEntry).where(MoodEntry.user_id == user_id)
         
         if start_date:
-            query = query.filter(MoodEntry.created_at >= start_date)
+            query = query.where(MoodEntry.created_at >= start_date)
         if end_date:
-            query = query.filter(MoodEntry.created_at <= end_date)
+            query = query.where(MoodEntry.created_at <= end_date)
         
-        return query.order_by(desc(MoodEntry.created_at)).offset(skip).limit(limit).all()
+        result = await db.execute(query.order_by(desc(MoodEntry.created_at)).offset(skip).limit(limit))
+        return list(result.scalars().all())
     
-    def update_mood_entry(
+    async def get_user_moods_page(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> KeysetPage:
+        """Get user's mood entries newest first, paginated by cursor"""
+        query = select(MoodEntry).where(MoodEntry.user_id == user_id)
+        
+        if start_date:
+            query = query.where(MoodEntry.created_at >= start_date)
+        if end_date:
+            query = query.where(MoodEntry.created_at <= end_date)
+        
+        return await keyset_paginate(db, query, MoodEntry, limit, cursor)
+    
+    async def update_mood_entry(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         mood_id: int, 
         user_id: int, 
         mood_data: MoodUpdate
     ) -> Optional[MoodEntry]:
         """Update a mood entry"""
-        mood_entry = self.get_mood_entry(db, mood_id, user_id)
+        mood_entry = await self.get_mood_entry(db, mood_id, user_id)
         if not mood_entry:
             return None
         
+        # Move the entry's contribution in the daily rollups from old to new values
+        delta = RollupDelta().add_mood(user_id, mood_entry.created_at, mood_entry.mood, mood_entry.intensity, sign=-1)
+        
         update_data = mood_data.dict(exclude_unset=True)
         for field, value in update_data.items():
             setattr(mood_entry, field, value)
         
+        delta.add_mood(user_id, mood_entry.created_at, mood_entry.mood, mood_entry.intensity)
+        await rollup_service.apply(db, delta)
+        
         mood_entry.updated_at = datetime.utcnow()
-        db.commit()
-        db.refresh(mood_entry)
+        await db.commit()
+        await db.refresh(mood_entry)
         return mood_entry
     
-    def delete_mood_entry(self, db: Session, mood_id: int, user_id: int) -> bool:
+    async def delete_mood_entry(self, db: AsyncSession, mood_id: int, user_id: int) -> bool:
         """Delete a mood entry"""
-        mood_entry = self.get_mood_entry(db, mood_id, user_id)
+        mood_entry = await self.get_mood_entry(db, mood_id, user_id)
         if not mood_entry:
             return False
         
-        db.delete(mood_entry)
-        db.commit()
+        await db.delete(mood_entry)
+        await rollup_service.apply(db, RollupDelta().add_mood(
+            user_id, mood_entry.created_at, mood_entry.mood, mood_entry.intensity, sign=-1
+        ))
+        await db.commit()
         return True
     
-    def get_mood_analytics(self, db: Session, user_id: int, days: int = 30) -> Dict:
-        """Get mood analytics for the user"""
-        end_date = datetime.utcnow()
-        start_date = end_date - timedelta(days=days)
-        
-        # Get mood entries in date range
-        mood_entries = db.query(MoodEntry).filter(
-            MoodEntry.user_id == user_id,
-            MoodEntry.created_at >= start_date,
-            MoodEntry.created_at <= end_date
-        ).all()
-        
-        if not mood_entries:
-            return {
-                "total_entries": 0,
-                "average_intensity": 0,
-                "most_common_mood": None,
-                "mood_distribution": {},
-                "daily_averages": {},
-                "trends": {}
-            }
-        
-        # Calculate analytics
-        total_entries = len(mood_entries)
-        intensities = [entry.intensity for entry in mood_entries if entry.intensity]
-        average_intensity = sum(intensities) / len(intensities) if intensities else 0
-        
-        # Most common mood
-        mood_counts = {}
-        for entry in mood_entries:
-            mood_counts[entry.mood] = mood_counts.get(entry.mood, 0) + 1
-        
-        most_common_mood = max(mood_counts.items(), key=lambda x: x[1])[0] if mood_counts else None
-        
-        # Daily averages
-        daily_averages = {}
-        for entry in mood_entries:
-            date_key = entry.created_at.strftime('%Y-%m-%d')
-            if date_key not in daily_averages:
-                daily_averages[date_key] = []
-            if entry.intensity:
-                daily_averages[date_key].append(entry.intensity)
-        
-        # Calculate average for each day
-        for date_key in daily_averages:
-            daily_averages[date_key] = sum(daily_averages[date_key]) / len(daily_averages[date_key])
-        
-        return {
-            "total_entries": total_entries,
-            "average_intensity": round(average_intensity, 2),
-            "most_common_mood": most_common_mood,
-            "mood_distribution": mood_counts,
-            "daily_averages": daily_averages,
-            "trends": self._calculate_trends(mood_entries)
-        }
+    async def get_mood_analytics(
+        self, db: AsyncSession, user_id: int, days: int = 30, facets: Iterable[str] = MOOD_ANALYTICS_FACETS
+    ) -> Dict:
+        """Get mood analytics for the user, computing only the requested facets
+        
+        Each facet is one grouped query over the daily rollups:
+        "summary" (total_entries, average_intensity), "distribution"
+        (mood_distribution, most_common_mood), "daily" (daily_averages) and
+        "weekly" (trends, keyed by ISO week).
+        """
+        return (await self.get_mood_analytics_windows(db, user_id, [days], facets))[days]
     
-    def _calculate_trends(self, mood_entries: List[MoodEntry]) -> Dict:
-        """Calculate mood trends over time"""
-        if not mood_entries:
-            return {}
-        
-        # Group by week
-        weekly_data = {}
-        for entry in mood_entries:
-            week_key = entry.created_at.strftime('%Y-W%U')
-            if week_key not in weekly_data:
-                weekly_data[week_key] = []
-            if entry.intensity:
-                weekly_data[week_key].append(entry.intensity)
-        
-        # Calculate weekly averages
-        weekly_averages = {}
-        for week_key, intensities in weekly_data.items():
-            weekly_averages[week_key] = sum(intensities) / len(intensities)
-        
-        return weekly_averages
+    async def get_mood_analytics_windows(
+        self, db: AsyncSession, user_id: int, windows: Sequence[int], facets: Iterable[str] = MOOD_ANALYTICS_FACETS
+    ) -> Dict[int, Dict]:
+        """Get mood analytics for several trailing windows (in days), keyed by window
+        
+        Still one query per facet: it scans the longest window once and
+        aggregates every window side by side.
+        """
+        facets = set(facets)
+        unknown = facets - set(MOOD_ANALYTICS_FACETS)
+        if unknown:
+            raise ValueError(f"Unknown mood analytics facets: {', '.join(sorted(unknown))}")
+        
+        # Whole UTC days from the daily rollups
+        windows = sorted(set(windows))
+        end_day = datetime.utcnow().date()
+        start_days = [(datetime.utcnow() - timedelta(days=days)).date() for days in windows]
+        analytics = {days: {} for days in windows}
+        
+        if "summary" in facets:
+            with analytics_timings.section("mood_analytics.summary"):
+                row = (await db.execute(rollup_service.totals_query(user_id, start_days, end_day))).one()
+            for days, totals in zip(windows, rollup_service.window_totals(row, len(windows))):
+                analytics[days]["total_entries"] = totals["mood_entries"]
+                analytics[days]["average_intensity"] = (
+                    round(totals["intensity_sum"] / totals["intensity_count"], 2) if totals["intensity_count"] else 0
+                )
+        
+        if "distribution" in facets:
+            with analytics_timings.section("mood_analytics.distribution"):
+                counts = await rollup_service.facet_counts(db, user_id, [MOOD], start_days, end_day)
+            for days, window in zip(windows, counts):
+                mood_counts = window[MOOD]
+                analytics[days]["mood_distribution"] = mood_counts
+                analytics[days]["most_common_mood"] = (
+                    max(mood_counts.items(), key=lambda x: x[1])[0] if mood_counts else None
+                )
+        
+        if "daily" in facets:
+            with analytics_timings.section("mood_analytics.daily"):
+                averages = await rollup_service.intensity_averages(db, user_id, start_days, end_day, by="day")
+            for days, daily_averages in zip(windows, averages):
+                analytics[days]["daily_averages"] = daily_averages
+        
+        if "weekly" in facets:
+            with analytics_timings.section("mood_analytics.weekly"):
+                averages = await rollup_service.intensity_averages(db, user_id, start_days, end_day, by="week")
+            for days, trends in zip(windows, averages):
+                analytics[days]["trends"] = trends
+        
+        return analytics
 
 
 # Create service instance
@@ -0,0 +1,172 @@
+import logging
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import Float, cast, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.database import MoodEntry
+
+logger = logging.getLogger(__name__)
+
+ROLLING_WINDOWS = (7, 30)
+PERCENTILES = (10, 25, 50, 75, 90)
+WEEKDAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+_EPOCH = date(1970, 1, 1)
+# 1970-01-01 was a Thursday; shifts day numbers so Monday is 0
+_WEEKDAY_OFFSET = 3
+
+
+def _rounded(value: float, digits: int = 2) -> Optional[float]:
+    return None if np.isnan(value) else round(float(value), digits)
+
+
+def _by_date(dates: np.ndarray, values: np.ndarray) -> Dict[str, float]:
+    observed = ~np.isnan(values)
+    return dict(zip(dates[observed].tolist(), np.round(values[observed], 2).tolist()))
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    return np.divide(numerator, denominator, out=np.full(numerator.shape, np.nan), where=denominator > 0)
+
+
+def compute_mood_timeseries(
+    epoch_days: np.ndarray, intensity: np.ndarray, mood_codes: np.ndarray, mood_labels: List[str],
+    start_day: date, end_day: date
+) -> Dict[str, Any]:
+    """Time-series statistics for one user's mood entries in [start_day, end_day]
+
+    ``epoch_days`` holds each entry's timestamp in (fractional) days since
+    1970-01-01 UTC, ``intensity`` its intensity with NaN where unrated and
+    ``mood_codes`` the index of its mood in ``mood_labels``. Every statistic
+    is computed with array operations over per-day buckets, so the cost is
+    a few passes over the arrays whatever their length.
+    """
+    n_days = (end_day - start_day).days + 1
+    first_day = (start_day - _EPOCH).days
+    day = np.floor(epoch_days).astype(np.int64) - first_day
+    in_window = (day >= 0) & (day < n_days)
+    day, intensity, mood_codes = day[in_window], intensity[in_window], mood_codes[in_window]
+
+    rated = ~np.isnan(intensity)
+    rated_day, rated_intensity = day[rated], intensity[rated]
+    daily_count = np.bincount(rated_day, minlength=n_days)
+    daily_sum = np.bincount(rated_day, weights=rated_intensity, minlength=n_days)
+    daily_average = _ratio(daily_sum, daily_count)
+    dates = np.arange(np.datetime64(start_day), np.datetime64(end_day) + 1).astype(str)
+
+    # Rolling averages weight every entry in the trailing window equally
+    sum_prefix = np.concatenate(([0.0], np.cumsum(daily_sum)))
+    count_prefix = np.concatenate(([0], np.cumsum(daily_count)))
+    window_end = np.arange(1, n_days + 1)
+    rolling = {}
+    for window in ROLLING_WINDOWS:
+        window_start = np.maximum(window_end - window, 0)
+        rolling[f"{window}d"] = _by_date(dates, _ratio(
+            sum_prefix[window_end] - sum_prefix[window_start],
+            (count_prefix[window_end] - count_prefix[window_start]).astype(np.float64)
+        ))
+
+    observed_days = np.flatnonzero(daily_count)
+    observed_averages = daily_average[observed_days]
+    day_changes = np.abs(np.diff(daily_average))
+    day_changes = day_changes[~np.isnan(day_changes)]
+    volatility = {
+        "intensity_std": _rounded(np.std(rated_intensity)) if rated_intensity.size else None,
+        "daily_average_std": _rounded(np.std(observed_averages)) if observed_averages.size > 1 else None,
+        "mean_daily_change": _rounded(np.mean(day_changes)) if day_changes.size else None,
+    }
+
+    percentiles = {}
+    if rated_intensity.size:
+        percentiles = {
+            f"p{p}": round(float(value), 2)
+            for p, value in zip(PERCENTILES, np.percentile(rated_intensity, PERCENTILES))
+        }
+
+    weekday = (day + first_day + _WEEKDAY_OFFSET) % 7
+    weekday_entries = np.bincount(weekday, minlength=7)
+    weekday_average = _ratio(
+        np.bincount(weekday[rated], weights=rated_intensity, minlength=7),
+        np.bincount(weekday[rated], minlength=7).astype(np.float64)
+    )
+    weekday_profile = {
+        name: {"entries": int(weekday_entries[i]), "average_intensity": _rounded(weekday_average[i])}
+        for i, name in enumerate(WEEKDAYS)
+    }
+
+    trend = {"slope_per_day": None, "slope_per_week": None, "days_observed": int(observed_days.size)}
+    if observed_days.size > 1:
+        slope = np.polyfit(observed_days.astype(np.float64), observed_averages, 1)[0]
+        trend["slope_per_day"] = round(float(slope), 4)
+        trend["slope_per_week"] = round(float(slope) * 7, 4)
+
+    labels = len(mood_labels)
+    mood_entries = np.bincount(mood_codes, minlength=labels)
+    mood_average = _ratio(
+        np.bincount(mood_codes[rated], weights=rated_intensity, minlength=labels),
+        np.bincount(mood_codes[rated], minlength=labels).astype(np.float64)
+    )
+    mood_profile = {
+        label: {"entries": int(mood_entries[i]), "average_intensity": _rounded(mood_average[i])}
+        for i, label in sorted(enumerate(mood_labels), key=lambda item: item[1])
+        if mood_entries[i]
+    }
+
+    return {
+        "start_date": start_day.isoformat(),
+        "end_date": end_day.isoformat(),
+        "total_entries": int(day.size),
+        "rated_entries": int(rated_intensity.size),
+        "average_intensity": _rounded(np.mean(rated_intensity)) if rated_intensity.size else None,
+        "rolling_averages": rolling,
+        "volatility": volatility,
+        "percentiles": percentiles,
+        "weekday_profile": weekday_profile,
+        "trend": trend,
+        "mood_profile": mood_profile,
+    }
+
+
+class MoodTimeseriesService:
+    """Advanced mood statistics computed with NumPy from one load of the user's entries"""
+
+    async def load(
+        self, db: AsyncSession, user_id: int, start_day: date
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, List[str]]:
+        """(epoch days, intensity, mood code) arrays and the mood labels for the user's entries since start_day"""
+        if db.bind.dialect.name == "postgresql":
+            epoch_days = cast(func.extract("epoch", MoodEntry.created_at), Float) / 86400
+        else:
+            # Julian day 2440587.5 is 1970-01-01 00:00 UTC
+            epoch_days = func.julianday(MoodEntry.created_at) - 2440587.5
+        # Core execution on the session's connection skips ORM row processing
+        connection = await db.connection()
+        result = await connection.execute(
+            select(epoch_days, MoodEntry.intensity, MoodEntry.mood).where(
+                MoodEntry.user_id == user_id,
+                MoodEntry.created_at >= datetime.combine(start_day, datetime.min.time())
+            )
+        )
+        columns = list(zip(*result.all())) or [(), (), ()]
+        epoch_column, intensity_column, mood_column = columns
+        codes: Dict[str, int] = {}
+        return (
+            np.array(epoch_column, dtype=np.float64),
+            # None (unrated) becomes NaN
+            np.array(intensity_column, dtype=np.float64),
+            np.fromiter((codes.setdefault(mood, len(codes)) for mood in mood_column), dtype=np.int64, count=len(mood_column)),
+            list(codes),
+        )
+
+    async def get_advanced_analytics(self, db: AsyncSession, user_id: int, days: int = 365) -> Dict[str, Any]:
+        """Rolling averages, volatility, percentiles, weekday profile, trend and per-mood intensity"""
+        end_day = datetime.utcnow().date()
+        start_day = end_day - timedelta(days=days)
+        epoch_days, intensity, mood_codes, mood_labels = await self.load(db, user_id, start_day)
+        return compute_mood_timeseries(epoch_days, intensity, mood_codes, mood_labels, start_day, end_day)
+
+
+# Global mood time-series service instance
+mood_timeseries_service = MoodTimeseriesService()
@@ -0,0 +1,99 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, List, NamedTuple, Optional
+
+from sqlalchemy import String, and_, asc, desc, or_, type_coerce
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+
+class InvalidCursor(ValueError):
+    """A pagination cursor could not be decoded"""
+
+
+class KeysetPage(NamedTuple):
+    """One page of rows, newest first, with opaque cursors to its neighbours"""
+    items: List[Any]
+    next_cursor: Optional[str]
+    prev_cursor: Optional[str]
+
+
+class _Position(NamedTuple):
+    key: Any
+    id: int
+    backward: bool
+
+
+def encode_cursor(key: Any, row_id: int, backward: bool = False) -> str:
+    """Opaque cursor for the row at (key, id); ``backward`` pages towards newer rows"""
+    if isinstance(key, datetime):
+        key = key.isoformat()
+    payload = json.dumps({"k": key, "i": row_id, "b": int(backward)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, text_keys: bool) -> _Position:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        key = payload["k"] if text_keys else datetime.fromisoformat(payload["k"])
+        return _Position(key=key, id=int(payload["i"]), backward=bool(payload.get("b")))
+    except (binascii.Error, UnicodeError, ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor("Invalid cursor") from e
+
+
+async def keyset_paginate(
+    db: AsyncSession,
+    query: Select,
+    model: Any,
+    limit: int,
+    cursor: Optional[str] = None
+) -> KeysetPage:
+    """Page through ``query`` newest first on (created_at, id) without OFFSET
+
+    The cursor predicate is a range on created_at, so it is served by the
+    (user_id, created_at) indexes and costs the same on every page.
+    """
+    # SQLite keeps DATETIME as text, and rows written by CURRENT_TIMESTAMP have no
+    # microseconds while bound values always do. Compare the stored text so the
+    # cursor predicate agrees with ORDER BY.
+    text_keys = db.bind.dialect.name == "sqlite"
+    created_at = type_coerce(model.created_at, String) if text_keys else model.created_at
+
+    position = decode_cursor(cursor, text_keys) if cursor else None
+    backward = position is not None and position.backward
+
+    query = query.add_columns(created_at.label("sort_key"))
+    if position is not None and backward:
+        query = query.where(and_(
+            created_at >= position.key,
+            or_(created_at > position.key, model.id > position.id)
+        )).order_by(asc(created_at), asc(model.id))
+    elif position is not None:
+        query = query.where(and_(
+            created_at <= position.key,
+            or_(created_at < position.key, model.id < position.id)
+        )).order_by(desc(created_at), desc(model.id))
+    else:
+        query = query.order_by(desc(created_at), desc(model.id))
+
+    rows = (await db.execute(query.limit(limit + 1))).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if backward:
+        rows.reverse()
+
+    if not rows:
+        return KeysetPage(items=[], next_cursor=None, prev_cursor=None)
+
+    first, last = rows[0], rows[-1]
+    if backward:
+        next_cursor = encode_cursor(last.sort_key, last[0].id)
+        prev_cursor = encode_cursor(first.sort_key, first[0].id, backward=True) if has_more else None
+    else:
+        next_cursor = encode_cursor(last.sort_key, last[0].id) if has_more else None
+        prev_cursor = encode_cursor(first.sort_key, first[0].id, backward=True) if position is not None else None
+
+    return KeysetPage(items=[row[0] for row in rows], next_cursor=next_cursor, prev_cursor=prev_cursor)
@@ -0,0 +1,284 @@
+import json
+import logging
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MAX_STEPS = 8
+MAX_TIPS = 5
+
+_DECODER = json.JSONDecoder()
+# The decoder recurses per nesting level, so absurdly deep output raises RecursionError
+_DECODE_ERRORS = (json.JSONDecodeError, RecursionError)
+_STEPS_ARRAY_RE = re.compile(r'"steps"\s*:\s*\[')
+_TRAILING_COMMA_RE = re.compile(r",(?=\s*[}\]])")
+# A brace, a whole string literal (escapes included) or an unterminated quote
+_TOKEN_RE = re.compile(r'[{}]|"[^"\\]*(?:\\.[^"\\]*)*"|"', re.DOTALL)
+# str.replace per quote is much faster than str.translate on non-ASCII text
+_SMART_QUOTES = (("“", '"'), ("”", '"'), ("‘", "'"), ("’", "'"))
+_NUMBER_RE = re.compile(r"\d+")
+_NUMBERED_LINE_RE = re.compile(r"^(?:step\s*)?\d{1,2}[.):]\s*(.+)$", re.IGNORECASE)
+_BULLET_LINE_RE = re.compile(r"^[-*•]\s+(.+)$")
+
+# Keys LLMs use when they return steps or tips as objects instead of strings
+_ITEM_TEXT_KEYS = ("step", "description", "text", "action", "title", "tip", "name")
+
+
+def validate_payload(data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Validate and normalize routine fields in one pass; None if there are no usable steps
+
+    Steps and tips may be strings or objects with a text field; duration may
+    be a number or a string such as "15 minutes". Unusable values are dropped
+    rather than failing the whole response.
+    """
+    steps = _item_list(data.get("steps"), MAX_STEPS)
+    if not steps:
+        return None
+    return {
+        "steps": steps,
+        "duration": _duration(data.get("duration")),
+        "tips": _item_list(data.get("tips"), MAX_TIPS),
+    }
+
+
+def _item_list(value: Any, limit: int) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, (str, dict)):
+        value = [value]
+    if not isinstance(value, list):
+        return []
+    items = []
+    for item in value:
+        text = _item_text(item)
+        if text:
+            items.append(text)
+            if len(items) == limit:
+                break
+    return items
+
+
+def _duration(value: Any) -> Optional[int]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        minutes = int(value)
+    elif isinstance(value, str):
+        match = _NUMBER_RE.search(value)
+        if not match:
+            return None
+        minutes = int(match.group())
+    else:
+        return None
+    return minutes if 1 <= minutes <= 240 else None
+
+
+def _item_text(item: Any) -> Optional[str]:
+    """Plain text for a step or tip given as a string, number or object"""
+    if isinstance(item, str):
+        return item.strip() or None
+    if isinstance(item, (int, float)) and not isinstance(item, bool):
+        return str(item)
+    if isinstance(item, dict):
+        for key in _ITEM_TEXT_KEYS:
+            value = item.get(key)
+            if isinstance(value, str) and value.strip():
+                return value.strip()
+    return None
+
+
+def extract_json_object(text: str, required_key: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Return the first complete JSON object embedded in ``text``
+
+    The first "{" is tried with JSONDecoder.raw_decode, which stops at the
+    end of the first complete value, so surrounding prose, code fences and a
+    second object are ignored. Otherwise one scan finds the "{...}" spans
+    that balance (outside strings) and only those are decoded, so truncated
+    output costs one pass rather than a decode attempt per "{". Objects
+    nested in a decoded value are searched for ``required_key`` before
+    moving past it. If nothing decodes strictly, decoding is retried from
+    the first "{" after repairing trailing commas and typographic quotes.
+    """
+    first_start = text.find("{")
+    if first_start == -1:
+        return None
+
+    first_object = None
+    scan_from = first_start
+    try:
+        value, scan_from = _DECODER.raw_decode(text, first_start)
+    except _DECODE_ERRORS:
+        if text.find("{", first_start + 1) == -1:
+            # A lone "{" that failed to decode: only the repair below can help
+            scan_from = len(text)
+    else:
+        found = _find_object(value, required_key)
+        if found is not None:
+            return found
+        first_object = value
+
+    resume = scan_from
+    for start, end in _balanced_spans(text, scan_from):
+        if start < resume or start == first_start:
+            # Inside an object already decoded, or the first "{" that failed above
+            continue
+        try:
+            value, _ = _DECODER.raw_decode(text, start)
+        except _DECODE_ERRORS:
+            # Objects nested in this span come next
+            continue
+        found = _find_object(value, required_key)
+        if found is not None:
+            return found
+        if first_object is None:
+            first_object = value
+        resume = end
+
+    if first_object is not None:
+        return first_object
+
+    repaired = text[first_start:]
+    for smart, plain in _SMART_QUOTES:
+        repaired = repaired.replace(smart, plain)
+    repaired = _TRAILING_COMMA_RE.sub("", repaired)
+    try:
+        value, _ = _DECODER.raw_decode(repaired)
+    except _DECODE_ERRORS:
+        return None
+    return value if isinstance(value, dict) else None
+
+
+def _balanced_spans(text: str, pos: int) -> List[Tuple[int, int]]:
+    """(start, end) of each "{...}" from ``pos`` that balances, in order of start
+
+    Quotes only delimit strings inside braces, so apostrophes and quotes in
+    surrounding prose are ignored.
+    """
+    spans = []
+    open_braces: List[int] = []
+    while True:
+        start = text.find("{", pos)
+        if start == -1:
+            break
+        open_braces.append(start)
+        for token in _TOKEN_RE.finditer(text, start + 1):
+            char = text[token.start()]
+            if char == "{":
+                open_braces.append(token.start())
+            elif char == "}":
+                spans.append((open_braces.pop(), token.end()))
+                if not open_braces:
+                    pos = token.end()
+                    break
+            elif token.end() - token.start() == 1:
+                # Unterminated string: nothing after it can balance
+                return sorted(spans)
+        else:
+            break
+    return sorted(spans)
+
+
+def _find_object(value: Any, required_key: Optional[str]) -> Optional[Dict[str, Any]]:
+    """The first object in document order within ``value`` (itself included) that has ``required_key``"""
+    if required_key is None:
+        return value if isinstance(value, dict) else None
+    pending = [value]
+    while pending:
+        item = pending.pop()
+        if isinstance(item, dict):
+            if required_key in item:
+                return item
+            pending.extend(reversed(list(item.values())))
+        elif isinstance(item, list):
+            pending.extend(reversed(item))
+    return None
+
+
+def parse_text_response(text: str) -> Dict[str, Any]:
+    """Parse a plain-text response with numbered or bulleted steps"""
+    steps = []
+    tips = []
+
+    for line in text.splitlines():
+        line = line.strip().strip("*_")
+        if not line:
+            continue
+        if line.lower().startswith("tip"):
+            tips.append(line.split(":", 1)[1].strip() if ":" in line else line)
+            continue
+        match = _NUMBERED_LINE_RE.match(line) or _BULLET_LINE_RE.match(line)
+        if match:
+            steps.append(match.group(1).strip())
+
+    return {
+        "steps": steps[:5],  # Limit to 5 steps
+        "tips": tips[:3],    # Limit to 3 tips
+        "duration": None
+    }
+
+
+def parse_routine_response(text: str) -> Dict[str, Any]:
+    """Extract and validate {"steps", "duration", "tips"} from an LLM response"""
+    data = extract_json_object(text, required_key="steps")
+    if data is not None:
+        payload = validate_payload(data)
+        if payload is not None:
+            return payload
+    elif "{" in text:
+        # Truncated JSON (e.g. max_tokens reached): keep the steps that did complete
+        parser = StepStreamParser()
+        steps = parser.feed(text)
+        if steps:
+            return {"steps": steps[:MAX_STEPS], "duration": None, "tips": []}
+
+    logger.warning("Failed to parse AI response as JSON, falling back to text parsing")
+    return parse_text_response(text)
+
+
+class StepStreamParser:
+    """Incrementally extract completed entries of the "steps" array from streamed JSON"""
+
+    def __init__(self):
+        self.buffer = ""
+        self._pos: Optional[int] = None
+        self._done = False
+
+    def feed(self, chunk: str) -> List[str]:
+        """Add streamed text and return any steps completed by it"""
+        self.buffer += chunk
+        if self._done:
+            return []
+
+        if self._pos is None:
+            match = _STEPS_ARRAY_RE.search(self.buffer)
+            if not match:
+                return []
+            self._pos = match.end()
+
+        steps = []
+        buffer = self.buffer
+        while True:
+            i = self._pos
+            while i < len(buffer) and buffer[i] in " \t\r\n,":
+                i += 1
+            self._pos = i
+
+            if i >= len(buffer):
+                break
+            if buffer[i] != '"':
+                # End of the array (or something we don't stream); the final parse handles it
+                self._done = True
+                break
+
+            try:
+                step, end = _DECODER.raw_decode(buffer, i)
+            except json.JSONDecodeError:
+                # String literal not complete yet
+                break
+
+            if isinstance(step, str) and step.strip():
+                steps.append(step.strip())
+            self._pos = end
+
+        return steps
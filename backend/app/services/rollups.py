@@ -0,0 +1,303 @@
+import logging
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Float, Integer, case, cast, delete, func, literal, literal_column, select, union_all
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+from app.models.database import (
+    MoodEntry, Routine, RoutineCompletion, User, UserDailyCount, UserDailyStats
+)
+
+logger = logging.getLogger(__name__)
+
+STAT_COLUMNS = (
+    "routines_created", "completions", "effectiveness_sum", "effectiveness_count",
+    "mood_entries", "intensity_sum", "intensity_count",
+)
+
+# user_daily_counts facets
+ROUTINE_MOOD = "routine_mood"
+ROUTINE_CATEGORY = "routine_category"
+MOOD = "mood"
+
+
+def to_utc_naive(value: datetime) -> datetime:
+    """A timestamp as stored: naive UTC, like datetime.utcnow()"""
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _day(value: Optional[datetime]) -> date:
+    # Rows are bucketed by UTC day
+    return to_utc_naive(value).date() if value is not None else datetime.utcnow().date()
+
+
+class RollupDelta:
+    """Changes to apply to the daily rollups, accumulated per (user, day)"""
+
+    def __init__(self):
+        self.stats: Dict[Tuple[int, date], Dict[str, int]] = defaultdict(lambda: dict.fromkeys(STAT_COLUMNS, 0))
+        self.counts: Dict[Tuple[int, str, date, str], int] = defaultdict(int)
+
+    def add_routine(self, user_id: int, created_at: Optional[datetime], mood: str, category: Optional[str], sign: int = 1) -> "RollupDelta":
+        day = _day(created_at)
+        self.stats[(user_id, day)]["routines_created"] += sign
+        self.counts[(user_id, ROUTINE_MOOD, day, mood)] += sign
+        if category is not None:
+            self.counts[(user_id, ROUTINE_CATEGORY, day, category)] += sign
+        return self
+
+    def add_completion(self, user_id: int, completed_at: Optional[datetime], effectiveness: Optional[int], sign: int = 1) -> "RollupDelta":
+        stats = self.stats[(user_id, _day(completed_at))]
+        stats["completions"] += sign
+        if effectiveness is not None:
+            stats["effectiveness_sum"] += sign * effectiveness
+            stats["effectiveness_count"] += sign
+        return self
+
+    def add_mood(self, user_id: int, created_at: Optional[datetime], mood: str, intensity: Optional[int], sign: int = 1) -> "RollupDelta":
+        day = _day(created_at)
+        stats = self.stats[(user_id, day)]
+        stats["mood_entries"] += sign
+        if intensity is not None:
+            stats["intensity_sum"] += sign * intensity
+            stats["intensity_count"] += sign
+        self.counts[(user_id, MOOD, day, mood)] += sign
+        return self
+
+    def __bool__(self) -> bool:
+        return bool(self.stats) or bool(self.counts)
+
+
+def iso_week(dialect: str, day):
+    """ISO 8601 week key of a date column, e.g. 2026-W42"""
+    if dialect == "postgresql":
+        return func.to_char(day, 'IYYY-"W"IW')
+    # The Thursday of a date's ISO week carries its ISO year and week number
+    thursday = func.date(day, "-3 days", "weekday 4")
+    week = (cast(func.strftime("%j", thursday), Integer) - 1) // 7 + 1
+    return func.printf("%s-W%02d", func.strftime("%Y", thursday), week)
+
+
+def dialect_insert(db: AsyncSession):
+    """The session dialect's insert(), which supports ON CONFLICT upserts"""
+    dialect = db.bind.dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert
+    if dialect == "sqlite":
+        return sqlite.insert
+    raise NotImplementedError(f"INSERT ... ON CONFLICT is not available for {dialect}")
+
+
+class RollupService:
+    """Maintains and reads the per-user daily rollups behind the analytics endpoints"""
+
+    async def apply(self, db: AsyncSession, delta: RollupDelta) -> None:
+        """Add ``delta`` to the rollups in the caller's transaction (commit is up to the caller)"""
+        if not delta:
+            return
+        insert = dialect_insert(db)
+
+        stats_rows = [
+            {"user_id": user_id, "day": day, **values}
+            for (user_id, day), values in delta.stats.items()
+            if any(values.values())
+        ]
+        if stats_rows:
+            stmt = insert(UserDailyStats)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["user_id", "day"],
+                set_={name: getattr(UserDailyStats, name) + getattr(stmt.excluded, name) for name in STAT_COLUMNS}
+            )
+            await db.execute(stmt, stats_rows)
+
+        count_rows = [
+            {"user_id": user_id, "facet": facet, "day": day, "value": value, "count": count}
+            for (user_id, facet, day, value), count in delta.counts.items()
+            if count
+        ]
+        if count_rows:
+            stmt = insert(UserDailyCount)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["user_id", "facet", "day", "value"],
+                set_={"count": UserDailyCount.count + stmt.excluded.count}
+            )
+            await db.execute(stmt, count_rows)
+
+    def totals_query(self, user_id: int, start_days: Sequence[date], end_day: Optional[date] = None) -> Select:
+        """One row of summed stats for each window [start_day, end_day], from one scan of the longest
+
+        Columns are labelled ``<stat>_<i>`` for the i-th start day; zeros when empty.
+        """
+        day = UserDailyStats.day
+        query = select(*(
+            func.coalesce(func.sum(case((day >= start_day, getattr(UserDailyStats, name)), else_=0)), 0).label(f"{name}_{i}")
+            for i, start_day in enumerate(start_days)
+            for name in STAT_COLUMNS
+        )).where(
+            UserDailyStats.user_id == user_id,
+            day >= min(start_days)
+        )
+        if end_day is not None:
+            query = query.where(day <= end_day)
+        return query
+
+    def window_totals(self, row, windows: int) -> List[Dict[str, int]]:
+        """Split a totals_query row into one stats dict per window"""
+        mapping = row._mapping
+        return [{name: int(mapping[f"{name}_{i}"]) for name in STAT_COLUMNS} for i in range(windows)]
+
+    async def totals(self, db: AsyncSession, user_id: int, start_day: date, end_day: Optional[date] = None) -> Dict[str, int]:
+        """Summed stats over [start_day, end_day]"""
+        row = (await db.execute(self.totals_query(user_id, [start_day], end_day))).one()
+        return self.window_totals(row, 1)[0]
+
+    async def daily(self, db: AsyncSession, user_id: int, start_day: date, end_day: Optional[date] = None) -> List[UserDailyStats]:
+        """Daily stats rows over [start_day, end_day], oldest first"""
+        query = select(UserDailyStats).where(
+            UserDailyStats.user_id == user_id,
+            UserDailyStats.day >= start_day
+        )
+        if end_day is not None:
+            query = query.where(UserDailyStats.day <= end_day)
+        result = await db.execute(query.order_by(UserDailyStats.day))
+        return list(result.scalars().all())
+
+    async def intensity_averages(
+        self, db: AsyncSession, user_id: int, start_days: Sequence[date], end_day: Optional[date] = None, by: str = "day"
+    ) -> List[Dict[str, float]]:
+        """Average mood intensity per day (YYYY-MM-DD) or ISO week (YYYY-Www) for each window, oldest first
+
+        Grouped in the database in one scan of the longest window, so the
+        result holds one number per bucket and window. A week cut by a
+        window's start only averages the days inside the window.
+        """
+        dialect = db.bind.dialect.name
+        day = UserDailyStats.day
+        if by == "day":
+            bucket = func.to_char(day, "YYYY-MM-DD") if dialect == "postgresql" else func.date(day)
+        elif by == "week":
+            bucket = iso_week(dialect, day)
+        else:
+            raise ValueError(f"Unknown intensity bucket: {by}")
+        averages = [
+            cast(func.sum(case((day >= start_day, UserDailyStats.intensity_sum), else_=0)), Float)
+            / func.nullif(func.sum(case((day >= start_day, UserDailyStats.intensity_count), else_=0)), 0)
+            for start_day in start_days
+        ]
+        query = select(bucket.label("bucket"), *averages).where(
+            UserDailyStats.user_id == user_id,
+            day >= min(start_days)
+        )
+        if end_day is not None:
+            query = query.where(day <= end_day)
+        result = await db.execute(
+            query.group_by(bucket).having(func.sum(UserDailyStats.intensity_count) > 0).order_by(bucket)
+        )
+
+        windows: List[Dict[str, float]] = [{} for _ in start_days]
+        for key, *values in result:
+            for window, average in zip(windows, values):
+                if average is not None:
+                    window[key] = average
+        return windows
+
+    async def counts(self, db: AsyncSession, user_id: int, facet: str, start_day: date, end_day: Optional[date] = None) -> Dict[str, int]:
+        """Value -> count for one facet over [start_day, end_day]"""
+        return (await self.facet_counts(db, user_id, [facet], [start_day], end_day))[0][facet]
+
+    async def facet_counts(
+        self, db: AsyncSession, user_id: int, facets: Sequence[str], start_days: Sequence[date],
+        end_day: Optional[date] = None
+    ) -> List[Dict[str, Dict[str, int]]]:
+        """Facet -> value -> count for several facets and windows, from one grouped scan of the longest window"""
+        day = UserDailyCount.day
+        totals = [func.sum(case((day >= start_day, UserDailyCount.count), else_=0)) for start_day in start_days]
+        query = select(UserDailyCount.facet, UserDailyCount.value, *totals).where(
+            UserDailyCount.user_id == user_id,
+            UserDailyCount.facet.in_(facets),
+            day >= min(start_days)
+        )
+        if end_day is not None:
+            query = query.where(day <= end_day)
+        result = await db.execute(
+            query.group_by(UserDailyCount.facet, UserDailyCount.value).having(func.sum(UserDailyCount.count) > 0)
+        )
+
+        windows: List[Dict[str, Dict[str, int]]] = [{facet: {} for facet in facets} for _ in start_days]
+        for facet, value, *counts in result:
+            for window, count in zip(windows, counts):
+                if count > 0:
+                    window[facet][value] = int(count)
+        return windows
+
+    async def rebuild(self, db: AsyncSession, user_id: Optional[int] = None) -> int:
+        """Recompute the rollups from the raw rows for one user, or every user
+
+        Each user is rebuilt and committed separately. Returns the number of
+        users rebuilt.
+        """
+        if user_id is not None:
+            user_ids = [user_id]
+        else:
+            user_ids = list((await db.execute(select(User.id).order_by(User.id))).scalars().all())
+
+        for uid in user_ids:
+            await db.execute(delete(UserDailyStats).where(UserDailyStats.user_id == uid))
+            await db.execute(delete(UserDailyCount).where(UserDailyCount.user_id == uid))
+            await self._insert_from_raw(db, uid)
+            await db.commit()
+        logger.info(f"Rebuilt daily rollups for {len(user_ids)} user(s)")
+        return len(user_ids)
+
+    async def _insert_from_raw(self, db: AsyncSession, user_id: int) -> None:
+        zero = literal_column("0")
+        routine_day = func.date(Routine.created_at)
+        completion_day = func.date(RoutineCompletion.completed_at)
+        mood_day = func.date(MoodEntry.created_at)
+
+        activity = union_all(
+            select(
+                routine_day.label("day"), func.count().label("routines_created"), zero.label("completions"),
+                zero.label("effectiveness_sum"), zero.label("effectiveness_count"), zero.label("mood_entries"),
+                zero.label("intensity_sum"), zero.label("intensity_count")
+            ).where(Routine.user_id == user_id, Routine.created_at.isnot(None)).group_by(routine_day),
+            select(
+                completion_day, zero, func.count(), func.coalesce(func.sum(RoutineCompletion.effectiveness_rating), 0),
+                func.count(RoutineCompletion.effectiveness_rating), zero, zero, zero
+            ).where(RoutineCompletion.user_id == user_id, RoutineCompletion.completed_at.isnot(None)).group_by(completion_day),
+            select(
+                mood_day, zero, zero, zero, zero, func.count(),
+                func.coalesce(func.sum(MoodEntry.intensity), 0), func.count(MoodEntry.intensity)
+            ).where(MoodEntry.user_id == user_id, MoodEntry.created_at.isnot(None)).group_by(mood_day),
+        ).subquery()
+
+        stats_query = select(
+            literal(user_id), activity.c.day,
+            *(func.sum(activity.c[name]) for name in STAT_COLUMNS)
+        ).group_by(activity.c.day)
+        await db.execute(UserDailyStats.__table__.insert().from_select(["user_id", "day", *STAT_COLUMNS], stats_query))
+
+        facets = (
+            (ROUTINE_MOOD, Routine.mood, Routine, routine_day, Routine.created_at),
+            (ROUTINE_CATEGORY, Routine.category, Routine, routine_day, Routine.created_at),
+            (MOOD, MoodEntry.mood, MoodEntry, mood_day, MoodEntry.created_at),
+        )
+        for facet, column, model, day, timestamp in facets:
+            counts_query = select(
+                literal(user_id), literal(facet), day, column, func.count()
+            ).where(
+                model.user_id == user_id, timestamp.isnot(None), column.isnot(None)
+            ).group_by(day, column)
+            await db.execute(UserDailyCount.__table__.insert().from_select(
+                ["user_id", "facet", "day", "value", "count"], counts_query
+            ))
+
+
+# Global rollup service instance
+rollup_service = RollupService()
@@ -0,0 +1,139 @@
+import logging
+import re
+from typing import Dict, List, Optional
+
+from sqlalchemy import Integer, and_, cast, column, desc, func, inspect, literal, literal_column, or_, select, table
+from sqlalchemy.dialects.postgresql import REGCONFIG
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+from app.config import settings
+from app.models.database import Routine
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"\w+")
+# Longer queries are cut to this many terms
+MAX_TERMS = 16
+# bm25 column weights in routines_fts order (user_id, mood, goal, context,
+# steps), matching the A/A/C/B tsvector weights on Postgres
+FTS5_WEIGHTS = (0.0, 3.0, 3.0, 1.0, 2.0)
+TEXT_SEARCH_CONFIG = "english"
+
+_routines_fts = table("routines_fts", column("rowid", Integer))
+_fts = literal_column("routines_fts")
+_search_vector = literal_column("routines.search_vector")
+
+
+def fts5_match_expression(user_id: int, query: str) -> Optional[str]:
+    """FTS5 query for the user's routines containing every word of the query
+
+    Words are quoted so FTS5 syntax in user input is inert; the last one is
+    a prefix so partially typed words still match.
+    """
+    terms = _TOKEN_RE.findall(query.lower())[:MAX_TERMS]
+    if not terms:
+        return None
+    words = " ".join(f'"{term}"' for term in terms) + "*"
+    return f'user_id : "{user_id}" AND ({words})'
+
+
+class RoutineSearch:
+    """Ranked full-text search over a user's routines
+
+    Uses the index created by migration 0005: FTS5 with bm25 on SQLite,
+    the weighted tsvector column with ts_rank_cd on Postgres. Only the
+    newest SEARCH_RANK_CANDIDATES matches are ranked, which bounds the cost
+    of very common words. Databases without the index fall back to a
+    substring match ordered by recency.
+    """
+
+    def __init__(self):
+        self._backends: Dict[str, str] = {}
+
+    async def search(self, db: AsyncSession, user_id: int, query: str, limit: int = 10) -> List[Routine]:
+        """Best-matching routines first"""
+        backend = await self._backend(db)
+        if backend == "fts5":
+            statement = self._fts5_query(user_id, query)
+        elif backend == "tsvector":
+            statement = self._tsvector_query(user_id, query)
+        else:
+            statement = self.substring_query(user_id, query)
+        if statement is None:
+            return []
+
+        result = await db.execute(statement.limit(limit))
+        return list(result.scalars().all())
+
+    def _fts5_query(self, user_id: int, query: str) -> Optional[Select]:
+        expression = fts5_match_expression(user_id, query)
+        if expression is None:
+            return None
+        # Descending rowid is answered by the index and stops at the limit
+        candidates = (
+            select(Routine.id, func.bm25(_fts, *FTS5_WEIGHTS).label("score"))
+            .join(_routines_fts, _routines_fts.c.rowid == Routine.id)
+            .where(Routine.user_id == user_id, _fts.op("MATCH")(expression))
+            .order_by(_routines_fts.c.rowid.desc())
+            .limit(settings.SEARCH_RANK_CANDIDATES)
+            .subquery("candidates")
+        )
+        return (
+            select(Routine)
+            .join(candidates, candidates.c.id == Routine.id)
+            .order_by(candidates.c.score, desc(Routine.created_at))
+        )
+
+    def _tsvector_query(self, user_id: int, query: str) -> Select:
+        tsquery = func.websearch_to_tsquery(cast(literal(TEXT_SEARCH_CONFIG), REGCONFIG), query)
+        candidates = (
+            select(Routine.id, func.ts_rank_cd(_search_vector, tsquery).label("score"))
+            .where(Routine.user_id == user_id, _search_vector.op("@@")(tsquery))
+            .order_by(Routine.id.desc())
+            .limit(settings.SEARCH_RANK_CANDIDATES)
+            .subquery("candidates")
+        )
+        return (
+            select(Routine)
+            .join(candidates, candidates.c.id == Routine.id)
+            .order_by(candidates.c.score.desc(), desc(Routine.created_at))
+        )
+
+    def substring_query(self, user_id: int, query: str) -> Select:
+        """Unindexed case-insensitive substring match on goal, mood and context"""
+        pattern = f"%{query}%"
+        return select(Routine).where(
+            and_(
+                Routine.user_id == user_id,
+                or_(Routine.goal.ilike(pattern), Routine.mood.ilike(pattern), Routine.context.ilike(pattern))
+            )
+        ).order_by(desc(Routine.created_at))
+
+    async def _backend(self, db: AsyncSession) -> str:
+        """Which index the session's database has, looked up once per database"""
+        key = str(db.bind.url)
+        backend = self._backends.get(key)
+        if backend is None:
+            connection = await db.connection()
+            backend = await connection.run_sync(self._detect_backend)
+            self._backends[key] = backend
+            if backend == "substring":
+                logger.info("No full-text index on routines; search uses substring matching")
+        return backend
+
+    @staticmethod
+    def _detect_backend(connection) -> str:
+        inspector = inspect(connection)
+        dialect = connection.dialect.name
+        if dialect == "sqlite" and inspector.has_table("routines_fts"):
+            return "fts5"
+        if dialect == "postgresql" and any(
+            col["name"] == "search_vector" for col in inspector.get_columns("routines")
+        ):
+            return "tsvector"
+        return "substring"
+
+
+# Global routine search instance
+routine_search = RoutineSearch()
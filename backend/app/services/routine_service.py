@@ -1,15 +1,23 @@
-from typing import List, Optional, Dict, Any
-from sqlalchemy.orm import Session
-from sqlalchemy import desc, func, and_
+from typing import List, Optional, Dict, Any, AsyncIterator, Sequence, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import desc, and_, select
 from datetime import datetime, timedelta
+import asyncio
 import logging
 
-from app.models.database import Routine, RoutineCompletion, User, RoutineTemplate
+from app.config import settings
+from app.core.timing import analytics_timings
+from app.models.database import Routine, RoutineCompletion, User, RoutineTemplate, UserStats, AsyncSessionLocal
 from app.models.schemas import (
     RoutineCreate, RoutineResponse, RoutineCompletion as RoutineCompletionSchema,
-    AnalyticsResponse, GenerateRequest
+    AnalyticsResponse, GenerateRequest, GenerateResponse
 )
-from app.services.ai_service import AIService
+from app.services.ai_service import ai_service
+from app.services.pagination import KeysetPage, keyset_paginate
+from app.services.rollups import ROUTINE_CATEGORY, ROUTINE_MOOD, RollupDelta, rollup_service
+from app.services.routine_search import routine_search
+from app.services.streaks import streak_service
+from app.services.template_index import template_index
 
 logger = logging.getLogger(__name__)
 
@@ -18,18 +26,139 @@ class RoutineService:
     """Service for managing self-care routines"""
     
     def __init__(self):
-        self.ai_service = AIService()
+        self.ai_service = ai_service
     
-    async def generate_routine(self, db: Session, request: GenerateRequest, user_id: int) -> RoutineResponse:
+    async def generate_routine(self, db: AsyncSession, request: GenerateRequest, user_id: int) -> RoutineResponse:
         """Generate a new routine using AI"""
-        # Get user history for context
-        user_history = self.get_user_history_for_ai(db, user_id)
+        # Serve a confident template match without calling the model
+        ai_response = self._match_template(request)
         
-        # Generate routine using AI
-        ai_response = await self.ai_service.generate_routine(request, user_history)
+        if ai_response is None:
+            # Get user history for context
+            user_history = await self.get_user_history_for_ai(db, user_id)
+            
+            # Return the connection to the pool while the model runs
+            await db.commit()
+            
+            # Generate routine using AI
+            ai_response = await self.ai_service.generate_routine(request, user_history)
         
         # Create routine in database
-        routine_data = RoutineCreate(
+        routine = await self.create_routine(db, self._routine_data(request, ai_response), user_id)
+        
+        return self._routine_response(routine)
+    
+    async def generate_routines_batch(
+        self,
+        db: AsyncSession,
+        requests: List[GenerateRequest],
+        user_id: int
+    ) -> List[Tuple[Optional[RoutineResponse], Optional[str]]]:
+        """Generate several routines concurrently and save them in one transaction
+        
+        Returns a (routine, error) pair per request, in request order.
+        """
+        # History is shared by every item, so fetch it once
+        user_history = await self.get_user_history_for_ai(db, user_id)
+        await db.commit()  # release the connection during generation
+        semaphore = asyncio.Semaphore(settings.ROUTINE_BATCH_CONCURRENCY)
+        
+        async def generate(request: GenerateRequest) -> GenerateResponse:
+            template_response = self._match_template(request)
+            if template_response is not None:
+                return template_response
+            async with semaphore:
+                return await self.ai_service.generate_routine(request, user_history)
+        
+        ai_responses = await asyncio.gather(
+            *(generate(request) for request in requests),
+            return_exceptions=True
+        )
+        
+        results: List[Tuple[Optional[RoutineResponse], Optional[str]]] = [(None, None)] * len(requests)
+        pending: List[Tuple[int, Routine]] = []
+        created_at = datetime.utcnow()
+        
+        for index, (request, ai_response) in enumerate(zip(requests, ai_responses)):
+            if isinstance(ai_response, BaseException):
+                logger.error(f"Error generating batch item {index}: {str(ai_response)}")
+                results[index] = (None, "Failed to generate routine")
+                continue
+            
+            routine = self._build_routine(self._routine_data(request, ai_response), user_id)
+            routine.created_at = created_at
+            pending.append((index, routine))
+        
+        if not pending:
+            return results
+        
+        try:
+            db.add_all([routine for _, routine in pending])
+            delta = RollupDelta()
+            for _, routine in pending:
+                delta.add_routine(user_id, routine.created_at, routine.mood, routine.category)
+            await rollup_service.apply(db, delta)
+            await db.flush()
+            responses = [(index, self._routine_response(routine)) for index, routine in pending]
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Error saving batch routines: {str(e)}")
+            for index, _ in pending:
+                results[index] = (None, "Failed to save routine")
+            return results
+        
+        for index, response in responses:
+            results[index] = (response, None)
+        
+        return results
+    
+    async def stream_routine(
+        self,
+        request: GenerateRequest,
+        user_id: int,
+        user_history: List[Dict[str, Any]]
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """Stream AI generation events, then persist the routine once the stream ends"""
+        async for event, data in self.ai_service.stream_routine(request, user_history):
+            if event != "complete":
+                yield event, data
+                continue
+            
+            # The request-scoped session is closed before a streamed body runs
+            async with AsyncSessionLocal() as db:
+                try:
+                    routine = await self.create_routine(db, self._routine_data(request, data), user_id)
+                    response = self._routine_response(routine)
+                except Exception as e:
+                    logger.error(f"Error saving streamed routine: {str(e)}")
+                    response = None
+            
+            if response is None:
+                yield "error", {"detail": "Failed to save routine"}
+            else:
+                yield "routine", response.model_dump(mode="json")
+    
+    def _match_template(self, request: GenerateRequest) -> Optional[GenerateResponse]:
+        """Template-based response when a template fits well enough, otherwise None"""
+        if not settings.TEMPLATE_FAST_PATH_ENABLED:
+            return None
+        
+        match = template_index.match(request.mood, request.goal)
+        if match is None:
+            return None
+        
+        opted_in = request.prefer_template or settings.TEMPLATE_PREFER
+        threshold = settings.TEMPLATE_MIN_CONFIDENCE if opted_in else settings.TEMPLATE_HIGH_CONFIDENCE
+        if match.confidence < threshold:
+            return None
+        
+        template_index.record_usage(match.template.id)
+        return match.to_response(request.duration)
+    
+    def _routine_data(self, request: GenerateRequest, ai_response: GenerateResponse) -> RoutineCreate:
+        """Build routine creation data from a request and its AI response"""
+        return RoutineCreate(
             mood=request.mood,
             goal=request.goal,
             steps=ai_response.steps,
@@ -38,9 +167,9 @@ class RoutineService:
             category=ai_response.category,
             priority=ai_response.priority
         )
-        
-        routine = self.create_routine(db, routine_data, user_id)
-        
+    
+    def _routine_response(self, routine: Routine) -> RoutineResponse:
+        """Convert a routine row to its response model"""
         return RoutineResponse(
             id=routine.id,
             mood=routine.mood,
@@ -56,9 +185,22 @@ class RoutineService:
             completion_count=routine.completion_count
         )
     
-    def create_routine(self, db: Session, routine_data: RoutineCreate, user_id: int) -> Routine:
+    async def create_routine(self, db: AsyncSession, routine_data: RoutineCreate, user_id: int) -> Routine:
         """Create a new routine"""
-        db_routine = Routine(
+        db_routine = self._build_routine(routine_data, user_id)
+        
+        db.add(db_routine)
+        await rollup_service.apply(db, RollupDelta().add_routine(
+            user_id, db_routine.created_at, db_routine.mood, db_routine.category
+        ))
+        await db.commit()
+        await db.refresh(db_routine)
+        
+        return db_routine
+    
+    def _build_routine(self, routine_data: RoutineCreate, user_id: int) -> Routine:
+        """Build an unsaved routine row"""
+        return Routine(
             user_id=user_id,
             mood=routine_data.mood,
             goal=routine_data.goal,
@@ -67,35 +209,39 @@ class RoutineService:
             duration=routine_data.duration,
             category=routine_data.category,
             priority=routine_data.priority,
-            is_template=routine_data.is_template
+            is_template=routine_data.is_template,
+            completion_count=0,
+            created_at=datetime.utcnow()  # set here so the daily rollup gets the same day
         )
-        
-        db.add(db_routine)
-        db.commit()
-        db.refresh(db_routine)
-        
-        return db_routine
     
-    def get_routine(self, db: Session, routine_id: int, user_id: int) -> Optional[Routine]:
+    async def get_routine(self, db: AsyncSession, routine_id: int, user_id: int) -> Optional[Routine]:
         """Get a specific routine"""
-        return db.query(Routine).filter(
+        result = await db.execute(select(Routine).where(
             and_(Routine.id == routine_id, Routine.user_id == user_id)
-        ).first()
+        ))
+        return result.scalars().first()
     
-    def get_user_routines(self, db: Session, user_id: int, limit: int = 10, offset: int = 0) -> List[Routine]:
+    async def get_user_routines(self, db: AsyncSession, user_id: int, limit: int = 10, offset: int = 0) -> List[Routine]:
         """Get user's routines"""
-        return db.query(Routine).filter(
+        result = await db.execute(select(Routine).where(
             Routine.user_id == user_id
-        ).order_by(desc(Routine.created_at)).offset(offset).limit(limit).all()
+        ).order_by(desc(Routine.created_at)).offset(offset).limit(limit))
+        return list(result.scalars().all())
     
-    def get_routine_templates(self, db: Session, limit: int = 20) -> List[RoutineTemplate]:
+    async def get_user_routines_page(self, db: AsyncSession, user_id: int, limit: int = 10, cursor: Optional[str] = None) -> KeysetPage:
+        """Get user's routines newest first, paginated by cursor"""
+        query = select(Routine).where(Routine.user_id == user_id)
+        return await keyset_paginate(db, query, Routine, limit, cursor)
+    
+    async def get_routine_templates(self, db: AsyncSession, limit: int = 20) -> List[RoutineTemplate]:
         """Get available routine templates"""
-        return db.query(RoutineTemplate).order_by(desc(RoutineTemplate.usage_count)).limit(limit).all()
+        result = await db.execute(select(RoutineTemplate).order_by(desc(RoutineTemplate.usage_count)).limit(limit))
+        return list(result.scalars().all())
     
-    def complete_routine(self, db: Session, completion_data: RoutineCompletionSchema, user_id: int) -> RoutineCompletion:
+    async def complete_routine(self, db: AsyncSession, completion_data: RoutineCompletionSchema, user_id: int) -> RoutineCompletion:
         """Record routine completion"""
         # Get the routine
-        routine = self.get_routine(db, completion_data.routine_id, user_id)
+        routine = await self.get_routine(db, completion_data.routine_id, user_id)
         if not routine:
             raise ValueError("Routine not found")
         
@@ -106,7 +252,8 @@ class RoutineService:
             completed_steps=completion_data.completed_steps,
             mood_after=completion_data.mood_after,
             effectiveness_rating=completion_data.effectiveness_rating,
-            notes=completion_data.notes
+            notes=completion_data.notes,
+            completed_at=datetime.utcnow()
         )
         
         db.add(db_completion)
@@ -114,122 +261,103 @@ class RoutineService:
         # Update routine completion count
         routine.completion_count += 1
         
-        db.commit()
-        db.refresh(db_completion)
+        await rollup_service.apply(db, RollupDelta().add_completion(
+            user_id, db_completion.completed_at, db_completion.effectiveness_rating
+        ))
+        await streak_service.record_completion(db, user_id, db_completion.completed_at)
+        
+        await db.commit()
+        await db.refresh(db_completion)
         
         return db_completion
     
-    def get_user_analytics(self, db: Session, user_id: int, days: int = 30) -> AnalyticsResponse:
-        """Get user analytics"""
-        # Date range
-        start_date = datetime.utcnow() - timedelta(days=days)
-        
-        # Total routines
-        total_routines = db.query(Routine).filter(
-            and_(Routine.user_id == user_id, Routine.created_at >= start_date)
-        ).count()
-        
-        # Completed routines
-        completed_routines = db.query(RoutineCompletion).filter(
-            and_(RoutineCompletion.user_id == user_id, RoutineCompletion.completed_at >= start_date)
-        ).count()
-        
-        # Completion rate
-        completion_rate = (completed_routines / total_routines) if total_routines > 0 else 0
-        
-        # Most common mood
-        mood_query = db.query(
-            Routine.mood, func.count(Routine.mood).label('count')
-        ).filter(
-            and_(Routine.user_id == user_id, Routine.created_at >= start_date)
-        ).group_by(Routine.mood).order_by(desc('count')).first()
-        
-        most_common_mood = mood_query.mood if mood_query else None
+    async def get_user_analytics(self, db: AsyncSession, user_id: int, days: int = 30) -> AnalyticsResponse:
+        """Get user analytics in two queries: totals with streaks, then the mood and category histograms"""
+        return (await self.get_user_analytics_windows(db, user_id, [days]))[days]
+    
+    async def get_user_analytics_windows(
+        self, db: AsyncSession, user_id: int, windows: Sequence[int]
+    ) -> Dict[int, AnalyticsResponse]:
+        """Get user analytics for several trailing windows (in days) at once
         
-        # Average effectiveness
-        avg_effectiveness = db.query(
-            func.avg(RoutineCompletion.effectiveness_rating)
-        ).filter(
-            and_(RoutineCompletion.user_id == user_id, RoutineCompletion.completed_at >= start_date)
-        ).scalar()
+        Still two queries whatever the number of windows: each scans the
+        longest window once and sums every window side by side.
+        """
+        windows = sorted(set(windows))
+        # Date range, in whole UTC days from the daily rollups
+        start_days = [(datetime.utcnow() - timedelta(days=days)).date() for days in windows]
         
-        # Calculate streaks
-        current_streak, longest_streak = self.calculate_streaks(db, user_id)
+        with analytics_timings.section("routine_analytics.totals"):
+            totals = rollup_service.totals_query(user_id, start_days).subquery("totals")
+            row = (await db.execute(
+                select(totals, UserStats.current_streak, UserStats.longest_streak, UserStats.last_completion_day)
+                .select_from(totals)
+                .outerjoin(UserStats, UserStats.user_id == user_id)
+            )).one()
         
-        # Mood trends
-        mood_trends = self.get_mood_trends(db, user_id, days)
+        with analytics_timings.section("routine_analytics.histograms"):
+            histograms = await rollup_service.facet_counts(
+                db, user_id, [ROUTINE_MOOD, ROUTINE_CATEGORY], start_days
+            )
         
-        # Category distribution
-        category_dist = self.get_category_distribution(db, user_id, days)
+        # Streaks are all-time, shared by every window
+        current_streak = streak_service.current_streak(row)
+        longest_streak = row.longest_streak or 0
         
-        return AnalyticsResponse(
-            total_routines=total_routines,
-            completed_routines=completed_routines,
-            completion_rate=round(completion_rate, 2),
-            most_common_mood=most_common_mood,
-            average_effectiveness=round(avg_effectiveness, 2) if avg_effectiveness else None,
-            current_streak=current_streak,
-            longest_streak=longest_streak,
-            mood_trends=mood_trends,
-            category_distribution=category_dist
-        )
+        analytics = {}
+        for days, stats, counts in zip(windows, rollup_service.window_totals(row, len(windows)), histograms):
+            total_routines = stats["routines_created"]
+            completed_routines = stats["completions"]
+            
+            # Completion rate
+            completion_rate = (completed_routines / total_routines) if total_routines > 0 else 0
+            
+            # Average effectiveness
+            avg_effectiveness = (
+                stats["effectiveness_sum"] / stats["effectiveness_count"]
+                if stats["effectiveness_count"] else None
+            )
+            
+            # Mood trends and most common mood
+            mood_trends = counts[ROUTINE_MOOD]
+            most_common_mood = max(mood_trends.items(), key=lambda x: x[1])[0] if mood_trends else None
+            
+            analytics[days] = AnalyticsResponse(
+                total_routines=total_routines,
+                completed_routines=completed_routines,
+                completion_rate=round(completion_rate, 2),
+                most_common_mood=most_common_mood,
+                average_effectiveness=round(avg_effectiveness, 2) if avg_effectiveness else None,
+                current_streak=current_streak,
+                longest_streak=longest_streak,
+                mood_trends=mood_trends,
+                category_distribution=counts[ROUTINE_CATEGORY]
+            )
+        return analytics
     
-    def calculate_streaks(self, db: Session, user_id: int) -> tuple[int, int]:
+    async def calculate_streaks(self, db: AsyncSession, user_id: int) -> tuple[int, int]:
         """Calculate current and longest streaks"""
-        # Get completion dates
-        completions = db.query(RoutineCompletion).filter(
-            RoutineCompletion.user_id == user_id
-        ).order_by(desc(RoutineCompletion.completed_at)).all()
-        
-        if not completions:
-            return 0, 0
-        
-        # Calculate current streak
-        current_streak = 0
-        current_date = datetime.utcnow().date()
-        
-        for completion in completions:
-            completion_date = completion.completed_at.date()
-            if completion_date == current_date or completion_date == current_date - timedelta(days=1):
-                current_streak += 1
-                current_date = completion_date - timedelta(days=1)
-            else:
-                break
-        
-        # Calculate longest streak (simplified)
-        longest_streak = current_streak  # TODO: Implement proper longest streak calculation
-        
-        return current_streak, longest_streak
+        # Maintained on user_stats by complete_routine; one row, no completion scan
+        return await streak_service.get_streaks(db, user_id)
     
-    def get_mood_trends(self, db: Session, user_id: int, days: int = 30) -> Dict[str, int]:
+    async def get_mood_trends(self, db: AsyncSession, user_id: int, days: int = 30) -> Dict[str, int]:
         """Get mood trends over time"""
-        start_date = datetime.utcnow() - timedelta(days=days)
-        
-        mood_counts = db.query(
-            Routine.mood, func.count(Routine.mood).label('count')
-        ).filter(
-            and_(Routine.user_id == user_id, Routine.created_at >= start_date)
-        ).group_by(Routine.mood).all()
-        
-        return {mood: count for mood, count in mood_counts}
+        start_day = (datetime.utcnow() - timedelta(days=days)).date()
+        with analytics_timings.section("routine_analytics.mood_trends"):
+            return await rollup_service.counts(db, user_id, ROUTINE_MOOD, start_day)
     
-    def get_category_distribution(self, db: Session, user_id: int, days: int = 30) -> Dict[str, int]:
+    async def get_category_distribution(self, db: AsyncSession, user_id: int, days: int = 30) -> Dict[str, int]:
         """Get category distribution"""
-        start_date = datetime.utcnow() - timedelta(days=days)
-        
-        category_counts = db.query(
-            Routine.category, func.count(Routine.category).label('count')
-        ).filter(
-            and_(Routine.user_id == user_id, Routine.created_at >= start_date, Routine.category.isnot(None))
-        ).group_by(Routine.category).all()
-        
-        return {category: count for category, count in category_counts}
+        start_day = (datetime.utcnow() - timedelta(days=days)).date()
+        with analytics_timings.section("routine_analytics.category_distribution"):
+            return await rollup_service.counts(db, user_id, ROUTINE_CATEGORY, start_day)
     
-    def get_user_history_for_ai(self, db: Session, user_id: int, limit: int = 5) -> List[Dict[str, Any]]:
+    async def get_user_history_for_ai(self, db: AsyncSession, user_id: int, limit: int = 5) -> List[Dict[str, Any]]:
         """Get user routine history for AI context"""
-        recent_routines = db.query(Routine).filter(
+        result = await db.execute(select(Routine).where(
             Routine.user_id == user_id
-        ).order_by(desc(Routine.created_at)).limit(limit).all()
+        ).order_by(desc(Routine.created_at)).limit(limit))
+        recent_routines = result.scalars().all()
         
         return [
             {
@@ -241,21 +369,17 @@ class RoutineService:
             for routine in recent_routines
         ]
     
-    def search_routines(self, db: Session, user_id: int, query: str, limit: int = 10) -> List[Routine]:
-        """Search user's routines"""
-        return db.query(Routine).filter(
-            and_(
-                Routine.user_id == user_id,
-                Routine.goal.ilike(f"%{query}%") | Routine.mood.ilike(f"%{query}%")
-            )
-        ).order_by(desc(Routine.created_at)).limit(limit).all()
+    async def search_routines(self, db: AsyncSession, user_id: int, query: str, limit: int = 10) -> List[Routine]:
+        """Search user's routines, best matches first"""
+        return await routine_search.search(db, user_id, query, limit)
     
-    def get_recommendations(self, db: Session, user_id: int, limit: int = 5) -> List[Routine]:
+    async def get_recommendations(self, db: AsyncSession, user_id: int, limit: int = 5) -> List[Routine]:
         """Get personalized routine recommendations"""
         # Get user's most successful routines (high completion count)
-        return db.query(Routine).filter(
+        result = await db.execute(select(Routine).where(
             Routine.user_id == user_id
-        ).order_by(desc(Routine.completion_count)).limit(limit).all()
+        ).order_by(desc(Routine.completion_count)).limit(limit))
+        return list(result.scalars().all())
 
 
 # Global routine service instance
@@ -0,0 +1,159 @@
+import logging
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import Date, Integer, cast, func, literal, select, type_coerce
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+from app.models.database import RoutineCompletion, UserStats
+from app.services.rollups import dialect_insert
+
+logger = logging.getLogger(__name__)
+
+STREAK_COLUMNS = ("user_id", "current_streak", "longest_streak", "last_completion_day")
+
+
+class StreakService:
+    """Completion streaks kept on user_stats, with a set-based recomputation from raw completions"""
+
+    async def record_completion(self, db: AsyncSession, user_id: int, completed_at: datetime) -> None:
+        """Advance the user's streaks for a new completion, in the caller's transaction
+
+        Touches one user_stats row. A completion dated before the last
+        completion day can't be applied incrementally, so the user is
+        recomputed instead.
+        """
+        # Make sure the row exists, then lock it (FOR UPDATE on Postgres)
+        await db.execute(
+            dialect_insert(db)(UserStats)
+            .values(user_id=user_id, current_streak=0, longest_streak=0)
+            .on_conflict_do_nothing(index_elements=["user_id"])
+        )
+        stats = (await db.execute(
+            select(UserStats).where(UserStats.user_id == user_id).with_for_update()
+        )).scalar_one()
+
+        day = completed_at.date()
+        last = stats.last_completion_day
+        if last is not None and day < last:
+            await db.flush()
+            await self.recompute(db, user_id)
+            await db.refresh(stats)
+            return
+
+        if last is None or day > last + timedelta(days=1):
+            stats.current_streak = 1
+        elif day == last + timedelta(days=1):
+            stats.current_streak += 1
+        stats.longest_streak = max(stats.longest_streak, stats.current_streak)
+        stats.last_completion_day = day
+
+    def current_streak(self, stats: Optional[Any], today: Optional[date] = None) -> int:
+        """The stored streak while it is still alive (last completion today or yesterday), else 0
+
+        ``stats`` is a UserStats or any row with its current_streak and
+        last_completion_day columns.
+        """
+        if stats is None or stats.last_completion_day is None:
+            return 0
+        today = today or datetime.utcnow().date()
+        return stats.current_streak if stats.last_completion_day >= today - timedelta(days=1) else 0
+
+    async def get_streaks(self, db: AsyncSession, user_id: int) -> Tuple[int, int]:
+        """(current, longest) streak from the user's stats row"""
+        stats = await db.get(UserStats, user_id)
+        return self.current_streak(stats), stats.longest_streak if stats else 0
+
+    def streaks_query(self, dialect: str, user_id: Optional[int] = None) -> Select:
+        """Streaks computed from raw completions with gaps-and-islands
+
+        Each distinct completion day minus its row number is constant within
+        a run of consecutive days, so grouping by it yields the runs. The
+        latest run is the current streak, the longest run the longest streak.
+        """
+        day = type_coerce(func.date(RoutineCompletion.completed_at), Date)
+        days = select(RoutineCompletion.user_id, day.label("day")).where(
+            RoutineCompletion.completed_at.isnot(None)
+        ).distinct()
+        if user_id is not None:
+            days = days.where(RoutineCompletion.user_id == user_id)
+        days = days.subquery("days")
+
+        if dialect == "postgresql":
+            day_number = days.c.day - literal(date(1970, 1, 1), Date)
+        else:
+            day_number = cast(func.julianday(days.c.day), Integer)
+        islands = select(
+            days.c.user_id,
+            days.c.day,
+            (day_number - func.row_number().over(partition_by=days.c.user_id, order_by=days.c.day)).label("island")
+        ).subquery("islands")
+
+        runs = select(
+            islands.c.user_id,
+            func.count().label("length"),
+            type_coerce(func.max(islands.c.day), Date).label("end_day")
+        ).group_by(islands.c.user_id, islands.c.island).subquery("runs")
+
+        ranked = select(
+            runs.c.user_id,
+            runs.c.length,
+            runs.c.end_day,
+            func.max(runs.c.length).over(partition_by=runs.c.user_id).label("longest"),
+            func.row_number().over(partition_by=runs.c.user_id, order_by=runs.c.end_day.desc()).label("recency")
+        ).subquery("ranked")
+
+        return select(
+            ranked.c.user_id,
+            ranked.c.length.label("current_streak"),
+            ranked.c.longest.label("longest_streak"),
+            ranked.c.end_day.label("last_completion_day")
+        ).where(ranked.c.recency == 1)
+
+    async def recompute(self, db: AsyncSession, user_id: Optional[int] = None) -> None:
+        """Replace stored streaks for one user, or everyone, with the set-based result
+
+        Runs in the caller's transaction; the caller commits.
+        """
+        table = UserStats.__table__
+        clear = table.delete()
+        if user_id is not None:
+            clear = clear.where(table.c.user_id == user_id)
+        await db.execute(clear)
+        await db.execute(table.insert().from_select(
+            list(STREAK_COLUMNS), self.streaks_query(db.bind.dialect.name, user_id)
+        ))
+
+    async def verify(self, db: AsyncSession, user_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Users whose stored streaks differ from a recomputation from raw completions"""
+        computed = {
+            row.user_id: row
+            for row in (await db.execute(self.streaks_query(db.bind.dialect.name, user_id))).all()
+        }
+        query = select(UserStats)
+        if user_id is not None:
+            query = query.where(UserStats.user_id == user_id)
+        stored = {stats.user_id: stats for stats in (await db.execute(query)).scalars().all()}
+
+        mismatches = []
+        for uid in sorted(set(computed) | set(stored)):
+            expected = computed.get(uid)
+            actual = stored.get(uid)
+            expected_values = (
+                (expected.current_streak, expected.longest_streak, expected.last_completion_day)
+                if expected else (0, 0, None)
+            )
+            actual_values = (
+                (actual.current_streak, actual.longest_streak, actual.last_completion_day)
+                if actual else (0, 0, None)
+            )
+            if expected_values != actual_values:
+                mismatches.append({"user_id": uid, "stored": actual_values, "computed": expected_values})
+        if mismatches:
+            logger.warning(f"Streaks differ from completions for {len(mismatches)} user(s)")
+        return mismatches
+
+
+# Global streak service instance
+streak_service = StreakService()
@@ -0,0 +1,216 @@
+import asyncio
+import logging
+import re
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.database import RoutineTemplate, AsyncSessionLocal
+from app.models.schemas import GenerateResponse, PriorityLevel, RoutineCategory
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r"[a-z]+")
+_STOPWORDS = {
+    "a", "an", "and", "am", "be", "bit", "feel", "feeling", "for", "get", "i", "im",
+    "in", "is", "it", "me", "my", "of", "on", "really", "so", "some", "the", "to",
+    "very", "want", "with",
+}
+_SUFFIXES = ("ation", "ness", "ing", "ed", "ly", "s")
+
+
+def normalize_tokens(text: str) -> Set[str]:
+    """Lowercase words with stopwords removed and common suffixes stripped"""
+    tokens = set()
+    for word in _WORD_RE.findall(text.lower()):
+        if word in _STOPWORDS:
+            continue
+        for suffix in _SUFFIXES:
+            if word.endswith(suffix) and len(word) - len(suffix) >= 4:
+                word = word[:-len(suffix)]
+                break
+        tokens.add(word)
+    return tokens
+
+
+class IndexedTemplate:
+    """Snapshot of a routine template held by the index"""
+
+    __slots__ = ("id", "name", "steps", "category", "priority", "estimated_duration", "mood_tokens", "goal_tokens", "usage_count")
+
+    def __init__(self, template: RoutineTemplate):
+        self.id = template.id
+        self.name = template.name
+        self.steps = list(template.steps or [])
+        self.category = RoutineCategory(template.category)
+        self.priority = PriorityLevel(template.priority)
+        self.estimated_duration = template.estimated_duration
+        self.mood_tokens = _tag_tokens(template.mood_tags)
+        self.goal_tokens = _tag_tokens(template.goal_tags)
+        self.usage_count = template.usage_count or 0
+
+
+class TemplateMatch:
+    """Best template for a request and how well it fits (0-1)"""
+
+    __slots__ = ("template", "confidence")
+
+    def __init__(self, template: IndexedTemplate, confidence: float):
+        self.template = template
+        self.confidence = confidence
+
+    def to_response(self, duration: Optional[int] = None) -> GenerateResponse:
+        return GenerateResponse(
+            steps=list(self.template.steps),
+            estimated_duration=duration or self.template.estimated_duration,
+            category=self.template.category,
+            priority=self.template.priority,
+            tips=[]
+        )
+
+
+def _tag_tokens(tags: Optional[Iterable[str]]) -> Set[str]:
+    tokens: Set[str] = set()
+    for tag in tags or []:
+        tokens |= normalize_tokens(str(tag))
+    return tokens
+
+
+class TemplateIndex:
+    """In-memory inverted index from normalized mood/goal tokens to routine templates"""
+
+    def __init__(self):
+        self._templates: Dict[int, IndexedTemplate] = {}
+        self._mood_index: Dict[str, Set[int]] = {}
+        self._goal_index: Dict[str, Set[int]] = {}
+        self._signature: Optional[Tuple[Any, Any]] = None
+        self._pending_usage: Dict[int, int] = defaultdict(int)
+        self.lookups = 0
+        self.served = 0
+
+    async def load(self, db: AsyncSession) -> None:
+        """Rebuild the index from the routine_templates table"""
+        templates: Dict[int, IndexedTemplate] = {}
+        mood_index: Dict[str, Set[int]] = defaultdict(set)
+        goal_index: Dict[str, Set[int]] = defaultdict(set)
+
+        result = await db.execute(select(RoutineTemplate))
+        for row in result.scalars():
+            try:
+                template = IndexedTemplate(row)
+            except ValueError as e:
+                logger.warning(f"Skipping routine template {row.id}: {str(e)}")
+                continue
+            if not template.steps:
+                continue
+
+            templates[template.id] = template
+            for token in template.mood_tokens:
+                mood_index[token].add(template.id)
+            for token in template.goal_tokens:
+                goal_index[token].add(template.id)
+
+        # Swap in the new index in one step so readers never see a partial build
+        self._templates, self._mood_index, self._goal_index = templates, dict(mood_index), dict(goal_index)
+        self._signature = await self._current_signature(db)
+        logger.info(f"Loaded {len(templates)} routine templates into the template index")
+
+    async def refresh_if_changed(self, db: AsyncSession) -> bool:
+        """Reload when templates were added, removed or edited"""
+        if await self._current_signature(db) == self._signature:
+            return False
+        await self.load(db)
+        return True
+
+    async def _current_signature(self, db: AsyncSession) -> Tuple[Any, Any]:
+        result = await db.execute(select(func.count(RoutineTemplate.id), func.max(RoutineTemplate.updated_at)))
+        return tuple(result.one())
+
+    def match(self, mood: str, goal: str) -> Optional[TemplateMatch]:
+        """Best matching template, scored by the share of mood and goal tokens it covers"""
+        self.lookups += 1
+        mood_tokens = normalize_tokens(mood)
+        goal_tokens = normalize_tokens(goal)
+        if not mood_tokens or not goal_tokens or not self._templates:
+            return None
+
+        mood_hits = self._count_hits(mood_tokens, self._mood_index)
+        goal_hits = self._count_hits(goal_tokens, self._goal_index)
+
+        best: Optional[TemplateMatch] = None
+        for template_id in mood_hits.keys() | goal_hits.keys():
+            confidence = 0.5 * mood_hits.get(template_id, 0) / len(mood_tokens) \
+                + 0.5 * goal_hits.get(template_id, 0) / len(goal_tokens)
+            template = self._templates[template_id]
+            if best is None or (confidence, template.usage_count) > (best.confidence, best.template.usage_count):
+                best = TemplateMatch(template, confidence)
+
+        return best
+
+    def _count_hits(self, tokens: Set[str], index: Dict[str, Set[int]]) -> Dict[int, int]:
+        hits: Dict[int, int] = defaultdict(int)
+        for token in tokens:
+            for template_id in index.get(token, ()):
+                hits[template_id] += 1
+        return hits
+
+    def record_usage(self, template_id: int) -> None:
+        """Count a template use; persisted by the next flush_usage"""
+        self.served += 1
+        self._pending_usage[template_id] += 1
+        template = self._templates.get(template_id)
+        if template is not None:
+            template.usage_count += 1
+
+    async def flush_usage(self, db: AsyncSession) -> int:
+        """Write pending usage_count increments back in a single batched UPDATE"""
+        if not self._pending_usage:
+            return 0
+
+        pending, self._pending_usage = self._pending_usage, defaultdict(int)
+        params = [{"template_id": template_id, "uses": uses} for template_id, uses in pending.items()]
+        try:
+            # Core executemany: one statement for all templates. Keep updated_at
+            # as is so usage bumps don't look like template edits.
+            table = RoutineTemplate.__table__
+            await db.execute(
+                update(table)
+                .where(table.c.id == bindparam("template_id"))
+                .values(usage_count=table.c.usage_count + bindparam("uses"), updated_at=table.c.updated_at),
+                params
+            )
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            for template_id, uses in pending.items():
+                self._pending_usage[template_id] += uses
+            logger.error(f"Error flushing template usage counts: {str(e)}")
+            return 0
+
+        return sum(pending.values())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "templates": len(self._templates),
+            "lookups": self.lookups,
+            "served": self.served,
+            "pending_usage_updates": sum(self._pending_usage.values()),
+        }
+
+
+async def run_maintenance(index: "TemplateIndex", interval: float) -> None:
+    """Periodically pick up template changes and flush usage counts"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with AsyncSessionLocal() as db:
+                await index.refresh_if_changed(db)
+                await index.flush_usage(db)
+        except Exception as e:
+            logger.error(f"Template index maintenance failed: {str(e)}")
+
+
+# Global template index instance
+template_index = TemplateIndex()
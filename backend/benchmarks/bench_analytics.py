@@ -0,0 +1,133 @@
+"""Analytics latency by history size
+
+Seeds users with a year of history at different entry counts, then times the
+routine and mood analytics for a 365-day window. Analytics read the daily
+rollups, so latency should stay about the same as the entry count grows.
+Each size also times the 7/30/90/365-day windows fetched together and one
+by one, and lists the analytics_timings sections that were hit.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_analytics
+"""
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+_db_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'analytics.db')}"
+
+from sqlalchemy import insert, text  # noqa: E402
+
+from app.core.timing import analytics_timings  # noqa: E402
+from app.models.database import (  # noqa: E402
+    AsyncSessionLocal, MoodEntry, Routine, RoutineCompletion, SessionLocal, User,
+    async_engine, create_tables, engine
+)
+from app.services.mood_service import mood_service  # noqa: E402
+from app.services.rollups import rollup_service  # noqa: E402
+from app.services.routine_service import routine_service  # noqa: E402
+from app.services.streaks import streak_service  # noqa: E402
+
+# Mood entries per user; each user also gets a tenth as many routines and completions
+SIZES = (1000, 10000, 100000)
+RUNS = 20
+MOODS = ["Calm", "Tired", "Stressed", "Happy", "Anxious"]
+CATEGORIES = ["Mindfulness", "Physical", "Relaxation"]
+WINDOWS = (7, 30, 90, 365)
+
+
+def seed() -> None:
+    rng = random.Random(0)
+    now = datetime.utcnow()
+    db = SessionLocal()
+    try:
+        for user_id, size in enumerate(SIZES, start=1):
+            db.add(User(id=user_id, email=f"user{user_id}@example.com", name="User", hashed_password="x"))
+            db.flush()
+            routines = size // 10
+            db.execute(insert(Routine), [
+                {
+                    "id": user_id * 1000000 + i, "user_id": user_id, "mood": rng.choice(MOODS), "goal": "relax",
+                    "steps": ["Breathe"], "category": rng.choice(CATEGORIES), "priority": "medium",
+                    "completion_count": 1, "created_at": now - timedelta(minutes=rng.randint(0, 525600)),
+                }
+                for i in range(routines)
+            ])
+            db.execute(insert(RoutineCompletion), [
+                {
+                    "user_id": user_id, "routine_id": user_id * 1000000 + i, "completed_steps": [0],
+                    "effectiveness_rating": rng.randint(1, 5),
+                    "completed_at": now - timedelta(minutes=rng.randint(0, 525600)),
+                }
+                for i in range(routines)
+            ])
+            for offset in range(0, size, 10000):
+                db.execute(insert(MoodEntry), [
+                    {
+                        "user_id": user_id, "mood": rng.choice(MOODS), "intensity": rng.randint(1, 10),
+                        "created_at": now - timedelta(minutes=rng.randint(0, 525600)),
+                    }
+                    for _ in range(min(10000, size - offset))
+                ])
+        db.commit()
+    finally:
+        db.close()
+
+
+async def timed(call) -> float:
+    samples = []
+    for _ in range(RUNS):
+        async with AsyncSessionLocal() as db:
+            started = time.perf_counter()
+            await call(db)
+            samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+async def run() -> None:
+    try:
+        async with AsyncSessionLocal() as db:
+            await rollup_service.rebuild(db)
+            await streak_service.recompute(db)
+            await db.commit()
+        print(f"365-day analytics, median of {RUNS} runs, with the average per timed section")
+        analytics_timings.reset()
+        for user_id, size in enumerate(SIZES, start=1):
+            routine_ms = await timed(lambda db: routine_service.get_user_analytics(db, user_id, 365))
+            mood_ms = await timed(lambda db: mood_service.get_mood_analytics(db, user_id, 365))
+            print(f"  {size:>7,} mood entries: routine analytics {routine_ms:7.2f} ms, mood analytics {mood_ms:7.2f} ms")
+            for name, section in analytics_timings.stats().items():
+                print(f"      {name:<40} avg {section['avg_ms']:7.2f} ms")
+
+            async def one_by_one(db):
+                for days in WINDOWS:
+                    await routine_service.get_user_analytics(db, user_id, days)
+                    await mood_service.get_mood_analytics(db, user_id, days)
+
+            async def together(db):
+                await routine_service.get_user_analytics_windows(db, user_id, WINDOWS)
+                await mood_service.get_mood_analytics_windows(db, user_id, WINDOWS)
+
+            separate_ms = await timed(one_by_one)
+            together_ms = await timed(together)
+            print(f"      {len(WINDOWS)} windows: one by one {separate_ms:7.2f} ms, together {together_ms:7.2f} ms")
+            analytics_timings.reset()
+    finally:
+        await async_engine.dispose()
+
+
+def main() -> None:
+    create_tables()
+    seed()
+    with engine.connect() as connection:
+        connection.execute(text("ANALYZE"))
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Micro-benchmark: compiled mood/goal classifier vs. the original keyword scans
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_classifier
+"""
+import random
+import timeit
+
+from app.models.schemas import PriorityLevel, RoutineCategory
+from app.services.classifier import classify, classify_many, _classify
+
+MOODS = ["Stressed", "really tired", "Anxious", "Calm", "somewhat sad", "in crisis", "Happy", "sluggish", "Overwhelmed"]
+GOALS = ["relax", "write a poem", "connect with friends", "focus on work", "sleep better", "calm down", "feel less alone"]
+
+
+def legacy_classify(mood: str, goal: str):
+    """The keyword scans AIService used before the compiled matcher"""
+    mood_lower = mood.lower()
+    goal_lower = goal.lower()
+
+    if any(word in mood_lower for word in ['anxious', 'stressed', 'overwhelmed']):
+        category = RoutineCategory.MINDFULNESS
+    elif any(word in mood_lower for word in ['tired', 'low energy', 'sluggish']):
+        category = RoutineCategory.PHYSICAL
+    elif any(word in goal_lower for word in ['creative', 'art', 'write', 'music']):
+        category = RoutineCategory.CREATIVE
+    elif any(word in goal_lower for word in ['social', 'connect', 'friends', 'family']):
+        category = RoutineCategory.SOCIAL
+    elif any(word in goal_lower for word in ['relax', 'calm', 'peaceful']):
+        category = RoutineCategory.RELAXATION
+    elif any(word in goal_lower for word in ['productive', 'focus', 'work']):
+        category = RoutineCategory.PRODUCTIVITY
+    else:
+        category = RoutineCategory.EMOTIONAL
+
+    if any(word in mood_lower for word in ['crisis', 'emergency', 'urgent', 'severe']):
+        priority = PriorityLevel.URGENT
+    elif any(word in mood_lower for word in ['very', 'extremely', 'really', 'intense']):
+        priority = PriorityLevel.HIGH
+    elif any(word in mood_lower for word in ['somewhat', 'a bit', 'slightly']):
+        priority = PriorityLevel.LOW
+    else:
+        priority = PriorityLevel.MEDIUM
+
+    fallbacks = {"stressed": 1, "tired": 2, "anxious": 3}
+    fallback = next((key for key in fallbacks.keys() if key in mood_lower), "stressed")
+
+    return category, priority, fallback
+
+
+def main(rows: int = 100_000) -> None:
+    rng = random.Random(0)
+    pairs = [(rng.choice(MOODS), rng.choice(GOALS)) for _ in range(rows)]
+
+    mismatches = [pair for pair in pairs[:5000] if tuple(classify(*pair)) != legacy_classify(*pair)]
+    assert not mismatches, f"Classifier disagrees with legacy scans: {mismatches[:5]}"
+
+    uncached = _classify.__wrapped__
+    legacy = timeit.timeit(lambda: [legacy_classify(m, g) for m, g in pairs], number=1)
+    compiled = timeit.timeit(lambda: [uncached(m.lower(), g.lower()) for m, g in pairs], number=1)
+    cached = timeit.timeit(lambda: [classify(m, g) for m, g in pairs], number=1)
+    bulk = timeit.timeit(lambda: classify_many(pairs), number=1)
+
+    print(f"{rows} mood/goal pairs")
+    print(f"  legacy keyword scans      : {legacy / rows * 1e6:7.2f} us/call")
+    print(f"  compiled matcher, no memo : {compiled / rows * 1e6:7.2f} us/call ({legacy / compiled:.1f}x)")
+    print(f"  classify()                : {cached / rows * 1e6:7.2f} us/call ({legacy / cached:.1f}x)")
+    print(f"  classify_many()           : {bulk / rows * 1e6:7.2f} us/row  ({legacy / bulk:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Export memory check: peak memory must not grow with the user's history
+
+Seeds users with 10k and 100k mood entries, streams each export through
+ExportService and reports throughput and the peak Python memory (tracemalloc)
+in a second, traced run. Both peaks should be about the same.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_export
+"""
+import asyncio
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+_db_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'export.db')}"
+
+from sqlalchemy import insert  # noqa: E402
+
+from app.models.database import MoodEntry, SessionLocal, User, async_engine, create_tables  # noqa: E402
+from app.services.export_service import export_service  # noqa: E402
+
+SIZES = (10000, 100000)
+
+
+def seed() -> None:
+    start = datetime(2020, 1, 1)
+    db = SessionLocal()
+    try:
+        for user_id, size in enumerate(SIZES, start=1):
+            db.add(User(id=user_id, email=f"user{user_id}@example.com", name="User", hashed_password="x"))
+            db.flush()
+            for offset in range(0, size, 10000):
+                db.execute(insert(MoodEntry), [
+                    {
+                        "user_id": user_id, "mood": "Calm", "intensity": i % 10 + 1,
+                        "context": "after work", "triggers": ["work", "sleep"],
+                        "created_at": start + timedelta(minutes=15 * i),
+                    }
+                    for i in range(offset, min(offset + 10000, size))
+                ])
+        db.commit()
+    finally:
+        db.close()
+
+
+async def export(user_id: int, fmt: str, gzip: bool, trace: bool):
+    datasets = ["moods"] if fmt == "csv" else ["routines", "completions", "moods"]
+    total = 0
+    if trace:
+        tracemalloc.start()
+    started = time.perf_counter()
+    async for chunk in export_service.stream_export(user_id, datasets, fmt, gzip=gzip):
+        total += len(chunk)
+    elapsed = time.perf_counter() - started
+    peak = 0
+    if trace:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return total, elapsed, peak
+
+
+async def run() -> None:
+    for fmt, gzip in (("ndjson", False), ("csv", False), ("ndjson", True)):
+        print(f"{fmt}{' + gzip' if gzip else ''}:")
+        for user_id, size in enumerate(SIZES, start=1):
+            # tracemalloc slows Python down, so time and measure memory in separate runs
+            total, elapsed, _ = await export(user_id, fmt, gzip, trace=False)
+            _, _, peak = await export(user_id, fmt, gzip, trace=True)
+            print(
+                f"  {size:>7,} rows  {total / 1e6:7.1f} MB in {elapsed:5.2f}s "
+                f"({size / elapsed:9,.0f} rows/s)  peak memory {peak / 1e6:5.2f} MB"
+            )
+    await async_engine.dispose()
+
+
+def main() -> None:
+    create_tables()
+    seed()
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
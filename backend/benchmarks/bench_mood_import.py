@@ -0,0 +1,98 @@
+"""Mood import throughput: one POST-style create per row vs. the bulk import
+
+The per-row path is MoodService.create_mood_entry (add, commit, refresh per
+entry), as when a client replays its history through POST /api/v1/moods/.
+The bulk path streams NDJSON through MoodImportService in executemany batches.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_mood_import
+"""
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.db_engine import apply_sqlite_pragmas, engine_options
+from app.models.database import Base, async_database_url
+from app.models.schemas import MoodCreate
+from app.services.mood_import import mood_import_service
+from app.services.mood_service import mood_service
+
+ROWS = 5000
+CHUNK_BYTES = 64 * 1024
+
+
+def make_rows():
+    rng = random.Random(0)
+    start = datetime(2023, 1, 1)
+    return [
+        {
+            "mood": rng.choice(["Calm", "Tired", "Stressed", "Happy"]),
+            "intensity": rng.randint(1, 10),
+            "triggers": rng.choice([None, ["work"], ["sleep", "news"]]),
+            "created_at": (start + timedelta(minutes=30 * i)).isoformat(),
+        }
+        for i in range(ROWS)
+    ]
+
+
+async def fresh_engine(path: str):
+    url = async_database_url(f"sqlite:///{path}")
+    engine = create_async_engine(url, **engine_options(url, is_async=True))
+    apply_sqlite_pragmas(engine.sync_engine)
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    return engine
+
+
+async def per_row(path: str, rows) -> float:
+    engine = await fresh_engine(path)
+    sessions = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    started = time.perf_counter()
+    async with sessions() as db:
+        for row in rows:
+            await mood_service.create_mood_entry(db, 1, MoodCreate(**row))
+    elapsed = time.perf_counter() - started
+    await engine.dispose()
+    return elapsed
+
+
+async def bulk(path: str, rows) -> float:
+    engine = await fresh_engine(path)
+    sessions = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    body = "".join(json.dumps(row) + "\n" for row in rows).encode("utf-8")
+
+    async def chunks():
+        for offset in range(0, len(body), CHUNK_BYTES):
+            yield body[offset:offset + CHUNK_BYTES]
+
+    started = time.perf_counter()
+    async with sessions() as db:
+        result = await mood_import_service.import_moods(db, 1, chunks(), "ndjson")
+    elapsed = time.perf_counter() - started
+    await engine.dispose()
+    assert result["imported"] == len(rows), result
+    return elapsed
+
+
+def main() -> None:
+    directory = tempfile.mkdtemp()
+    rows = make_rows()
+    print(f"{ROWS} mood entries on SQLite (WAL, synchronous=NORMAL)")
+
+    elapsed = asyncio.run(per_row(os.path.join(directory, "per_row.db"), rows))
+    print(f"  per-row create:  {elapsed:6.2f}s  {ROWS / elapsed:10,.0f} rows/s")
+
+    bulk_elapsed = asyncio.run(bulk(os.path.join(directory, "bulk.db"), rows))
+    print(f"  bulk import:     {bulk_elapsed:6.2f}s  {ROWS / bulk_elapsed:10,.0f} rows/s")
+    print(f"  speedup:         {elapsed / bulk_elapsed:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
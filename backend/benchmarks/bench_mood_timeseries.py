@@ -0,0 +1,163 @@
+"""Advanced mood analytics at 100k entries per user
+
+Seeds one user with 100,000 mood entries over three years, then times
+loading the columns into NumPy arrays, the vectorized statistics, and the
+same statistics computed with per-entry Python loops. The loop results are
+checked against the vectorized ones.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_mood_timeseries
+"""
+import asyncio
+import math
+import os
+import random
+import statistics
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+_db_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'timeseries.db')}"
+
+from sqlalchemy import insert, select, text  # noqa: E402
+
+from app.models.database import (  # noqa: E402
+    AsyncSessionLocal, MoodEntry, SessionLocal, User, async_engine, create_tables, engine
+)
+from app.services.mood_timeseries import (  # noqa: E402
+    ROLLING_WINDOWS, WEEKDAYS, compute_mood_timeseries, mood_timeseries_service
+)
+
+ENTRIES = 100000
+HISTORY_DAYS = 3 * 365
+RUNS = 10
+MOODS = ["Calm", "Tired", "Stressed", "Happy", "Anxious"]
+
+
+def seed() -> None:
+    rng = random.Random(0)
+    now = datetime.utcnow()
+    db = SessionLocal()
+    try:
+        db.add(User(id=1, email="user1@example.com", name="User", hashed_password="x"))
+        db.flush()
+        for offset in range(0, ENTRIES, 10000):
+            db.execute(insert(MoodEntry), [
+                {
+                    "user_id": 1, "mood": rng.choice(MOODS),
+                    "intensity": None if rng.random() < 0.05 else rng.randint(1, 10),
+                    "created_at": now - timedelta(minutes=rng.randint(0, HISTORY_DAYS * 1440)),
+                }
+                for _ in range(min(10000, ENTRIES - offset))
+            ])
+        db.commit()
+    finally:
+        db.close()
+
+
+def loop_statistics(entries, start_day, end_day):
+    """Rolling averages, weekday profile, percentiles and trend with plain Python loops"""
+    daily = defaultdict(list)
+    weekday = defaultdict(list)
+    for created_at, intensity, _mood in entries:
+        day = created_at.date()
+        if intensity is None or not start_day <= day <= end_day:
+            continue
+        daily[day].append(intensity)
+        weekday[day.weekday()].append(intensity)
+
+    rolling = {}
+    for window in ROLLING_WINDOWS:
+        series = {}
+        day = start_day
+        while day <= end_day:
+            values = []
+            for back in range(window):
+                values.extend(daily.get(day - timedelta(days=back), []))
+            if values:
+                series[day.isoformat()] = round(sum(values) / len(values), 2)
+            day += timedelta(days=1)
+        rolling[f"{window}d"] = series
+
+    rated = sorted(value for values in daily.values() for value in values)
+    median = statistics.median(rated)
+
+    xs = [(day - start_day).days for day in sorted(daily)]
+    ys = [sum(daily[day]) / len(daily[day]) for day in sorted(daily)]
+    mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+    slope = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / sum((x - mean_x) ** 2 for x in xs)
+
+    return {
+        "rolling_averages": rolling,
+        "weekday": {WEEKDAYS[i]: round(sum(v) / len(v), 2) for i, v in weekday.items()},
+        "median": median,
+        "slope_per_day": round(slope, 4),
+    }
+
+
+def matches(vectorized, looped) -> bool:
+    def close(a, b):
+        return a is not None and math.isclose(a, b, abs_tol=0.011)
+
+    for window, series in looped["rolling_averages"].items():
+        got = vectorized["rolling_averages"][window]
+        if got.keys() != series.keys() or not all(close(got[k], v) for k, v in series.items()):
+            return False
+    return (
+        all(close(vectorized["weekday_profile"][name]["average_intensity"], v) for name, v in looped["weekday"].items())
+        and close(vectorized["percentiles"]["p50"], looped["median"])
+        and close(vectorized["trend"]["slope_per_day"], looped["slope_per_day"])
+    )
+
+
+def median_ms(samples) -> float:
+    return statistics.median(samples) * 1000
+
+
+async def run() -> None:
+    try:
+        end_day = datetime.utcnow().date()
+        start_day = end_day - timedelta(days=HISTORY_DAYS)
+        load, compute, total = [], [], []
+        for _ in range(RUNS):
+            async with AsyncSessionLocal() as db:
+                started = time.perf_counter()
+                arrays = await mood_timeseries_service.load(db, 1, start_day)
+                loaded = time.perf_counter()
+                result = compute_mood_timeseries(*arrays, start_day, end_day)
+                done = time.perf_counter()
+            load.append(loaded - started)
+            compute.append(done - loaded)
+            total.append(done - started)
+
+        async with AsyncSessionLocal() as db:
+            started = time.perf_counter()
+            rows = (await db.execute(
+                select(MoodEntry.created_at, MoodEntry.intensity, MoodEntry.mood).where(MoodEntry.user_id == 1)
+            )).all()
+            loop_load = time.perf_counter() - started
+        started = time.perf_counter()
+        looped = loop_statistics(rows, start_day, end_day)
+        loop_compute = time.perf_counter() - started
+
+        print(f"{result['total_entries']:,} entries over {HISTORY_DAYS} days, median of {RUNS} runs")
+        print(f"  NumPy: load {median_ms(load):8.2f} ms, compute {median_ms(compute):8.2f} ms, total {median_ms(total):8.2f} ms")
+        print(f"  Python loops (one run): load {loop_load * 1000:8.2f} ms, compute {loop_compute * 1000:8.2f} ms")
+        print(f"  Results match: {matches(result, looped)}")
+    finally:
+        await async_engine.dispose()
+
+
+def main() -> None:
+    create_tables()
+    seed()
+    with engine.connect() as connection:
+        connection.execute(text("ANALYZE"))
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Regression suite and benchmark for LLM routine response parsing
+
+Replays benchmarks/llm_response_corpus.py through the response parser,
+fails on any case that regresses, and compares parse time with the greedy
+regex parser AIService used before. Run from the backend directory:
+
+    python -m benchmarks.bench_response_parser
+"""
+import json
+import logging
+import re
+import statistics
+import sys
+import timeit
+
+from app.services.response_parser import parse_routine_response, parse_text_response
+from benchmarks.llm_response_corpus import CASES
+
+
+def legacy_parse(response: str):
+    """The greedy-regex parser AIService used before response_parser"""
+    try:
+        if response.startswith('{') and response.endswith('}'):
+            return json.loads(response)
+        json_match = re.search(r'\{.*\}', response, re.DOTALL)
+        if json_match:
+            return json.loads(json_match.group())
+        return parse_text_response(response)
+    except json.JSONDecodeError:
+        return parse_text_response(response)
+
+
+def main(repeat: int = 2000) -> int:
+    logging.disable(logging.WARNING)
+
+    failures = []
+    legacy_correct = 0
+    for case in CASES:
+        result = parse_routine_response(case["text"])
+        if result["steps"] != case["steps"] or result["duration"] != case["duration"]:
+            failures.append((case["name"], result))
+        legacy = legacy_parse(case["text"])
+        if legacy.get("steps") == case["steps"]:
+            legacy_correct += 1
+
+    print(f"{len(CASES) - len(failures)}/{len(CASES)} corpus cases parsed correctly "
+          f"(legacy parser: {legacy_correct}/{len(CASES)})")
+    for name, result in failures:
+        print(f"  FAIL {name}: {result}")
+
+    print(f"  {'case':45s} {'legacy':>9s} {'parser':>9s}  (us/response)")
+    old_times, new_times = [], []
+    for case in CASES:
+        text = case["text"]
+        old_time = timeit.timeit(lambda: legacy_parse(text), number=repeat) / repeat * 1e6
+        new_time = timeit.timeit(lambda: parse_routine_response(text), number=repeat) / repeat * 1e6
+        old_times.append(old_time)
+        new_times.append(new_time)
+        print(f"  {case['name']:45s} {old_time:9.2f} {new_time:9.2f}")
+    print(f"  {'mean':45s} {statistics.mean(old_times):9.2f} {statistics.mean(new_times):9.2f}")
+    print(f"  {'median':45s} {statistics.median(old_times):9.2f} {statistics.median(new_times):9.2f}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""Routine search latency for a user with tens of thousands of routines
+
+Seeds one heavy user plus background users, then times the full-text
+search against the old unindexed substring match for a few queries.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_search
+"""
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+_db_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'search.db')}"
+
+from sqlalchemy import insert, text  # noqa: E402
+
+from app.models.database import (  # noqa: E402
+    AsyncSessionLocal, Routine, SessionLocal, User, async_engine, create_tables, engine
+)
+from app.services.routine_search import routine_search  # noqa: E402
+
+HEAVY_USER_ROUTINES = 50000
+BACKGROUND_USERS = 20
+BACKGROUND_ROUTINES = 2500
+RUNS = 20
+QUERIES = ("breathing", "sleep better", "walk outside", "journal grateful", "before bed", "ener")
+MOODS = ["Calm", "Tired", "Stressed", "Happy", "Anxious", "Overwhelmed"]
+GOALS = ["relax", "sleep better", "more energy", "focus at work", "feel grounded", "reduce anxiety"]
+STEPS = [
+    "Take five slow deep breaths", "Box breathing for two minutes", "Walk outside for ten minutes",
+    "Write three things you are grateful for in a journal", "Stretch your shoulders and neck",
+    "Drink a glass of water", "Listen to a calming song", "Put your phone away for an hour",
+]
+CONTEXTS = [None, "after lunch", "before bed", "between meetings", "on the commute"]
+
+
+def seed() -> None:
+    rng = random.Random(0)
+    now = datetime.utcnow()
+    db = SessionLocal()
+    try:
+        sizes = [HEAVY_USER_ROUTINES] + [BACKGROUND_ROUTINES] * BACKGROUND_USERS
+        for user_id, size in enumerate(sizes, start=1):
+            db.add(User(id=user_id, email=f"user{user_id}@example.com", name="User", hashed_password="x"))
+            db.flush()
+            for offset in range(0, size, 10000):
+                db.execute(insert(Routine), [
+                    {
+                        "user_id": user_id, "mood": rng.choice(MOODS), "goal": rng.choice(GOALS),
+                        "steps": rng.sample(STEPS, 3), "context": rng.choice(CONTEXTS),
+                        "category": "Mindfulness", "priority": "medium", "completion_count": 0,
+                        "created_at": now - timedelta(minutes=rng.randint(0, 525600)),
+                    }
+                    for _ in range(min(10000, size - offset))
+                ])
+        db.commit()
+    finally:
+        db.close()
+
+
+async def timed(statement_for) -> float:
+    samples = []
+    for _ in range(RUNS):
+        async with AsyncSessionLocal() as db:
+            started = time.perf_counter()
+            await statement_for(db)
+            samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+async def run() -> None:
+    try:
+        print(f"Search for a user with {HEAVY_USER_ROUTINES:,} routines (limit 10), median of {RUNS} runs")
+        for query in QUERIES:
+            ranked_ms = await timed(lambda db: routine_search.search(db, 1, query))
+
+            async def substring(db):
+                return (await db.execute(routine_search.substring_query(1, query).limit(10))).scalars().all()
+
+            substring_ms = await timed(substring)
+            print(f"  {query!r:>22}: full-text {ranked_ms:7.2f} ms, substring {substring_ms:7.2f} ms")
+    finally:
+        await async_engine.dispose()
+
+
+def main() -> None:
+    create_tables()
+    seed()
+    with engine.connect() as connection:
+        connection.execute(text("ANALYZE"))
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Concurrent mood writes on SQLite: previous engine setup vs. the engine profile
+
+The previous setup is aiosqlite's default NullPool with SQLite defaults
+(rollback journal, synchronous=FULL, 5 s lock timeout). The profile engine adds
+a connection pool, WAL, synchronous=NORMAL and busy_timeout.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_sqlite_writes
+"""
+import asyncio
+import os
+import tempfile
+import time
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.db_engine import apply_sqlite_pragmas, engine_options
+from app.models.database import Base, async_database_url
+from app.models.schemas import MoodCreate
+from app.services.mood_service import mood_service
+
+WRITERS = 100
+WRITES_PER_WRITER = 10
+
+
+async def run(engine) -> None:
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    sessions = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    errors = 0
+
+    async def writer(user_id: int) -> None:
+        nonlocal errors
+        for _ in range(WRITES_PER_WRITER):
+            try:
+                async with sessions() as db:
+                    await mood_service.create_mood_entry(db, user_id, MoodCreate(mood="calm", intensity=5))
+            except Exception:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(writer(user_id) for user_id in range(1, WRITERS + 1)))
+    elapsed = time.perf_counter() - started
+    await engine.dispose()
+
+    writes = WRITERS * WRITES_PER_WRITER
+    print(f"  {writes - errors}/{writes} writes in {elapsed:.2f}s ({(writes - errors) / elapsed:,.0f}/s), {errors} errors")
+
+
+def main() -> None:
+    directory = tempfile.mkdtemp()
+
+    print(f"{WRITERS} concurrent writers x {WRITES_PER_WRITER} mood entries")
+    print("previous engine (NullPool, SQLite defaults):")
+    url = async_database_url(f"sqlite:///{os.path.join(directory, 'before.db')}")
+    asyncio.run(run(create_async_engine(url)))
+
+    print("engine profile (pooled, WAL, synchronous=NORMAL, busy_timeout):")
+    url = async_database_url(f"sqlite:///{os.path.join(directory, 'after.db')}")
+    engine = create_async_engine(url, **engine_options(url, is_async=True))
+    apply_sqlite_pragmas(engine.sync_engine)
+    asyncio.run(run(engine))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""Query-plan check: per-user queries must use an index, not scan the table
+
+Builds a throwaway SQLite database with the Alembic migrations, runs the hot
+per-user service methods, and EXPLAINs every statement they issue. Exits
+non-zero if any statement scans a per-user table or sorts for ORDER BY
+instead of reading an index in order. Search ranking sorts its bounded
+candidates subquery by relevance, which no index can provide, so that sort
+is allowed.
+
+Run from the backend directory:
+
+    python -m benchmarks.check_query_plans
+
+tests/test_query_plans.py runs the same check against the test database.
+"""
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Tuple
+
+if __name__ == "__main__":
+    # Run against a throwaway database; the test suite configures its own
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'plans.db')}"
+
+from sqlalchemy import event, text  # noqa: E402
+
+from app.models.database import (  # noqa: E402
+    AsyncSessionLocal, MoodEntry, Routine, RoutineCompletion, SessionLocal, User,
+    async_engine, create_tables, engine
+)
+from app.services.mood_service import mood_service  # noqa: E402
+from app.services.rollups import rollup_service  # noqa: E402
+from app.services.routine_service import routine_service  # noqa: E402
+
+PER_USER_TABLES = (
+    "routines", "routine_completions", "mood_entries", "user_daily_stats", "user_daily_counts", "user_stats"
+)
+USERS = 20
+ROWS_PER_USER = 200
+
+
+def seed(db) -> List[int]:
+    """Add USERS users with a year of history each and return their ids"""
+    rng = random.Random(0)
+    now = datetime.utcnow()
+    users = [
+        User(email=f"plans-{uuid.uuid4().hex}@example.com", name="User", hashed_password="x")
+        for _ in range(USERS)
+    ]
+    db.add_all(users)
+    db.flush()
+    user_ids = [user.id for user in users]
+
+    for user_id in user_ids:
+        for i in range(ROWS_PER_USER):
+            created_at = now - timedelta(hours=rng.randint(0, 24 * 365))
+            routine = Routine(
+                user_id=user_id, mood=rng.choice(["stressed", "tired", "calm"]), goal="relax",
+                steps=["Breathe"], category="mindfulness", priority="medium",
+                completion_count=rng.randint(0, 5), created_at=created_at
+            )
+            db.add(routine)
+            db.flush()
+            db.add(RoutineCompletion(
+                user_id=user_id, routine_id=routine.id, completed_steps=[0],
+                effectiveness_rating=rng.randint(1, 5), completed_at=created_at
+            ))
+            db.add(MoodEntry(user_id=user_id, mood="calm", intensity=rng.randint(1, 10), created_at=created_at))
+    db.commit()
+    return user_ids
+
+
+async def build_rollups() -> None:
+    try:
+        async with AsyncSessionLocal() as db:
+            await rollup_service.rebuild(db)
+    finally:
+        await async_engine.dispose()
+
+
+async def capture_statements(user_id: int):
+    """Run the hot per-user queries for one user and return the (sql, params) they issue"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        async with AsyncSessionLocal() as db:
+            await routine_service.get_user_routines(db, user_id=user_id, limit=10, offset=20)
+            page = await routine_service.get_user_routines_page(db, user_id=user_id, limit=10)
+            await routine_service.get_user_routines_page(db, user_id=user_id, limit=10, cursor=page.next_cursor)
+            await routine_service.get_user_analytics(db, user_id=user_id, days=30)
+            await routine_service.get_user_history_for_ai(db, user_id=user_id)
+            await routine_service.get_recommendations(db, user_id=user_id)
+            await routine_service.search_routines(db, user_id=user_id, query="breathing")
+            await mood_service.get_user_moods(db, user_id=user_id, start_date=datetime.utcnow() - timedelta(days=90))
+            await mood_service.get_mood_analytics(db, user_id=user_id, days=30)
+            page = await mood_service.get_user_moods_page(db, user_id=user_id, limit=20)
+            page = await mood_service.get_user_moods_page(db, user_id=user_id, limit=20, cursor=page.next_cursor)
+            await mood_service.get_user_moods_page(db, user_id=user_id, limit=20, cursor=page.prev_cursor)
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+        await async_engine.dispose()
+    return statements
+
+
+def plan_problems(statement: str, plan_details) -> list:
+    problems = []
+    for detail in plan_details:
+        for table in PER_USER_TABLES:
+            if detail == f"SCAN {table}" or detail.startswith(f"SCAN {table} "):
+                problems.append(detail)
+        if "TEMP B-TREE FOR ORDER BY" in detail and "GROUP BY" not in statement.upper() \
+                and "SCAN candidates" not in plan_details:
+            problems.append(detail)
+    return problems
+
+
+def check_plans() -> List[Tuple[str, List[str], List[str]]]:
+    """Seed the database, run the hot queries and return (statement, plan, problems) for each"""
+    create_tables()
+    db = SessionLocal()
+    try:
+        user_ids = seed(db)
+    finally:
+        db.close()
+    asyncio.run(build_rollups())
+    with engine.connect() as connection:
+        connection.execute(text("ANALYZE"))
+    statements = asyncio.run(capture_statements(user_ids[len(user_ids) // 3]))
+
+    results = []
+    with engine.connect() as connection:
+        for statement, parameters in statements:
+            rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+            details = [row[-1] for row in rows]
+            results.append((statement, details, plan_problems(statement, details)))
+    return results
+
+
+def main() -> int:
+    results = check_plans()
+    failures = 0
+    for statement, details, problems in results:
+        status = "FAIL" if problems else "ok"
+        failures += bool(problems)
+        print(f"[{status}] {' '.join(statement.split())[:110]}")
+        for detail in details:
+            print(f"         {detail}")
+
+    print(f"\n{len(results)} statements checked, {failures} without a usable index")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
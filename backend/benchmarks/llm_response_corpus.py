@@ -0,0 +1,121 @@
+"""Malformed and awkward LLM routine responses seen in practice
+
+Each case gives the raw completion text and the steps/duration the parser
+must recover. bench_response_parser.py replays these as a regression suite.
+"""
+
+STEPS = ["Take 5 deep breaths", "Stretch for 2 minutes", "Drink a glass of water"]
+
+CASES = [
+    {
+        "name": "clean_json",
+        "text": '{"steps": ["Take 5 deep breaths", "Stretch for 2 minutes", "Drink a glass of water"], "duration": 10, "tips": ["Go slow"]}',
+        "steps": STEPS,
+        "duration": 10,
+    },
+    {
+        "name": "markdown_code_fence",
+        "text": '```json\n{\n  "steps": ["Take 5 deep breaths", "Stretch for 2 minutes", "Drink a glass of water"],\n  "duration": 10,\n  "tips": []\n}\n```',
+        "steps": STEPS,
+        "duration": 10,
+    },
+    {
+        "name": "prose_before_and_after",
+        "text": 'Sure! Here is a routine for you:\n{"steps": ["Take 5 deep breaths", "Stretch for 2 minutes", "Drink a glass of water"], "duration": 10, "tips": []}\nLet me know if you want {another} one.',
+        "steps": STEPS,
+        "duration": 10,
+    },
+    {
+        "name": "two_objects",
+        "text": '{"steps": ["Take 5 deep breaths", "Stretch for 2 minutes", "Drink a glass of water"], "duration": 10, "tips": []}\n\nAlternative:\n{"steps": ["Go for a run"], "duration": 30, "tips": []}',
+        "steps": STEPS,
+        "duration": 10,
+    },
+    {
+        "name": "braces_inside_strings",
+        "text": '{"steps": ["Take 5 deep breaths", "Stretch for 2 minutes", "Drink a glass of water"], "duration": 10, "tips": ["Use the {4-7-8} pattern"]}',
+        "steps": STEPS,
+        "duration": 10,
+    },
+    {
+        "name": "trailing_commas",
+        "text": '{"steps": ["Take 5 deep breaths", "Stretch for 2 minutes", "Drink a glass of water",], "duration": 10, "tips": [],}',
+        "steps": STEPS,
+        "duration": 10,
+    },
+    {
+        "name": "smart_quotes",
+        "text": '{“steps”: [“Take 5 deep breaths”, “Stretch for 2 minutes”, “Drink a glass of water”], “duration”: 10, “tips”: []}',
+        "steps": STEPS,
+        "duration": 10,
+    },
+    {
+        "name": "duration_as_string",
+        "text": '{"steps": ["Take 5 deep breaths", "Stretch for 2 minutes", "Drink a glass of water"], "duration": "10 minutes", "tips": []}',
+        "steps": STEPS,
+        "duration": 10,
+    },
+    {
+        "name": "duration_placeholder",
+        "text": '{"steps": ["Take 5 deep breaths", "Stretch for 2 minutes", "Drink a glass of water"], "duration": "estimated_duration_in_minutes", "tips": []}',
+        "steps": STEPS,
+        "duration": None,
+    },
+    {
+        "name": "steps_as_objects",
+        "text": '{"steps": [{"step": "Take 5 deep breaths", "minutes": 1}, {"step": "Stretch for 2 minutes"}, {"description": "Drink a glass of water"}], "duration": 10}',
+        "steps": STEPS,
+        "duration": 10,
+    },
+    {
+        "name": "wrapped_in_routine_key",
+        "text": '{"routine": {"steps": ["Take 5 deep breaths", "Stretch for 2 minutes", "Drink a glass of water"], "duration": 10, "tips": []}}',
+        "steps": STEPS,
+        "duration": 10,
+    },
+    {
+        "name": "truncated_json",
+        "text": '{"steps": ["Take 5 deep breaths", "Stretch for 2 minutes", "Drink a gl',
+        "steps": STEPS[:2],
+        "duration": None,
+    },
+    {
+        "name": "numbered_text",
+        "text": "Here's your routine:\n1. Take 5 deep breaths\n2. Stretch for 2 minutes\n3. Drink a glass of water\nTip: Go slow",
+        "steps": STEPS,
+        "duration": None,
+    },
+    {
+        "name": "numbered_text_with_parens_and_bold",
+        "text": "**Routine**\n1) Take 5 deep breaths\n2) Stretch for 2 minutes\n3) Drink a glass of water",
+        "steps": STEPS,
+        "duration": None,
+    },
+    {
+        "name": "bulleted_text",
+        "text": "Try this:\n- Take 5 deep breaths\n- Stretch for 2 minutes\n- Drink a glass of water",
+        "steps": STEPS,
+        "duration": None,
+    },
+    {
+        "name": "escaped_quote_and_brace_with_trailing_comma",
+        "text": 'Plan: {"steps": ["Take 5 deep breaths", "Stretch for 2 minutes", "Drink a glass of water",], "duration": 10, "tips": ["Say \\"I am ok}\\" out loud"],}',
+        "steps": STEPS,
+        "duration": 10,
+    },
+    {
+        "name": "long_prose_then_json",
+        "text": ("I understand how you feel. " * 400) + '{"steps": ["Take 5 deep breaths", "Stretch for 2 minutes", "Drink a glass of water"], "duration": 10, "tips": []}',
+        "steps": STEPS,
+        "duration": 10,
+    },
+    {
+        # max_tokens hit deep inside long nested output: none of the 400 "{" balance
+        "name": "truncated_long_nested_output",
+        "text": '{"steps": ["Take 5 deep breaths", "Stretch for 2 minutes", "Drink a glass of water"], "plan": '
+                + '{"note": "Notice how your body feels after this step before you move on.", "next": ' * 400
+                + '{"note": "Keep go',
+        "steps": STEPS,
+        "duration": None,
+    },
+]
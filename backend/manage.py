@@ -0,0 +1,81 @@
+"""Maintenance commands
+
+Run from the backend directory:
+
+    python manage.py migrate
+    python manage.py rebuild-rollups [--user-id ID]
+    python manage.py rebuild-streaks [--user-id ID]
+    python manage.py verify-streaks [--user-id ID]
+"""
+import argparse
+import asyncio
+import sys
+
+from app.models.database import AsyncSessionLocal, async_engine, create_tables
+from app.services.rollups import rollup_service
+from app.services.streaks import streak_service
+
+
+async def rebuild_rollups(user_id=None) -> int:
+    try:
+        async with AsyncSessionLocal() as db:
+            return await rollup_service.rebuild(db, user_id)
+    finally:
+        await async_engine.dispose()
+
+
+async def rebuild_streaks(user_id=None) -> None:
+    try:
+        async with AsyncSessionLocal() as db:
+            await streak_service.recompute(db, user_id)
+            await db.commit()
+    finally:
+        await async_engine.dispose()
+
+
+async def verify_streaks(user_id=None) -> list:
+    try:
+        async with AsyncSessionLocal() as db:
+            return await streak_service.verify(db, user_id)
+    finally:
+        await async_engine.dispose()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="AI Self-Care Companion maintenance commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("migrate", help="Apply database migrations")
+
+    rebuild = commands.add_parser("rebuild-rollups", help="Recompute the daily analytics rollups from raw rows")
+    rebuild.add_argument("--user-id", type=int, default=None, help="Only rebuild this user (default: every user)")
+
+    for name, help_text in (
+        ("rebuild-streaks", "Recompute completion streaks from raw completions"),
+        ("verify-streaks", "Compare stored streaks with a recomputation; exits 1 on mismatch"),
+    ):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("--user-id", type=int, default=None, help="Only this user (default: every user)")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "migrate":
+        create_tables()
+        print("Database is up to date")
+    elif args.command == "rebuild-rollups":
+        rebuilt = asyncio.run(rebuild_rollups(args.user_id))
+        print(f"Rebuilt daily rollups for {rebuilt} user(s)")
+    elif args.command == "rebuild-streaks":
+        asyncio.run(rebuild_streaks(args.user_id))
+        print("Recomputed streaks")
+    elif args.command == "verify-streaks":
+        mismatches = asyncio.run(verify_streaks(args.user_id))
+        for mismatch in mismatches:
+            print(f"user {mismatch['user_id']}: stored {mismatch['stored']}, computed {mismatch['computed']}")
+        print(f"{len(mismatches)} user(s) with mismatched streaks")
+        return 1 if mismatches else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""initial schema
+
+Tables as previously created by Base.metadata.create_all at startup.
+Databases created that way are stamped at this revision on first migration.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-16 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("hashed_password", sa.String(), nullable=False),
+        sa.Column("timezone", sa.String(), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+    op.create_index("ix_users_id", "users", ["id"], unique=False)
+
+    op.create_table(
+        "routine_templates",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("mood_tags", sa.JSON(), nullable=False),
+        sa.Column("goal_tags", sa.JSON(), nullable=False),
+        sa.Column("steps", sa.JSON(), nullable=False),
+        sa.Column("category", sa.String(), nullable=False),
+        sa.Column("priority", sa.String(), nullable=False),
+        sa.Column("estimated_duration", sa.Integer(), nullable=False),
+        sa.Column("usage_count", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_routine_templates_id", "routine_templates", ["id"], unique=False)
+
+    op.create_table(
+        "user_preferences",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("preferred_moods", sa.JSON(), nullable=True),
+        sa.Column("preferred_duration", sa.Integer(), nullable=True),
+        sa.Column("preferred_categories", sa.JSON(), nullable=True),
+        sa.Column("notification_enabled", sa.Boolean(), nullable=True),
+        sa.Column("daily_reminder_time", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_user_preferences_id", "user_preferences", ["id"], unique=False)
+
+    op.create_table(
+        "routines",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("mood", sa.String(), nullable=False),
+        sa.Column("goal", sa.Text(), nullable=False),
+        sa.Column("steps", sa.JSON(), nullable=False),
+        sa.Column("context", sa.Text(), nullable=True),
+        sa.Column("duration", sa.Integer(), nullable=True),
+        sa.Column("category", sa.String(), nullable=True),
+        sa.Column("priority", sa.String(), nullable=True),
+        sa.Column("is_template", sa.Boolean(), nullable=True),
+        sa.Column("completion_count", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_routines_id", "routines", ["id"], unique=False)
+
+    op.create_table(
+        "routine_completions",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("routine_id", sa.Integer(), nullable=False),
+        sa.Column("completed_steps", sa.JSON(), nullable=False),
+        sa.Column("mood_before", sa.String(), nullable=True),
+        sa.Column("mood_after", sa.String(), nullable=True),
+        sa.Column("effectiveness_rating", sa.Integer(), nullable=True),
+        sa.Column("notes", sa.Text(), nullable=True),
+        sa.Column("duration_taken", sa.Integer(), nullable=True),
+        sa.Column("completed_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["routine_id"], ["routines.id"]),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_routine_completions_id", "routine_completions", ["id"], unique=False)
+
+    op.create_table(
+        "mood_entries",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("mood", sa.String(), nullable=False),
+        sa.Column("intensity", sa.Integer(), nullable=True),
+        sa.Column("context", sa.Text(), nullable=True),
+        sa.Column("triggers", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_mood_entries_id", "mood_entries", ["id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_mood_entries_id", table_name="mood_entries")
+    op.drop_table("mood_entries")
+    op.drop_index("ix_routine_completions_id", table_name="routine_completions")
+    op.drop_table("routine_completions")
+    op.drop_index("ix_routines_id", table_name="routines")
+    op.drop_table("routines")
+    op.drop_index("ix_user_preferences_id", table_name="user_preferences")
+    op.drop_table("user_preferences")
+    op.drop_index("ix_routine_templates_id", table_name="routine_templates")
+    op.drop_table("routine_templates")
+    op.drop_index("ix_users_id", table_name="users")
+    op.drop_index("ix_users_email", table_name="users")
+    op.drop_table("users")
@@ -0,0 +1,41 @@
+"""per-user time-range indexes
+
+Composite indexes for the per-user queries that filter on user_id and
+sort or range on a timestamp (routine lists, mood history, analytics,
+streaks), plus (user_id, completion_count) for recommendations.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-16 09:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ("ix_routines_user_id_created_at", "routines", ["user_id", "created_at"]),
+    ("ix_routines_user_id_completion_count", "routines", ["user_id", "completion_count"]),
+    ("ix_routine_completions_user_id_completed_at", "routine_completions", ["user_id", "completed_at"]),
+    ("ix_mood_entries_user_id_created_at", "mood_entries", ["user_id", "created_at"]),
+]
+
+
+def upgrade() -> None:
+    # On Postgres, build without locking out writes; CONCURRENTLY can't run in a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
@@ -0,0 +1,100 @@
+"""per-user daily rollups for analytics
+
+user_daily_stats holds one row of activity totals per user and UTC day;
+user_daily_counts holds per-day counts of routine moods, routine categories
+and logged moods. Both are backfilled from the existing rows.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+STAT_COLUMNS = [
+    "routines_created", "completions", "effectiveness_sum", "effectiveness_count",
+    "mood_entries", "intensity_sum", "intensity_count",
+]
+
+BACKFILL_STATS = """
+INSERT INTO user_daily_stats (user_id, day, routines_created, completions, effectiveness_sum,
+                              effectiveness_count, mood_entries, intensity_sum, intensity_count)
+SELECT user_id, day, SUM(routines_created), SUM(completions), SUM(effectiveness_sum),
+       SUM(effectiveness_count), SUM(mood_entries), SUM(intensity_sum), SUM(intensity_count)
+FROM (
+    SELECT user_id, date(created_at) AS day, COUNT(*) AS routines_created, 0 AS completions,
+           0 AS effectiveness_sum, 0 AS effectiveness_count, 0 AS mood_entries,
+           0 AS intensity_sum, 0 AS intensity_count
+    FROM routines GROUP BY user_id, date(created_at)
+    UNION ALL
+    SELECT user_id, date(completed_at), 0, COUNT(*), COALESCE(SUM(effectiveness_rating), 0),
+           COUNT(effectiveness_rating), 0, 0, 0
+    FROM routine_completions GROUP BY user_id, date(completed_at)
+    UNION ALL
+    SELECT user_id, date(created_at), 0, 0, 0, 0, COUNT(*), COALESCE(SUM(intensity), 0), COUNT(intensity)
+    FROM mood_entries GROUP BY user_id, date(created_at)
+) AS activity
+WHERE day IS NOT NULL
+GROUP BY user_id, day
+"""
+
+BACKFILL_COUNTS = [
+    """
+    INSERT INTO user_daily_counts (user_id, facet, day, value, count)
+    SELECT user_id, 'routine_mood', date(created_at), mood, COUNT(*)
+    FROM routines WHERE created_at IS NOT NULL
+    GROUP BY user_id, date(created_at), mood
+    """,
+    """
+    INSERT INTO user_daily_counts (user_id, facet, day, value, count)
+    SELECT user_id, 'routine_category', date(created_at), category, COUNT(*)
+    FROM routines WHERE created_at IS NOT NULL AND category IS NOT NULL
+    GROUP BY user_id, date(created_at), category
+    """,
+    """
+    INSERT INTO user_daily_counts (user_id, facet, day, value, count)
+    SELECT user_id, 'mood', date(created_at), mood, COUNT(*)
+    FROM mood_entries WHERE created_at IS NOT NULL
+    GROUP BY user_id, date(created_at), mood
+    """,
+]
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_daily_stats",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        *[sa.Column(name, sa.Integer(), nullable=False) for name in STAT_COLUMNS],
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("user_id", "day"),
+    )
+    op.create_table(
+        "user_daily_counts",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("facet", sa.String(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("value", sa.String(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("user_id", "facet", "day", "value"),
+    )
+
+    op.execute(BACKFILL_STATS)
+    for statement in BACKFILL_COUNTS:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    op.drop_table("user_daily_counts")
+    op.drop_table("user_daily_stats")
@@ -0,0 +1,78 @@
+"""per-user stats with completion streaks
+
+user_stats keeps each user's current streak, longest streak and last
+completion day so analytics don't walk the completions table. Backfilled
+from distinct completion days with gaps-and-islands.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# {day_number} turns a date into a day count; consecutive days minus their
+# row number share an island, i.e. a streak
+BACKFILL = """
+WITH days AS (
+    SELECT DISTINCT user_id, date(completed_at) AS day
+    FROM routine_completions
+    WHERE completed_at IS NOT NULL
+),
+islands AS (
+    SELECT user_id, day, {day_number} - ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY day) AS island
+    FROM days
+),
+runs AS (
+    SELECT user_id, COUNT(*) AS length, MAX(day) AS end_day
+    FROM islands
+    GROUP BY user_id, island
+),
+ranked AS (
+    SELECT user_id, length, end_day,
+           MAX(length) OVER (PARTITION BY user_id) AS longest,
+           ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY end_day DESC) AS recency
+    FROM runs
+)
+INSERT INTO user_stats (user_id, current_streak, longest_streak, last_completion_day)
+SELECT user_id, length, longest, end_day
+FROM ranked
+WHERE recency = 1
+"""
+
+DAY_NUMBER = {
+    "postgresql": "(day - DATE '1970-01-01')",
+    "sqlite": "CAST(julianday(day) AS INTEGER)",
+}
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_stats",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("current_streak", sa.Integer(), nullable=False),
+        sa.Column("longest_streak", sa.Integer(), nullable=False),
+        sa.Column("last_completion_day", sa.Date(), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+
+    day_number = DAY_NUMBER.get(op.get_context().dialect.name)
+    if day_number is None:
+        # Other databases start empty; run `python manage.py rebuild-streaks`
+        return
+    op.execute(BACKFILL.format(day_number=day_number))
+
+
+def downgrade() -> None:
+    op.drop_table("user_stats")
@@ -0,0 +1,104 @@
+"""full-text search over routines
+
+SQLite: an external-content FTS5 table over mood, goal, context and steps,
+kept in sync by triggers. user_id is indexed too so a search only walks
+the searching user's postings. Postgres: a stored, weighted tsvector generated
+column with a GIN index. Other databases keep the ilike search.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SQLITE_UPGRADE = [
+    """
+    CREATE VIRTUAL TABLE routines_fts USING fts5(
+        user_id, mood, goal, context, steps,
+        content='routines', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER routines_fts_insert AFTER INSERT ON routines BEGIN
+        INSERT INTO routines_fts (rowid, user_id, mood, goal, context, steps)
+        VALUES (new.id, new.user_id, new.mood, new.goal, new.context, new.steps);
+    END
+    """,
+    """
+    CREATE TRIGGER routines_fts_delete AFTER DELETE ON routines BEGIN
+        INSERT INTO routines_fts (routines_fts, rowid, user_id, mood, goal, context, steps)
+        VALUES ('delete', old.id, old.user_id, old.mood, old.goal, old.context, old.steps);
+    END
+    """,
+    # Only text changes reindex; completion_count updates don't touch the index
+    """
+    CREATE TRIGGER routines_fts_update AFTER UPDATE OF user_id, mood, goal, context, steps ON routines BEGIN
+        INSERT INTO routines_fts (routines_fts, rowid, user_id, mood, goal, context, steps)
+        VALUES ('delete', old.id, old.user_id, old.mood, old.goal, old.context, old.steps);
+        INSERT INTO routines_fts (rowid, user_id, mood, goal, context, steps)
+        VALUES (new.id, new.user_id, new.mood, new.goal, new.context, new.steps);
+    END
+    """,
+    "INSERT INTO routines_fts (routines_fts) VALUES ('rebuild')",
+]
+
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS routines_fts_update",
+    "DROP TRIGGER IF EXISTS routines_fts_delete",
+    "DROP TRIGGER IF EXISTS routines_fts_insert",
+    "DROP TABLE IF EXISTS routines_fts",
+]
+
+POSTGRES_SEARCH_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(goal, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(mood, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(steps::text, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(context, '')), 'C')"
+)
+
+
+def _sqlite_has_fts5() -> bool:
+    options = op.get_bind().exec_driver_sql("PRAGMA compile_options").scalars().all()
+    return "ENABLE_FTS5" in options
+
+
+def upgrade() -> None:
+    dialect = op.get_context().dialect.name
+    if dialect == "sqlite":
+        if not _sqlite_has_fts5():
+            # Search falls back to ilike on SQLite builds without FTS5
+            return
+        for statement in SQLITE_UPGRADE:
+            op.execute(statement)
+    elif dialect == "postgresql":
+        op.add_column("routines", sa.Column(
+            "search_vector", postgresql.TSVECTOR(), sa.Computed(POSTGRES_SEARCH_VECTOR, persisted=True)
+        ))
+        with op.get_context().autocommit_block():
+            op.create_index(
+                "ix_routines_search_vector", "routines", ["search_vector"],
+                postgresql_using="gin", postgresql_concurrently=True
+            )
+
+
+def downgrade() -> None:
+    dialect = op.get_context().dialect.name
+    if dialect == "sqlite":
+        for statement in SQLITE_DOWNGRADE:
+            op.execute(statement)
+    elif dialect == "postgresql":
+        with op.get_context().autocommit_block():
+            op.drop_index("ix_routines_search_vector", table_name="routines", postgresql_concurrently=True)
+        op.drop_column("routines", "search_vector")
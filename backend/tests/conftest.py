@@ -0,0 +1,6 @@
+import os
+import tempfile
+
+# Point the app at a throwaway database before any app module builds its engines
+_db_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
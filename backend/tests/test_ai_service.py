@@ -0,0 +1,92 @@
+import asyncio
+import json
+
+import pytest
+
+from app.models.schemas import GenerateRequest
+from app.services.ai_service import AIService
+from app.services.response_parser import MAX_STEPS
+
+
+def test_caller_after_last_waiter_cancels_starts_a_fresh_call():
+    async def scenario():
+        service = AIService()
+        started = asyncio.Event()
+
+        async def slow():
+            started.set()
+            await asyncio.sleep(10)
+            return "stale"
+
+        async def fresh():
+            return "fresh"
+
+        first = asyncio.ensure_future(service._run_coalesced("key", slow))
+        await started.wait()
+        first.cancel()
+        # Let the cancellation reach the shared call, but not settle it
+        await asyncio.sleep(0)
+        assert first.cancelled()
+
+        result = await service._run_coalesced("key", fresh)
+        return service, result
+
+    service, result = asyncio.run(scenario())
+    assert result == "fresh"
+    assert service.coalesce_cancellations == 1
+    assert service.coalesce_leaders == 2
+
+
+def test_cancelled_waiter_does_not_cancel_the_shared_call():
+    async def scenario():
+        service = AIService()
+        release = asyncio.Event()
+
+        async def call():
+            await release.wait()
+            return "shared"
+
+        first = asyncio.ensure_future(service._run_coalesced("key", call))
+        second = asyncio.ensure_future(service._run_coalesced("key", call))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(scenario()) == "shared"
+
+
+def _routine_request():
+    return GenerateRequest(mood="tired", goal="wind down", duration=10)
+
+
+def test_stream_routine_releases_the_slot_before_the_client_reads():
+    async def scenario():
+        service = AIService()
+        service.cache = None
+        steps = [f"Step {i}" for i in range(MAX_STEPS + 4)]
+        text = json.dumps({"steps": steps, "duration": 10, "tips": []})
+
+        async def fake_stream(prompt):
+            for i in range(0, len(text), 7):
+                yield text[i:i + 7]
+
+        service._stream_llm = fake_stream
+        events = service.stream_routine(_routine_request())
+        first = await events.__anext__()
+        # The client has read one event; the provider is already drained
+        await asyncio.sleep(0)
+        active = service.scheduler._active
+        rest = [event async for event in events]
+        return active, [first] + rest
+
+    active, events = asyncio.run(scenario())
+    assert active == 0
+    streamed = [payload["step"] for kind, payload in events if kind == "step"]
+    kind, result = events[-1]
+    assert kind == "complete"
+    assert streamed == [f"Step {i}" for i in range(MAX_STEPS)]
+    assert result.steps == streamed
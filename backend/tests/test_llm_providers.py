@@ -0,0 +1,41 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services.llm_providers import FakeLLMProvider, LLMProviderError, LLMRateLimitError
+
+MESSAGES = [{"role": "user", "content": "I feel tired"}]
+
+
+def elapsed(coro_factory, error):
+    async def scenario():
+        started = time.perf_counter()
+        with pytest.raises(error):
+            await coro_factory()
+        return time.perf_counter() - started
+
+    return asyncio.run(scenario())
+
+
+def test_forced_error_takes_the_configured_latency():
+    provider = FakeLLMProvider(latency_ms=50, distribution="constant", error_rate=1.0)
+    assert elapsed(lambda: provider.complete(MESSAGES, 100, 0.7), LLMProviderError) >= 0.05
+
+
+def test_forced_stream_error_takes_the_configured_latency():
+    provider = FakeLLMProvider(latency_ms=50, distribution="constant", error_rate=1.0)
+
+    async def consume():
+        async for _ in provider.stream(MESSAGES, 100, 0.7):
+            pass
+
+    assert elapsed(consume, LLMProviderError) >= 0.05
+
+
+def test_rate_limit_takes_its_fraction_of_the_latency():
+    provider = FakeLLMProvider(
+        latency_ms=200, distribution="constant", rate_limit_rate=1.0, rate_limit_latency_fraction=0.25
+    )
+    took = elapsed(lambda: provider.complete(MESSAGES, 100, 0.7), LLMRateLimitError)
+    assert 0.05 <= took < 0.2
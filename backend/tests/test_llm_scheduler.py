@@ -0,0 +1,38 @@
+import asyncio
+
+import pytest
+
+from app.models.schemas import PriorityLevel
+from app.services.llm_scheduler import LLMScheduler, TokenBucket
+
+
+def test_repeated_drains_do_not_stack():
+    bucket = TokenBucket(rate_per_second=2.0, capacity=10)
+    for _ in range(8):
+        bucket.drain(5.0)
+    # Five seconds of backoff, plus half a second to refill one token
+    assert bucket.time_until_available() == pytest.approx(5.5, abs=0.05)
+
+
+def test_concurrent_throttles_pause_for_one_backoff():
+    scheduler = LLMScheduler(
+        max_concurrency=8, requests_per_minute=60, burst=8,
+        max_wait={priority: None for priority in PriorityLevel}
+    )
+
+    async def rate_limited():
+        await asyncio.sleep(0)
+        scheduler.throttle(5.0)
+
+    async def scenario():
+        await asyncio.gather(*(rate_limited() for _ in range(8)))
+
+    asyncio.run(scenario())
+    assert scheduler.bucket.time_until_available() == pytest.approx(6.0, abs=0.05)
+
+
+def test_drain_keeps_a_longer_pause():
+    bucket = TokenBucket(rate_per_second=1.0, capacity=5)
+    bucket.drain(10.0)
+    bucket.drain(2.0)
+    assert bucket.time_until_available() == pytest.approx(11.0, abs=0.05)
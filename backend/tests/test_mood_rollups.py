@@ -0,0 +1,39 @@
+from datetime import date, datetime
+
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from app.main import app
+from app.models.database import MoodEntry, SessionLocal, UserDailyStats
+
+# 23:30 in New York is 04:30 the next day in UTC
+AWARE_TIMESTAMP = "2026-03-01T23:30:00-05:00"
+
+
+def test_create_and_import_store_aware_timestamps_as_utc():
+    with TestClient(app) as client:
+        client.post("/api/v1/auth/register", json={"email": "tz@example.com", "password": "password123", "name": "Tz"})
+        token = client.post("/api/v1/auth/login", data={"username": "tz@example.com", "password": "password123"}).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        user_id = client.get("/api/v1/auth/me", headers=headers).json()["id"]
+
+        created = client.post("/api/v1/moods/", json={"mood": "Calm", "intensity": 4, "created_at": AWARE_TIMESTAMP}, headers=headers)
+        assert created.status_code == 200
+        imported = client.post(
+            "/api/v1/moods/import?format=ndjson",
+            content=f'{{"mood": "Calm", "intensity": 6, "created_at": "{AWARE_TIMESTAMP}"}}\n'.encode(),
+            headers=headers
+        )
+        assert imported.status_code == 200
+
+    db = SessionLocal()
+    try:
+        stored = db.scalars(select(MoodEntry.created_at).where(MoodEntry.user_id == user_id)).all()
+        days = db.execute(
+            select(UserDailyStats.day, UserDailyStats.mood_entries).where(UserDailyStats.user_id == user_id)
+        ).all()
+    finally:
+        db.close()
+
+    assert stored == [datetime(2026, 3, 2, 4, 30)] * 2
+    assert [tuple(row) for row in days] == [(date(2026, 3, 2), 2)]
@@ -0,0 +1,9 @@
+from benchmarks.check_query_plans import check_plans
+
+
+def test_per_user_queries_use_an_index():
+    results = check_plans()
+    assert results
+
+    failures = {" ".join(statement.split()): problems for statement, _, problems in results if problems}
+    assert not failures
@@ -0,0 +1,80 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.api.dependencies import get_read_db
+from app.core.read_routing import write_tracker
+from app.main import app
+from app.models import database
+from app.models.database import AsyncSessionLocal, Base, MoodEntry, User
+
+
+@pytest.fixture
+def replica_url(monkeypatch, tmp_path):
+    """A second SQLite file serving as READ_DATABASE_URL"""
+    url = f"sqlite:///{tmp_path / 'replica.db'}"
+    Base.metadata.create_all(create_engine(url))
+    replica_engine = database._create_async_engine(url, "replica")
+    monkeypatch.setattr(database, "read_engine", replica_engine)
+    monkeypatch.setattr(database, "ReadSessionLocal", async_sessionmaker(
+        replica_engine, autoflush=False, expire_on_commit=False, sync_session_class=database.ReadOnlySession
+    ))
+    monkeypatch.setattr(write_tracker, "_last_write", {})
+    return url
+
+
+def login(client, email):
+    client.post("/api/v1/auth/register", json={"email": email, "password": "password123", "name": "Reader"})
+    token = client.post("/api/v1/auth/login", data={"username": email, "password": "password123"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    return headers, client.get("/api/v1/auth/me", headers=headers).json()["id"]
+
+
+def test_reads_use_the_replica_except_right_after_a_write(replica_url):
+    with TestClient(app) as client:
+        headers, user_id = login(client, "replica@example.com")
+        with create_engine(replica_url).begin() as replica:
+            replica.execute(insert(User), {
+                "id": user_id, "email": "replica@example.com", "name": "Reader", "hashed_password": "x"
+            })
+            replica.execute(insert(MoodEntry), {
+                "user_id": user_id, "mood": "FromReplica", "intensity": 5, "created_at": datetime.utcnow()
+            })
+
+        def moods():
+            return [entry["mood"] for entry in client.get("/api/v1/moods/", headers=headers).json()]
+
+        assert moods() == ["FromReplica"]
+
+        client.post("/api/v1/moods/", json={"mood": "Calm", "intensity": 6}, headers=headers)
+        # Read-your-writes: pinned to the primary, which has the new entry
+        assert moods() == ["Calm"]
+
+        # Once the window has passed, reads go back to the replica
+        write_tracker._last_write.clear()
+        assert moods() == ["FromReplica"]
+
+
+def test_read_session_does_not_hold_the_auth_transaction(replica_url):
+    with TestClient(app) as client:
+        _, user_id = login(client, "auth@example.com")
+
+    async def scenario():
+        async with AsyncSessionLocal() as auth_db:
+            user = await auth_db.get(User, user_id)
+            assert auth_db.in_transaction()
+
+            dependency = get_read_db(current_user=user, auth_db=auth_db)
+            read_db = await dependency.__anext__()
+            try:
+                assert not auth_db.in_transaction()
+                assert read_db.bind is database.read_engine
+                assert user.id == user_id
+            finally:
+                await dependency.aclose()
+
+    asyncio.run(scenario())
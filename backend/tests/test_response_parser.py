@@ -0,0 +1,51 @@
+import pytest
+
+from app.services import response_parser
+from app.services.response_parser import extract_json_object, parse_routine_response
+from benchmarks.llm_response_corpus import CASES
+
+
+@pytest.mark.parametrize("case", CASES, ids=[case["name"] for case in CASES])
+def test_corpus_case(case):
+    result = parse_routine_response(case["text"])
+    assert result["steps"] == case["steps"]
+    assert result["duration"] == case["duration"]
+
+
+def test_nested_object_with_required_key_is_found():
+    text = 'Result: {"meta": {"v": 1}, "routine": {"steps": ["Breathe"]}} and {"steps": ["Later"]}'
+    assert extract_json_object(text, required_key="steps") == {"steps": ["Breathe"]}
+
+
+def test_balanced_object_after_malformed_one():
+    text = '{"bad": [1, 2,, 3]} then {"steps": ["Breathe"]}'
+    assert extract_json_object(text, required_key="steps") == {"steps": ["Breathe"]}
+
+
+class CountingDecoder:
+    """Wraps the parser's JSONDecoder and tallies the text each raw_decode may scan"""
+
+    def __init__(self, decoder):
+        self.decoder = decoder
+        self.calls = 0
+        self.chars = 0
+
+    def raw_decode(self, text, idx=0):
+        self.calls += 1
+        self.chars += len(text) - idx
+        return self.decoder.raw_decode(text, idx)
+
+
+def test_truncated_nested_output_is_decoded_in_linear_work(monkeypatch):
+    def decode_work(depth):
+        text = '{"steps": ["Breathe"], "plan": ' + '{"note": "Slow down {a bit}.", "next": ' * depth + '{"note": "Kee'
+        decoder = CountingDecoder(response_parser._DECODER)
+        monkeypatch.setattr(response_parser, "_DECODER", decoder)
+        parse_routine_response(text)
+        return decoder.calls, decoder.chars / len(text)
+
+    shallow_calls, shallow_passes = decode_work(200)
+    deep_calls, deep_passes = decode_work(800)
+    # A decode attempt per "{" would grow with depth and read the text hundreds of times over
+    assert deep_calls == shallow_calls
+    assert deep_passes < 5